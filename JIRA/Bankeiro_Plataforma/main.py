@@ -1,228 +1,397 @@
-import time
-import os
-import requests
-from dotenv import load_dotenv
-
-# Load .env file
-load_dotenv()
-
-# ========= Jira (Cloud) =========
-JIRA_BASE = os.getenv("JIRA_BASE", "https://bankeirobrasil.atlassian.net")
-JIRA_AUTH_HEADER = os.environ["JIRA_AUTH_HEADER"]
-JIRA_HEADERS = {
-    "Accept": "application/json",
-    "Authorization": JIRA_AUTH_HEADER,
-}
-
-# ========= Slack =========
-SLACK_WEBHOOK_URL = os.environ["SLACK_WEBHOOK_URL"]
-
-FIELD_NAME = "Bankeiro Team"
-FIELD_KEY = 'customfield_11404'
-
-JQL_DOWNSTREAM = (
-    'project=PLTF AND issuetype in (Story, "Incident (PRD)", Kaizen) '
-    'AND status in (Comprometido, "REF. SQUAD", Develop, "Para Teste", Teste, "Ready Release")'
-)
-
-JQL_UPSTREAM = (
-    'project=PLTF AND issuetype in (Story, "Incident (PRD)", Kaizen) '
-    'AND status in (Backlog, "REF. FUNCIONAL", "REF. TÉCNICO", "Pronto p/ Comprometimento")'
-)
-
-JQL_SPECIAL_ISSUES = (
-    "project=PLTF AND issuetype in (Pendência, Risco, Problema) and statusCategory != Done"
-)
-
-JQL_INCIDENTS = (
-    'project=PLTF AND issuetype = "Incident (PRD)" '
-    'AND status in (Comprometido, "REF. SQUAD", Develop, "Para Teste", Teste, "Ready Release")'
-)
-
-VALUES = [
-    'Adquirência', 'Autorizadores', 'Benefícios', 'Caixinha', 'Cartão', 'Conta',
-    'Crédito', 'Investimento', 'Misc', 'Novos Cores', 'Onboarding',
-    'Regulatório', 'Transacional'
-]
-
-
-def fetch_counts_by_team(base_jql: str) -> tuple[dict, int]:
-    """
-    Faz UMA chamada pro JQL base e retorna:
-      - dict { "Nome do Time": quantidade }
-      - total de issues nesse JQL
-    """
-    url = f"{JIRA_BASE}/rest/api/3/search/jql"
-    params = {
-        "jql": base_jql,
-        "maxResults": 5000,        # limite alto, 1 página
-        "fields": FIELD_KEY        # só traz o campo Bankeiro Team
-    }
-
-    response = requests.get(url, params=params, headers=JIRA_HEADERS, timeout=30)
-    response.raise_for_status()
-    data = response.json()
-
-    # garante que todos os VALUES existem na dict, mesmo se 0
-    counts = {team: 0 for team in VALUES}
-
-    for issue in data.get("issues", []):
-        fields = issue.get("fields", {})
-        team_field = fields.get(FIELD_KEY)
-
-        # multiselect: normalmente é uma lista de opções
-        team_name = None
-        if isinstance(team_field, list):
-            if team_field:
-                team_name = team_field[0].get("value") or team_field[0].get("name")
-        elif isinstance(team_field, dict):
-            team_name = team_field.get("value") or team_field.get("name")
-
-        if team_name and team_name in counts:
-            counts[team_name] += 1
-
-    total = sum(counts.values())
-    return counts, total
-
-def post_slack(text: str, blocks=None):
-    payload = {"text": text}
-    if blocks:
-        payload["blocks"] = blocks
-    r = requests.post(SLACK_WEBHOOK_URL, json=payload, timeout=30)
-    r.raise_for_status()
-
-
-def build_slack_blocks(rows, total_downstream, total_upstream, total_special):
-    # rows = [(value, downstream_total, upstream_count, special_count, incidents_count), ...]
-    # ordenar por downstream_total (index 1)
-    rows_sorted = sorted(rows, key=lambda x: x[1], reverse=True)
-
-    # Times que vão pro bloco principal: têm algum downstream OU algum especial OU algum incident
-    display_rows = [
-        (value, downstream_total, upstream_count, special_count, incidents_count)
-        for value, downstream_total, upstream_count, special_count, incidents_count in rows_sorted
-        if downstream_total > 0 or special_count > 0 or incidents_count > 0
-    ]
-
-    # Listas em ordem alfabética
-    zero_downstream_values = sorted([
-        value
-        for value, downstream_total, upstream_count, special_count, incidents_count in rows_sorted
-        if downstream_total == 0
-    ])
-
-    zero_special_values = sorted([
-        value
-        for value, downstream_total, upstream_count, special_count, incidents_count in rows_sorted
-        if special_count == 0
-    ])
-
-    blocks = [
-        {
-            "type": "header",
-            "text": {
-                "type": "plain_text",
-                "text": "Visão Geral de Issues por Time Bankeiro"
-            }
-        },
-        {
-            "type": "context",
-            "elements": [
-                {
-                    "type": "mrkdwn",
-                    "text": "<https://bankeirobrasil.atlassian.net/jira/software/c/projects/PLTF/boards/1798|Abrir Jira>"
-                }
-            ]
-        },
-        {
-            "type": "section",
-            "fields": [
-                {
-                    "type": "mrkdwn",
-                    "text": f"*Total em Upstream:* *{total_upstream}*"
-                },
-                {
-                    "type": "mrkdwn",
-                    "text": f"*Total em Downstream:* *{total_downstream}*"
-                }
-            ]
-        },
-        {"type": "divider"}
-    ]
-
-    # Cada linha = 1 section, com até 2 colunas
-    for i in range(0, len(display_rows), 2):
-        chunk = display_rows[i:i+2]
-        fields = []
-        for value, downstream_total, upstream_count, special_count, incidents_count in chunk:
-            # Itens normais = downstream_total - incidents
-            itens_count = max(downstream_total - incidents_count, 0)
-            fields.append({
-                "type": "mrkdwn",
-                "text": (
-                    f"*{value}*\n"
-                    f"`{itens_count}` Itens\n"
-                    f"`{incidents_count}` Incidentes\n"
-                    f"`{special_count}` Issues Especiais"
-                )
-            })
-        blocks.append({
-            "type": "section",
-            "fields": fields
-        })
-
-    if zero_downstream_values or zero_special_values:
-        blocks.append({"type": "divider"})
-
-    if zero_downstream_values:
-        zeros_downstream_text = ", ".join(zero_downstream_values)
-        blocks.append({
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": f"*Sem issues em downstream:*\n{zeros_downstream_text}"
-            }
-        })
-
-    if zero_special_values:
-        zeros_special_text = ", ".join(zero_special_values)
-        blocks.append({
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": f"*Sem issues especiais:*\n{zeros_special_text}"
-            }
-        })
-
-    return blocks
-
-def main():
-    # 4 chamadas no total, uma por JQL
-    downstream_counts, total_downstream = fetch_counts_by_team(JQL_DOWNSTREAM)
-    upstream_counts, total_upstream = fetch_counts_by_team(JQL_UPSTREAM)
-    special_counts, total_special = fetch_counts_by_team(JQL_SPECIAL_ISSUES)
-    incidents_counts, total_incidents = fetch_counts_by_team(JQL_INCIDENTS)
-
-    rows = []
-    for value in VALUES:
-        downstream_total = downstream_counts.get(value, 0)
-        upstream_count = upstream_counts.get(value, 0)
-        special_count = special_counts.get(value, 0)
-        incidents_count = incidents_counts.get(value, 0)
-
-        rows.append((value, downstream_total, upstream_count, special_count, incidents_count))
-
-    blocks = build_slack_blocks(rows, total_downstream, total_upstream, total_special)
-
-    fallback_text = (
-        f"Visão geral por {FIELD_NAME} – "
-        f"Downstream: {total_downstream}, Upstream: {total_upstream}, "
-        f"Especiais: {total_special}"
-    )
-
-    post_slack(text=fallback_text, blocks=blocks)
-
-
-
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+import time
+import os
+import sys
+import json
+import math
+import pathlib
+import argparse
+import requests
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))  # JIRA/ -> pacote common
+from common import metrics
+from common.config import ConfigError, exit_on_config_error, require_env
+from common.jira_client import JiraClient
+from common.metrics import METRICS
+from common.slack_client import SlackClient
+from common.slack_tokens import slack_token
+from report_engine import build_report_blocks, group_value, matches, predicate_jql, union_jql
+
+# Load .env file (só como script; o CLI apmo carrega antes de importar o módulo)
+if __name__ == "__main__":
+    load_dotenv()
+
+# ========= Jira (Cloud) =========
+# JIRA_BASE / JIRA_AUTH_HEADER / SLACK_WEBHOOK_URL são lidos em init(), não no import
+JIRA_BASE = None
+JIRA = None   # JiraClient, criado em init()
+
+# ========= Slack =========
+SLACK_WEBHOOK_URL = None
+# opcional: com o canal (e um bot token no TokenManager ou SLACK_BOT_TOKEN), o daemon
+# edita a mesma mensagem (chat.update) em vez de postar uma nova pelo webhook a cada mudança
+SLACK_CHANNEL_ID = None
+SLACK = None  # SlackClient (bot token), criado em init()
+
+# ========= Modo daemon =========
+CACHE_FILE = pathlib.Path(os.getenv("BANKEIRO_CACHE_FILE", pathlib.Path(__file__).with_name("bankeiro_cache.json")))
+POLL_SECONDS = int(os.getenv("BANKEIRO_POLL_SECONDS", "300"))
+POLL_OVERLAP_MIN = 2           # margem da janela `updated >= -Nm` (relógio/indexação do Jira)
+FULL_RESYNC_HOURS = float(os.getenv("BANKEIRO_FULL_RESYNC_HOURS", "6"))  # pega issues apagadas/movidas
+
+FIELD_NAME = "Bankeiro Team"
+FIELD_KEY = 'customfield_11404'
+
+# ========= Classificação =========
+# Uma única busca (JQL_ALL) traz tudo; cada issue é classificada localmente
+# nos buckets abaixo pelos campos issuetype/status.
+FLOW_TYPES = ["Story", "Incident (PRD)", "Kaizen"]
+INCIDENT_TYPE = "Incident (PRD)"
+SPECIAL_TYPES = ["Pendência", "Risco", "Problema"]
+
+DOWNSTREAM_STATUSES = ["Comprometido", "REF. SQUAD", "Develop", "Para Teste", "Teste", "Ready Release"]
+UPSTREAM_STATUSES = ["Backlog", "REF. FUNCIONAL", "REF. TÉCNICO", "Pronto p/ Comprometimento"]
+
+# predicados no formato do report_engine (mesma regra local e em JQL)
+BUCKET_RULES = {
+    "downstream": {"issuetype": FLOW_TYPES, "status": DOWNSTREAM_STATUSES},
+    "upstream": {"issuetype": FLOW_TYPES, "status": UPSTREAM_STATUSES},
+    "special": {"issuetype": SPECIAL_TYPES, "not": {"statusCategory": ["Done"]}},
+    "incidents": {"issuetype": [INCIDENT_TYPE], "status": DOWNSTREAM_STATUSES},
+}
+BUCKETS = tuple(BUCKET_RULES)
+
+# JQLs equivalentes de cada bucket (pra conferir no Jira)
+JQL_DOWNSTREAM = f"project=PLTF AND {predicate_jql(BUCKET_RULES['downstream'])}"
+JQL_UPSTREAM = f"project=PLTF AND {predicate_jql(BUCKET_RULES['upstream'])}"
+JQL_SPECIAL_ISSUES = f"project=PLTF AND {predicate_jql(BUCKET_RULES['special'])}"
+JQL_INCIDENTS = f"project=PLTF AND {predicate_jql(BUCKET_RULES['incidents'])}"
+
+# união dos 4 JQLs acima
+JQL_ALL = union_jql("PLTF", BUCKET_RULES.values())
+
+# só o necessário pra classificar
+FETCH_FIELDS = [FIELD_KEY, "status", "issuetype"]
+
+# delta do daemon: qualquer issue do projeto (inclusive as que SAÍRAM dos buckets)
+JQL_PROJECT = "project=PLTF"
+
+VALUES = [
+    'Adquirência', 'Autorizadores', 'Benefícios', 'Caixinha', 'Cartão', 'Conta',
+    'Crédito', 'Investimento', 'Misc', 'Novos Cores', 'Onboarding',
+    'Regulatório', 'Transacional'
+]
+
+
+def init():
+    """Lê a configuração do ambiente e cria os clients (1x por processo)."""
+    global JIRA_BASE, JIRA, SLACK_WEBHOOK_URL, SLACK_CHANNEL_ID, SLACK
+    if JIRA is not None:
+        return
+    auth_header, webhook = require_env("JIRA_AUTH_HEADER", "SLACK_WEBHOOK_URL")
+    JIRA_BASE = os.getenv("JIRA_BASE", "https://bankeirobrasil.atlassian.net")
+    JIRA = JiraClient(JIRA_BASE, auth_header=auth_header, pool_size=4)
+    SLACK_WEBHOOK_URL = webhook
+    SLACK_CHANNEL_ID = os.getenv("BANKEIRO_SLACK_CHANNEL_ID")
+    SLACK = SlackClient(slack_token("bot"), pool_size=2)
+
+
+def team_of(fields: dict):
+    """Valor do campo Bankeiro Team (multiselect: normalmente uma lista de opções)."""
+    return group_value(fields, FIELD_KEY)
+
+
+def classify(fields: dict) -> list[str]:
+    """Buckets em que a issue entra (mesma regra dos JQL_* acima)."""
+    return [bucket for bucket, rule in BUCKET_RULES.items() if matches(rule, fields)]
+
+
+def fetch_counts_by_team(jql: str = JQL_ALL) -> tuple[dict, dict]:
+    """
+    Uma passada só pelo JQL (paginado por nextPageToken no JiraClient,
+    em streaming) classificando cada issue localmente. Retorna:
+      - dict { bucket: { "Nome do Time": quantidade } }
+      - dict { bucket: total }
+    """
+    # garante que todos os VALUES existem em cada bucket, mesmo se 0
+    counts = {bucket: {team: 0 for team in VALUES} for bucket in BUCKETS}
+
+    for issue in JIRA.search(jql, fields=FETCH_FIELDS, page_size=5000, log=None):
+        fields = issue.get("fields", {})
+        team_name = team_of(fields)
+        if not team_name or team_name not in counts["downstream"]:
+            continue
+        for bucket in classify(fields):
+            counts[bucket][team_name] += 1
+
+    totals = {bucket: sum(counts[bucket].values()) for bucket in BUCKETS}
+    return counts, totals
+
+class TeamCache:
+    """
+    Mapa issue -> (time, status, issuetype, buckets) do PLTF, em memória e em
+    disco (CACHE_FILE), com as contagens por bucket/time mantidas incrementalmente.
+    Só guarda issues que caem em algum bucket com time conhecido.
+    """
+
+    def __init__(self, path: pathlib.Path = CACHE_FILE):
+        self.path = path
+        self.issues = {}
+        self.counts = {bucket: {team: 0 for team in VALUES} for bucket in BUCKETS}
+        self.last_poll = None     # epoch do início do último poll bem-sucedido
+        self.last_full = None     # epoch da última varredura completa
+        self.posted = None        # números da última mensagem postada
+        self.slack_ts = None      # ts da mensagem (chat.update)
+
+    @staticmethod
+    def entry_of(fields: dict):
+        team = team_of(fields)
+        if not team or team not in VALUES:
+            return None
+        buckets = classify(fields)
+        if not buckets:
+            return None
+        return {
+            "team": team,
+            "status": (fields.get("status") or {}).get("name"),
+            "issuetype": (fields.get("issuetype") or {}).get("name"),
+            "buckets": buckets,
+        }
+
+    def _count(self, entry, delta: int):
+        if entry:
+            for bucket in entry["buckets"]:
+                self.counts[bucket][entry["team"]] += delta
+
+    def set(self, key: str, entry) -> bool:
+        """Atualiza uma issue (entry=None tira do cache). Retorna True se algo mudou."""
+        old = self.issues.get(key)
+        if old == entry:
+            return False
+        self._count(old, -1)
+        self._count(entry, +1)
+        if entry is None:
+            del self.issues[key]
+        else:
+            self.issues[key] = entry
+        return True
+
+    def totals(self) -> dict:
+        return {bucket: sum(self.counts[bucket].values()) for bucket in BUCKETS}
+
+    def rebuild(self):
+        """Varredura completa (1 passada pelo JQL_ALL)."""
+        started = time.time()
+        self.issues = {}
+        self.counts = {bucket: {team: 0 for team in VALUES} for bucket in BUCKETS}
+        for issue in JIRA.search(JQL_ALL, fields=FETCH_FIELDS, page_size=5000, log=None):
+            self.set(issue["key"], self.entry_of(issue.get("fields", {})))
+        self.last_poll = self.last_full = started
+        print(f"Cache reconstruído: {len(self.issues)} issues")
+
+    def poll(self) -> int:
+        """Busca só o que mudou desde o último poll (`updated >= -Nm`). Retorna quantas issues mudaram."""
+        started = time.time()
+        minutes = math.ceil((started - self.last_poll) / 60) + POLL_OVERLAP_MIN
+        jql = f"{JQL_PROJECT} AND updated >= -{minutes}m"
+        changed = 0
+        for issue in JIRA.search(jql, fields=FETCH_FIELDS, page_size=5000, log=None):
+            changed += self.set(issue["key"], self.entry_of(issue.get("fields", {})))
+        self.last_poll = started
+        return changed
+
+    def load(self) -> bool:
+        if not self.path.exists():
+            return False
+        with open(self.path, "r", encoding="utf-8") as fp:
+            data = json.load(fp)
+        self.issues = {}
+        self.counts = {bucket: {team: 0 for team in VALUES} for bucket in BUCKETS}
+        for key, entry in data.get("issues", {}).items():
+            self.set(key, entry)
+        self.last_poll = data.get("last_poll")
+        self.last_full = data.get("last_full")
+        self.posted = data.get("posted")
+        self.slack_ts = data.get("slack_ts")
+        return self.last_poll is not None
+
+    def save(self):
+        data = {
+            "last_poll": self.last_poll,
+            "last_full": self.last_full,
+            "posted": self.posted,
+            "slack_ts": self.slack_ts,
+            "issues": self.issues,
+        }
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as fp:
+            json.dump(data, fp, ensure_ascii=False)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp, self.path)
+
+
+def post_slack(text: str, blocks=None):
+    payload = {"text": text}
+    if blocks:
+        payload["blocks"] = blocks
+    r = metrics.post("slack_webhook", SLACK_WEBHOOK_URL, json=payload, timeout=30)
+    r.raise_for_status()
+
+
+def post_or_update_slack(text: str, blocks, ts: str = None):
+    """
+    Com BANKEIRO_SLACK_CHANNEL_ID: posta (chat.postMessage) ou edita a
+    mensagem `ts` (chat.update) com o bot token do TokenManager e devolve o ts.
+    Sem canal, cai no webhook.
+    """
+    if not SLACK_CHANNEL_ID:
+        post_slack(text=text, blocks=blocks)
+        return None
+
+    payload = {"channel": SLACK_CHANNEL_ID, "text": text, "blocks": blocks}
+    if ts:
+        data = SLACK.call("chat.update", ts=ts, **payload)
+        if data.get("ok"):
+            return ts
+        # mensagem apagada/antiga demais: posta de novo
+        print(f"  ⚠ chat.update falhou ({data.get('error')}); postando nova mensagem")
+
+    data = SLACK.call("chat.postMessage", **payload)
+    if not data.get("ok"):
+        raise RuntimeError(f"Slack chat.postMessage: {data.get('error')}")
+    return data["ts"]
+
+
+def build_slack_blocks(rows, total_downstream, total_upstream, total_special):
+    # rows = [(value, downstream_total, upstream_count, special_count, incidents_count), ...]
+    # ordenar por downstream_total (index 1)
+    rows_sorted = sorted(rows, key=lambda x: x[1], reverse=True)
+
+    # Times que vão pro bloco principal: têm algum downstream OU algum especial OU algum incident
+    display_rows = [
+        (
+            value,
+            [
+                # Itens normais = downstream_total - incidents
+                f"`{max(downstream_total - incidents_count, 0)}` Itens",
+                f"`{incidents_count}` Incidentes",
+                f"`{special_count}` Issues Especiais",
+            ],
+        )
+        for value, downstream_total, upstream_count, special_count, incidents_count in rows_sorted
+        if downstream_total > 0 or special_count > 0 or incidents_count > 0
+    ]
+
+    # Listas em ordem alfabética
+    zero_downstream_values = sorted([
+        value
+        for value, downstream_total, upstream_count, special_count, incidents_count in rows_sorted
+        if downstream_total == 0
+    ])
+
+    zero_special_values = sorted([
+        value
+        for value, downstream_total, upstream_count, special_count, incidents_count in rows_sorted
+        if special_count == 0
+    ])
+
+    return build_report_blocks(
+        "Visão Geral de Issues por Time Bankeiro",
+        "https://bankeirobrasil.atlassian.net/jira/software/c/projects/PLTF/boards/1798",
+        summary=[("Total em Upstream", total_upstream), ("Total em Downstream", total_downstream)],
+        rows=display_rows,
+        zero_sections=[
+            ("Sem issues em downstream", zero_downstream_values),
+            ("Sem issues especiais", zero_special_values),
+        ],
+    )
+
+def render_report(counts: dict, totals: dict) -> tuple[str, list]:
+    """(texto fallback, blocks) a partir das contagens por bucket/time."""
+    total_downstream = totals["downstream"]
+    total_upstream = totals["upstream"]
+    total_special = totals["special"]
+
+    rows = []
+    for value in VALUES:
+        downstream_total = counts["downstream"].get(value, 0)
+        upstream_count = counts["upstream"].get(value, 0)
+        special_count = counts["special"].get(value, 0)
+        incidents_count = counts["incidents"].get(value, 0)
+
+        rows.append((value, downstream_total, upstream_count, special_count, incidents_count))
+
+    blocks = build_slack_blocks(rows, total_downstream, total_upstream, total_special)
+
+    fallback_text = (
+        f"Visão geral por {FIELD_NAME} – "
+        f"Downstream: {total_downstream}, Upstream: {total_upstream}, "
+        f"Especiais: {total_special}"
+    )
+    return fallback_text, blocks
+
+
+def main():
+    init()
+    # 1 busca só (união dos JQLs), classificada localmente
+    counts, totals = fetch_counts_by_team(JQL_ALL)
+    fallback_text, blocks = render_report(counts, totals)
+    post_slack(text=fallback_text, blocks=blocks)
+
+
+def run_daemon(poll_seconds: int = POLL_SECONDS):
+    """
+    Roda pra sempre: monta o cache issue -> time uma vez, depois só busca
+    o delta `updated >= -Nm` a cada `poll_seconds` e só posta/edita no Slack
+    quando algum número muda.
+    """
+    init()
+    cache = TeamCache()
+    if not cache.load():
+        cache.rebuild()
+        cache.save()
+
+    while True:
+        try:
+            if time.time() - (cache.last_full or 0) > FULL_RESYNC_HOURS * 3600:
+                cache.rebuild()
+            else:
+                changed = cache.poll()
+                if changed:
+                    print(f"{time.strftime('%H:%M:%S')} {changed} issues mudaram")
+
+            numbers = {"counts": cache.counts, "totals": cache.totals()}
+            if numbers != cache.posted:
+                fallback_text, blocks = render_report(cache.counts, numbers["totals"])
+                cache.slack_ts = post_or_update_slack(fallback_text, blocks, cache.slack_ts)
+                cache.posted = json.loads(json.dumps(numbers))  # cópia
+                print(f"{time.strftime('%H:%M:%S')} Slack atualizado: {fallback_text}")
+            cache.save()
+        except ConfigError:
+            raise  # token/credencial faltando não se resolve no próximo ciclo
+        except (requests.RequestException, RuntimeError) as e:
+            # falha de rede/Slack não derruba o daemon; tenta de novo no próximo ciclo
+            print(f"{time.strftime('%H:%M:%S')} Erro no ciclo: {e}")
+        # daemon não termina: o textfile do Prometheus é regravado a cada ciclo
+        METRICS.write()
+
+        time.sleep(poll_seconds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Visão geral de issues do PLTF por Bankeiro Team no Slack")
+    parser.add_argument(
+        "--daemon", action="store_true",
+        help="fica rodando e atualiza o Slack só quando os números mudam (delta por `updated`)",
+    )
+    parser.add_argument(
+        "--interval", type=int, default=POLL_SECONDS,
+        help=f"segundos entre polls no modo daemon (padrão {POLL_SECONDS}, env BANKEIRO_POLL_SECONDS)",
+    )
+    args = parser.parse_args()
+    with exit_on_config_error(), METRICS.run("bankeiro"):
+        if args.daemon:
+            run_daemon(args.interval)
+        else:
+            main()
\ No newline at end of file
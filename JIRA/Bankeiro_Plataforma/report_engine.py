@@ -0,0 +1,371 @@
+import os
+import sys
+import json
+import pathlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))  # JIRA/ -> pacote common
+from common import metrics
+from common.config import exit_on_config_error, jira_auth, require_env
+from common.jira_client import JiraClient
+from common.metrics import METRICS
+
+# campos que nunca vêm vazios (dispensa o `OR campo is EMPTY` no `not in`)
+NEVER_EMPTY = {"status", "statusCategory", "issuetype", "project"}
+
+# grupo das issues sem valor no campo de agrupamento (quando o relatório não fixa `values`)
+EMPTY_GROUP = "Sem valor"
+
+# relatório sem group_by: tudo cai num grupo só
+TOTAL_GROUP = "Total"
+
+# Formato de um relatório (lista em JSON, ver reports.example.json):
+#   {
+#     "name": "pltf-times",                      único
+#     "project": "PLTF",
+#     "title": "Visão Geral de Issues por Time",
+#     "link": "https://...",                     opcional (contexto "Abrir Jira")
+#     "group_by": {"field": "customfield_11404", "values": [...]},   values opcional: fixa ordem/filtra
+#     "buckets": {
+#       "downstream": {"issuetype": [...], "status": [...]},          AND entre campos, `in` dentro
+#       "special": {"issuetype": [...], "not": {"statusCategory": ["done"]}},   statusCategory pela key
+#                                                                      (new / indeterminate / done): o nome é traduzido
+#       "qualquer": {"any": [{...}, {...}]}                           OR de predicados
+#     },
+#     "display": {
+#       "summary": [["Total em Downstream", "downstream"]],
+#       "lines": [["Itens", "downstream"]],
+#       "sort_by": "downstream",
+#       "zero_sections": [["Sem issues em downstream", "downstream"]]
+#     },
+#     "slack_webhook_env": "SLACK_WEBHOOK_URL"   opcional
+#   }
+
+
+# ========= predicados =========
+
+def _names(value) -> set:
+    """Todos os nomes pelos quais um valor de campo pode ser comparado (casefold)."""
+    if value is None:
+        return set()
+    if isinstance(value, list):
+        return set().union(*(_names(v) for v in value)) if value else set()
+    if isinstance(value, dict):
+        return {
+            str(value[k]).strip().casefold()
+            for k in ("value", "name", "displayName", "key", "emailAddress", "accountId")
+            if value.get(k) is not None
+        }
+    return {str(value).strip().casefold()}
+
+
+def raw_value(fields: dict, name: str):
+    if name == "statusCategory":
+        return (fields.get("status") or {}).get("statusCategory")
+    return fields.get(name)
+
+
+def group_value(fields: dict, name: str):
+    """Rótulo do campo pra agrupar (multiselect: primeira opção)."""
+    value = raw_value(fields, name)
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, dict):
+        return value.get("value") or value.get("name") or value.get("displayName") or value.get("key")
+    return value
+
+
+def _hit(fields: dict, name: str, values: list) -> bool:
+    wanted = {str(v).strip().casefold() for v in values}
+    return bool(_names(raw_value(fields, name)) & wanted)
+
+
+def matches(predicate: dict, fields: dict) -> bool:
+    """Avalia um predicado de bucket sobre os `fields` de uma issue (mesma semântica do predicate_jql)."""
+    for name, values in predicate.items():
+        if name == "not":
+            if any(_hit(fields, f, v) for f, v in values.items()):
+                return False
+        elif name == "any":
+            if not any(matches(p, fields) for p in values):
+                return False
+        elif not _hit(fields, name, values):
+            return False
+    return True
+
+
+def predicate_fields(predicate: dict) -> set:
+    """Campos que a busca precisa trazer pra avaliar o predicado."""
+    out = set()
+    for name, values in predicate.items():
+        if name == "not":
+            out |= predicate_fields({f: [] for f in values})
+        elif name == "any":
+            for p in values:
+                out |= predicate_fields(p)
+        else:
+            out.add("status" if name == "statusCategory" else name)
+    return out
+
+
+# ========= JQL =========
+
+def jql_list(values: list) -> str:
+    return ", ".join(f'"{v}"' for v in values)
+
+
+def jql_field(name: str) -> str:
+    if name.startswith("customfield_"):
+        return f"cf[{name.split('_', 1)[1]}]"
+    return name
+
+
+def predicate_jql(predicate: dict) -> str:
+    """Predicado -> JQL equivalente ("" = qualquer issue)."""
+    clauses = []
+    for name, values in predicate.items():
+        if name == "not":
+            for f, v in values.items():
+                clause = f"{jql_field(f)} not in ({jql_list(v)})"
+                if f not in NEVER_EMPTY:
+                    clause = f"({clause} OR {jql_field(f)} is EMPTY)"
+                clauses.append(clause)
+        elif name == "any":
+            parts = [predicate_jql(p) for p in values]
+            if any(not p for p in parts):
+                continue
+            clauses.append("(" + " OR ".join(f"({p})" for p in parts) + ")")
+        else:
+            clauses.append(f"{jql_field(name)} in ({jql_list(values)})")
+    return " AND ".join(clauses)
+
+
+def union_jql(project: str, predicates) -> str:
+    """Uma busca só pro projeto: OR de todos os buckets (sem repetir)."""
+    parts = list(dict.fromkeys(predicate_jql(p) for p in predicates))
+    base = f'project = "{project}"'
+    if not parts or any(not p for p in parts):
+        return base
+    return f"{base} AND (" + " OR ".join(f"({p})" for p in parts) + ")"
+
+
+# ========= engine =========
+
+def load_reports(path: pathlib.Path) -> list[dict]:
+    with open(path, "r", encoding="utf-8") as fp:
+        data = json.load(fp)
+    reports = data["reports"] if isinstance(data, dict) else data
+
+    names = set()
+    for report in reports:
+        for required in ("name", "project", "buckets"):
+            if required not in report:
+                raise ValueError(f"Relatório sem '{required}': {report}")
+        if report["name"] in names:
+            raise ValueError(f"Relatório duplicado: {report['name']}")
+        names.add(report["name"])
+        report.setdefault("title", report["name"])
+        report.setdefault("group_by", {})
+        report.setdefault("display", {})
+    return reports
+
+
+def empty_counts(report: dict) -> dict:
+    values = report["group_by"].get("values") or []
+    return {bucket: {v: 0 for v in values} for bucket in report["buckets"]}
+
+
+def evaluate_project(client: JiraClient, project: str, reports: list[dict], page_size=5000, log=None) -> dict:
+    """
+    UMA passada em streaming pelo projeto avaliando todos os relatórios dele.
+    Retorna { nome do relatório: { bucket: { grupo: quantidade } } }.
+    """
+    jql = union_jql(project, [p for r in reports for p in r["buckets"].values()])
+    fields = set()
+    for r in reports:
+        for p in r["buckets"].values():
+            fields |= predicate_fields(p)
+        if r["group_by"].get("field"):
+            fields |= predicate_fields({r["group_by"]["field"]: []})
+
+    results = {r["name"]: empty_counts(r) for r in reports}
+    allowed = {r["name"]: set(r["group_by"]["values"]) if r["group_by"].get("values") else None for r in reports}
+
+    for issue in client.search(jql, fields=sorted(fields), page_size=page_size, log=log):
+        issue_fields = issue.get("fields", {}) or {}
+        for r in reports:
+            field = r["group_by"].get("field")
+            group = group_value(issue_fields, field) if field else TOTAL_GROUP
+            if allowed[r["name"]] is not None:
+                if group not in allowed[r["name"]]:
+                    continue
+            elif group is None:
+                group = EMPTY_GROUP
+
+            counts = results[r["name"]]
+            for bucket, predicate in r["buckets"].items():
+                if matches(predicate, issue_fields):
+                    counts[bucket][group] = counts[bucket].get(group, 0) + 1
+    return results
+
+
+def run_reports(client: JiraClient, reports: list[dict], max_workers: int = 4) -> dict:
+    """Todos os relatórios: 1 busca por projeto, projetos em paralelo (mesmo client/rate limit)."""
+    by_project = {}
+    for r in reports:
+        by_project.setdefault(r["project"], []).append(r)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(by_project))), thread_name_prefix="report") as pool:
+        futures = [pool.submit(evaluate_project, client, project, rs) for project, rs in by_project.items()]
+        for fut in futures:
+            results.update(fut.result())
+    return results
+
+
+# ========= Slack (Block Kit) =========
+
+def build_report_blocks(title: str, link: str = None, summary=(), rows=(), zero_sections=()) -> list:
+    """
+    Layout padrão dos relatórios:
+      - summary:       [(rótulo, valor), ...]           totais no topo
+      - rows:          [(grupo, [linhas...]), ...]      1 card por grupo, 2 por seção
+      - zero_sections: [(rótulo, [grupos...]), ...]     listas no rodapé (vazias são omitidas)
+    """
+    blocks = [
+        {
+            "type": "header",
+            "text": {
+                "type": "plain_text",
+                "text": title
+            }
+        },
+    ]
+    if link:
+        blocks.append({
+            "type": "context",
+            "elements": [
+                {
+                    "type": "mrkdwn",
+                    "text": f"<{link}|Abrir Jira>"
+                }
+            ]
+        })
+    if summary:
+        blocks.append({
+            "type": "section",
+            "fields": [
+                {
+                    "type": "mrkdwn",
+                    "text": f"*{label}:* *{value}*"
+                }
+                for label, value in summary
+            ]
+        })
+    blocks.append({"type": "divider"})
+
+    # Cada linha = 1 section, com até 2 colunas
+    rows = list(rows)
+    for i in range(0, len(rows), 2):
+        blocks.append({
+            "type": "section",
+            "fields": [
+                {
+                    "type": "mrkdwn",
+                    "text": f"*{name}*\n" + "\n".join(lines)
+                }
+                for name, lines in rows[i:i+2]
+            ]
+        })
+
+    zero_sections = [(label, names) for label, names in zero_sections if names]
+    if zero_sections:
+        blocks.append({"type": "divider"})
+    for label, names in zero_sections:
+        blocks.append({
+            "type": "section",
+            "text": {
+                "type": "mrkdwn",
+                "text": f"*{label}:*\n{', '.join(names)}"
+            }
+        })
+
+    return blocks
+
+
+def render_report(report: dict, counts: dict) -> tuple[str, list]:
+    """(texto fallback, blocks) de um relatório avaliado."""
+    display = report["display"]
+    buckets = list(report["buckets"])
+    totals = {b: sum(counts[b].values()) for b in buckets}
+
+    summary_spec = display.get("summary") or [[b, b] for b in buckets]
+    lines_spec = display.get("lines") or [[b, b] for b in buckets]
+    sort_by = display.get("sort_by") or buckets[0]
+
+    groups = list(dict.fromkeys(g for b in buckets for g in counts[b]))
+    by_bucket = sorted(groups, key=lambda g: counts[sort_by].get(g, 0), reverse=True)
+    shown = [g for g in by_bucket if any(counts[b].get(g, 0) > 0 for _, b in lines_spec)]
+
+    rows = [(g, [f"`{counts[b].get(g, 0)}` {label}" for label, b in lines_spec]) for g in shown]
+    zero_sections = [
+        (label, sorted(g for g in groups if counts[b].get(g, 0) == 0))
+        for label, b in display.get("zero_sections", [])
+    ]
+
+    blocks = build_report_blocks(
+        report["title"], report.get("link"),
+        summary=[(label, totals[b]) for label, b in summary_spec],
+        rows=rows, zero_sections=zero_sections,
+    )
+    fallback_text = f"{report['title']} – " + ", ".join(f"{label}: {totals[b]}" for label, b in summary_spec)
+    return fallback_text, blocks
+
+
+def post_report(report: dict, fallback_text: str, blocks: list):
+    webhook, = require_env(report.get("slack_webhook_env", "SLACK_WEBHOOK_URL"))
+    r = metrics.post("slack_webhook", webhook, json={"text": fallback_text, "blocks": blocks}, timeout=30)
+    r.raise_for_status()
+
+
+def main(config: pathlib.Path, post: bool = False, workers: int = 4, client: JiraClient = None) -> dict:
+    """
+    Avalia os relatórios do arquivo e imprime (ou posta no Slack) cada um.
+    Sem `client`, cria um só pra essa execução; um worker passa o dele e reaproveita.
+    """
+    own_client = client is None
+    if own_client:
+        client = JiraClient(
+            os.getenv("JIRA_BASE", "https://bankeirobrasil.atlassian.net"),
+            **jira_auth(), pool_size=max(4, workers),
+        )
+    try:
+        reports = load_reports(config)
+        results = run_reports(client, reports, max_workers=workers)
+        for report in reports:
+            fallback_text, blocks = render_report(report, results[report["name"]])
+            if post:
+                post_report(report, fallback_text, blocks)
+            print(fallback_text)
+            if not post:
+                print(json.dumps(results[report["name"]], ensure_ascii=False, indent=2))
+    finally:
+        if own_client:
+            client.close()
+    return results
+
+
+if __name__ == "__main__":
+    # uso: python report_engine.py reports.json [--post]
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Relatórios declarativos de issues do Jira (1 passada por projeto)")
+    parser.add_argument("config", type=pathlib.Path, help="JSON com a lista de relatórios")
+    parser.add_argument("--post", action="store_true", help="posta cada relatório no Slack (senão só imprime)")
+    parser.add_argument("--workers", type=int, default=4, help="projetos avaliados em paralelo")
+    args = parser.parse_args()
+
+    with exit_on_config_error(), METRICS.run("report_engine"):
+        main(args.config, post=args.post, workers=args.workers)
@@ -0,0 +1,305 @@
+import os
+import sys
+import gzip
+import json
+import mmap
+import queue
+import pathlib
+import threading
+from concurrent.futures import Future
+
+# tamanho máximo de cada segmento antes de abrir o próximo
+SEGMENT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class FolderWriter:
+    """
+    Formato clássico: <board>/<key>/issue_raw.json (JSON compacto), um arquivo por issue.
+    Cada issue vai pra um .tmp ao lado; flush() faz o fsync do lote e só então
+    renomeia (os.replace): o issue_raw.json nunca fica pela metade.
+    """
+
+    format = "folders"
+
+    def __init__(self, board_dir: pathlib.Path, folder_name):
+        self.board_dir = board_dir
+        self.folder_name = folder_name
+        self.pending = []  # (arquivo aberto, .tmp, destino) esperando o flush
+
+    def path(self, key: str) -> pathlib.Path:
+        return self.board_dir / self.folder_name(key) / "issue_raw.json"
+
+    def has(self, key: str) -> bool:
+        return self.path(key).exists()
+
+    def write(self, key: str, issue: dict):
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        fp = open(tmp, "wb")
+        fp.write(json.dumps(issue, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        fp.flush()
+        self.pending.append((fp, tmp, path))
+
+    def remove(self, key: str):
+        pass  # a pasta inteira é tratada por retire_issue_folder()
+
+    def flush(self):
+        """fsync de todos os .tmp da página, rename e fsync das pastas (chamado antes de cada checkpoint)."""
+        pending, self.pending = self.pending, []
+        for fp, tmp, path in pending:
+            os.fsync(fp.fileno())
+            fp.close()
+            os.replace(tmp, path)
+        if os.name != "nt":  # no Windows não dá pra abrir pasta pra fsync
+            for folder in {path.parent for _, _, path in pending}:
+                fd = os.open(folder, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+
+    def close(self):
+        self.flush()
+
+
+class PackedArchive:
+    """
+    Formato empacotado por board, só com append:
+      <board>/issues-00001.ndjson[.gz]   1 issue compacta por linha
+      <board>/issues.idx.ndjson          {"key", "seg", "off", "len"} por issue (última linha vence;
+                                         {"key", "removed": true} tira a issue do índice)
+    Com gzip, cada issue vira um membro gzip próprio: o segmento continua
+    sendo um .gz válido pra leitura sequencial e cada issue pode ser lida
+    sozinha com seek/mmap + gzip.decompress.
+    """
+
+    format = "ndjson"
+
+    def __init__(self, board_dir: pathlib.Path, compress: bool = False):
+        self.board_dir = board_dir
+        self.compress = compress
+        self.index_file = board_dir / "issues.idx.ndjson"
+        self.index = load_index(self.index_file, repair=True)
+        self.segment = None
+        self.segment_name = None
+        self.index_fp = None
+
+    def _segments(self) -> list[pathlib.Path]:
+        return sorted(self.board_dir.glob("issues-*.ndjson*"))
+
+    def _open_segment(self):
+        suffix = ".ndjson.gz" if self.compress else ".ndjson"
+        segments = [p for p in self._segments() if p.name.endswith(suffix)]
+        if segments and segments[-1].stat().st_size < SEGMENT_MAX_BYTES:
+            path = segments[-1]
+        else:
+            path = self.board_dir / f"issues-{len(self._segments()) + 1:05d}{suffix}"
+        if self.segment:
+            self.segment.close()
+        self.segment = open(path, "ab")
+        self.segment_name = path.name
+
+    def has(self, key: str) -> bool:
+        return key in self.index
+
+    def write(self, key: str, issue: dict):
+        if self.segment is None or self.segment.tell() >= SEGMENT_MAX_BYTES:
+            self._open_segment()
+        if self.index_fp is None:
+            self.index_fp = open(self.index_file, "a", encoding="utf-8")
+
+        data = json.dumps(issue, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+        if self.compress:
+            data = gzip.compress(data)
+
+        off = self.segment.tell()
+        self.segment.write(data)
+        entry = {"key": key, "seg": self.segment_name, "off": off, "len": len(data)}
+        self.index[key] = entry
+        self.index_fp.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def remove(self, key: str):
+        """Tombstone: a issue sai do índice (os bytes antigos continuam no segmento)."""
+        if self.index.pop(key, None) is None:
+            return
+        if self.index_fp is None:
+            self.index_fp = open(self.index_file, "a", encoding="utf-8")
+        self.index_fp.write(json.dumps({"key": key, "removed": True}, ensure_ascii=False) + "\n")
+
+    def flush(self):
+        """Garante no disco tudo que já foi escrito (chamado antes de cada checkpoint)."""
+        for fp in (self.segment, self.index_fp):
+            if fp:
+                fp.flush()
+                os.fsync(fp.fileno())
+
+    def close(self):
+        if self.segment:
+            self.segment.close()
+            self.segment = None
+        if self.index_fp:
+            self.index_fp.close()
+            self.index_fp = None
+
+
+_STOP = object()
+
+
+class WriterStage:
+    """
+    Gravação numa thread própria, na frente de um FolderWriter/PackedArchive:
+      write / remove / submit  entram numa fila limitada e voltam na hora
+                               (a busca só espera se o disco ficar `queue_size` itens pra trás)
+      barrier()                Future resolvido depois do flush() de tudo que entrou antes;
+                               o checkpoint da página só é gravado quando ele termina
+    As operações rodam na ordem da fila. Um erro de gravação aparece no próximo
+    write/barrier/close (e no Future das barreiras pendentes).
+    """
+
+    def __init__(self, writer, queue_size: int = 256, name: str = "writer"):
+        self.writer = writer
+        self.format = writer.format
+        self.queue = queue.Queue(maxsize=max(1, queue_size))
+        self.error = None
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is _STOP:
+                return
+            fn, args, future = item
+            if self.error is not None:
+                if future is not None:
+                    future.set_exception(self.error)
+                continue
+            try:
+                fn(*args)
+            except BaseException as e:
+                self.error = e
+                if future is not None:
+                    future.set_exception(e)
+                continue
+            if future is not None:
+                future.set_result(True)
+
+    def _check(self):
+        if self.error is not None:
+            raise RuntimeError(f"falha gravando o backup: {self.error}") from self.error
+
+    def submit(self, fn, *args):
+        """Roda fn(*args) na thread de gravação, depois de tudo que já está na fila."""
+        self._check()
+        self.queue.put((fn, args, None))
+
+    def has(self, key: str) -> bool:
+        return self.writer.has(key)
+
+    def write(self, key: str, issue: dict):
+        self.submit(self.writer.write, key, issue)
+
+    def remove(self, key: str):
+        self.submit(self.writer.remove, key)
+
+    def barrier(self) -> Future:
+        self._check()
+        future = Future()
+        self.queue.put((self.writer.flush, (), future))
+        return future
+
+    def close(self):
+        """
+        Espera a fila esvaziar, para a thread e fecha o writer (também depois de
+        um erro, pra não deixar arquivo aberto). Chamar de novo não faz nada.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(_STOP)
+        self.thread.join()
+        self.writer.close()
+        self._check()
+
+
+def load_index(index_file: pathlib.Path, repair: bool = False) -> dict:
+    """
+    Lê o índice (última linha de cada key vence). Linha final cortada por uma queda
+    no meio do append é ignorada; com repair=True (quem vai escrever no índice) o
+    arquivo é truncado na última linha completa, como o BoardCheckpoint faz.
+    Linha inválida no meio do arquivo continua sendo erro.
+    """
+    index = {}
+    if not index_file.exists():
+        return index
+    good_size = size = 0
+    broken = None
+    ends_with_newline = True
+    with open(index_file, "rb") as fp:
+        for line in fp:
+            if broken is not None:
+                raise broken  # a linha inválida não era a última
+            size += len(line)
+            ends_with_newline = line.endswith(b"\n")
+            if line.strip():
+                try:
+                    entry = json.loads(line)
+                except ValueError as e:
+                    broken = e
+                    continue
+                if entry.get("removed"):
+                    index.pop(entry["key"], None)
+                else:
+                    index[entry["key"]] = entry
+            good_size = size
+
+    if repair and broken is not None:
+        with open(index_file, "r+b") as fp:
+            fp.truncate(good_size)
+    elif repair and not ends_with_newline:
+        # linha completa mas sem o \n: o próximo append não pode grudar nela
+        with open(index_file, "ab") as fp:
+            fp.write(b"\n")
+    return index
+
+
+def read_issue(board_dir: pathlib.Path, key: str, index: dict = None) -> dict:
+    """Lê UMA issue do arquivo empacotado com mmap (sem varrer o segmento)."""
+    index = index if index is not None else load_index(board_dir / "issues.idx.ndjson")
+    entry = index[key]
+    with open(board_dir / entry["seg"], "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            data = mm[entry["off"]:entry["off"] + entry["len"]]
+    if entry["seg"].endswith(".gz"):
+        data = gzip.decompress(data)
+    return json.loads(data)
+
+
+def iter_issues(board_dir: pathlib.Path):
+    """Stream sequencial do board inteiro (só a versão mais recente de cada issue)."""
+    index = load_index(board_dir / "issues.idx.ndjson")
+    by_segment = {}
+    for entry in index.values():
+        by_segment.setdefault(entry["seg"], []).append(entry)
+
+    for seg in sorted(by_segment):
+        entries = sorted(by_segment[seg], key=lambda e: e["off"])
+        with open(board_dir / seg, "rb") as f:
+            for entry in entries:
+                f.seek(entry["off"])
+                data = f.read(entry["len"])
+                if seg.endswith(".gz"):
+                    data = gzip.decompress(data)
+                yield json.loads(data)
+
+
+if __name__ == "__main__":
+    # uso: python archive.py "<pasta do board>" [KEY]
+    board = pathlib.Path(sys.argv[1])
+    if len(sys.argv) > 2:
+        print(json.dumps(read_issue(board, sys.argv[2]), ensure_ascii=False, indent=2))
+    else:
+        for issue in iter_issues(board):
+            print(json.dumps(issue, ensure_ascii=False))
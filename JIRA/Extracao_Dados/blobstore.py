@@ -0,0 +1,128 @@
+import os
+import re
+import json
+import shutil
+import hashlib
+import pathlib
+import threading
+
+
+class BlobStore:
+    """
+    Guarda cada anexo UMA vez, endereçado por conteúdo:
+      _blobs/sha256/ab/abcdef...   conteúdo (nome = SHA-256)
+      _blobs/attachments.json      id do anexo no Jira -> sha256, size, filename
+    As pastas das issues recebem hardlink pro blob (ou cópia, se o FS não suportar).
+    """
+
+    def __init__(self, root: pathlib.Path):
+        self.root = root
+        self.tmp_dir = root / "tmp"
+        self.index_file = root / "attachments.json"
+        self.lock = threading.Lock()
+        self.inflight = {}  # id do anexo -> Future (evita baixar o mesmo anexo 2x ao mesmo tempo)
+        self.dirty = False
+
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        if self.index_file.exists():
+            with open(self.index_file, "r", encoding="utf-8") as fp:
+                self.by_id = json.load(fp)
+        else:
+            self.by_id = {}
+
+    def blob_path(self, sha256: str) -> pathlib.Path:
+        return self.root / "sha256" / sha256[:2] / sha256
+
+    def temp_path(self, att_id: str) -> pathlib.Path:
+        """.part fixo por anexo: um download interrompido é retomado com Range na próxima execução."""
+        name = att_id if re.fullmatch(r"[\w\-]+", att_id) else hashlib.sha1(att_id.encode("utf-8")).hexdigest()
+        return self.tmp_dir / f"{name}.part"
+
+    def get(self, att_id: str):
+        """Caminho do blob se esse anexo já foi guardado (e o arquivo ainda existe)."""
+        with self.lock:
+            meta = self.by_id.get(att_id)
+        if not meta:
+            return None
+        blob = self.blob_path(meta["sha256"])
+        return blob if blob.exists() else None
+
+    def put(self, att_id: str, tmp: pathlib.Path, sha256: str, meta: dict) -> pathlib.Path:
+        """Move um download temporário pro store (ou descarta, se o conteúdo já existia)."""
+        blob = self.blob_path(sha256)
+        with self.lock:
+            if blob.exists():
+                tmp.unlink(missing_ok=True)
+            else:
+                blob.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp, blob)
+            self.by_id[att_id] = {**meta, "sha256": sha256, "size": blob.stat().st_size}
+            self.dirty = True
+        return blob
+
+    def adopt(self, att_id: str, path: pathlib.Path, meta: dict) -> pathlib.Path:
+        """Importa um arquivo que já está numa pasta de issue (backups antigos, antes do store)."""
+        sha256 = file_sha256(path)
+        blob = self.blob_path(sha256)
+        with self.lock:
+            if not blob.exists():
+                blob.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    os.link(path, blob)
+                except OSError:
+                    shutil.copy2(path, blob)
+            self.by_id[att_id] = {**meta, "sha256": sha256, "size": blob.stat().st_size}
+            self.dirty = True
+        self.link(blob, path)
+        return blob
+
+    def once(self, att_id: str, submit):
+        """
+        Garante um único download por anexo: se já existe um Future
+        em andamento pra esse id, devolve ele; senão chama submit().
+        """
+        with self.lock:
+            fut = self.inflight.get(att_id)
+            if fut is not None:
+                return fut
+            fut = submit()
+            self.inflight[att_id] = fut
+        # fora do lock: Future que já terminou roda o callback na hora, e _forget pega o lock
+        fut.add_done_callback(lambda done: self._forget(att_id, done))
+        return fut
+
+    def _forget(self, att_id: str, fut):
+        with self.lock:
+            if self.inflight.get(att_id) is fut:
+                del self.inflight[att_id]
+
+    @staticmethod
+    def link(blob: pathlib.Path, dest: pathlib.Path):
+        """Aponta dest pro blob: hardlink quando dá, cópia quando não dá (outro disco, FAT...)."""
+        if dest.exists():
+            if os.path.samefile(blob, dest):
+                return
+            dest.unlink()
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(blob, dest)
+        except OSError:
+            shutil.copy2(blob, dest)
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            tmp = self.index_file.with_suffix(".json.tmp")
+            with open(tmp, "w", encoding="utf-8") as fp:
+                json.dump(self.by_id, fp, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.index_file)
+            self.dirty = False
+
+
+def file_sha256(path: pathlib.Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
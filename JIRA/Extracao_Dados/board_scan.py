@@ -0,0 +1,319 @@
+import re
+import queue
+import threading
+
+FIELD_PATH = "/rest/api/3/field"
+
+# nomes de campo do JQL -> id do campo na resposta da API (campos do sistema)
+SYSTEM_FIELDS = {
+    "issuetype": "issuetype",
+    "type": "issuetype",
+    "status": "status",
+    "priority": "priority",
+    "resolution": "resolution",
+    "assignee": "assignee",
+    "reporter": "reporter",
+    "labels": "labels",
+    "component": "components",
+    "fixversion": "fixVersions",
+}
+
+# sufixo de tipo que o Jira coloca no nome do custom field ("EUR-Funcionalidade[Dropdown]")
+# -> final do schema.custom do campo (desempata campos com o mesmo nome)
+TYPE_HINTS = {
+    "dropdown": ":select",
+    "select list (single choice)": ":select",
+    "select list (multiple choices)": ":multiselect",
+    "checkboxes": ":multicheckboxes",
+    "radio buttons": ":radiobuttons",
+    "short text": ":textfield",
+    "labels": ":labels",
+}
+
+KEYWORDS = {"and", "or", "not", "in", "is", "empty", "null", "order", "by"}
+
+TOKEN_RE = re.compile(r"""
+    \s*(?:
+      (?P<str>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+    | (?P<op>!=|=|\(|\)|,)
+    | (?P<word>[^\s(),="'!]+)
+    )""", re.VERBOSE)
+
+
+def tokenize(text: str):
+    tokens, pos = [], 0
+    text = text.rstrip()
+    while pos < len(text):
+        m = TOKEN_RE.match(text, pos)
+        if not m or m.end() == pos:
+            return None
+        pos = m.end()
+        if m.group("str"):
+            tokens.append(("str", re.sub(r"\\(.)", r"\1", m.group("str")[1:-1])))
+        elif m.group("op"):
+            tokens.append(("op", m.group("op")))
+        else:
+            tokens.append(("word", m.group("word")))
+    return tokens
+
+
+def parse_jql(jql: str):
+    """
+    JQL de board no formato `cláusula AND cláusula ... [ORDER BY ...]`, com
+    cláusulas `campo =|!=|IN|NOT IN|IS [NOT] valor(es)`.
+    Retorna ([(campo, op, [valores])], order_by), ou None se tiver OR,
+    parênteses, funções etc. (esse board continua com a própria busca).
+    """
+    m = re.search(r"\s+ORDER\s+BY\s+(.*)$", jql, flags=re.IGNORECASE | re.DOTALL)
+    where, order = (jql[:m.start()], m.group(1).strip()) if m else (jql, "")
+    tokens = tokenize(where)
+    if not tokens:
+        return None
+
+    def word(i, *expected):
+        return i < len(tokens) and tokens[i][0] == "word" and tokens[i][1].lower() in expected
+
+    def value(i):
+        if i < len(tokens) and tokens[i][0] in ("str", "word"):
+            if tokens[i][0] == "word" and tokens[i][1].lower() in KEYWORDS - {"empty", "null"}:
+                return None
+            return tokens[i][1]
+        return None
+
+    clauses, i = [], 0
+    while i < len(tokens):
+        field = value(i)
+        if field is None:
+            return None
+        i += 1
+        if word(i, "not") and word(i + 1, "in"):
+            op, i = "not in", i + 2
+        elif word(i, "in"):
+            op, i = "in", i + 1
+        elif word(i, "is") and word(i + 1, "not"):
+            op, i = "is not", i + 2
+        elif word(i, "is"):
+            op, i = "is", i + 1
+        elif i < len(tokens) and tokens[i] in (("op", "="), ("op", "!=")):
+            op, i = tokens[i][1], i + 1
+        else:
+            return None
+
+        if op in ("in", "not in"):
+            if i >= len(tokens) or tokens[i] != ("op", "("):
+                return None
+            values, i = [], i + 1
+            while True:
+                v = value(i)
+                if v is None:
+                    return None
+                values.append(v)
+                i += 1
+                if i < len(tokens) and tokens[i] == ("op", ","):
+                    i += 1
+                    continue
+                if i < len(tokens) and tokens[i] == ("op", ")"):
+                    i += 1
+                    break
+                return None
+        else:
+            v = value(i)
+            if v is None:
+                return None
+            values, i = [v], i + 1
+
+        clauses.append((field, op, values))
+        if i < len(tokens):
+            if not word(i, "and"):
+                return None
+            i += 1
+    return clauses, order
+
+
+def load_field_index(client) -> dict:
+    """GET /rest/api/3/field -> { nome do campo (casefold): [campos com esse nome] }."""
+    index = {}
+    for field in client.get(FIELD_PATH) or []:
+        index.setdefault(str(field.get("name", "")).casefold(), []).append(field)
+    return index
+
+
+def resolve_field(name: str, field_index: dict):
+    """Nome do campo no JQL (issuetype, cf[10630], "EUR-Funcionalidade[Dropdown]") -> id na API, ou None."""
+    name = name.strip()
+    m = re.fullmatch(r"cf\[(\d+)\]", name, flags=re.IGNORECASE)
+    if m:
+        return f"customfield_{m.group(1)}"
+    if re.fullmatch(r"customfield_\d+", name):
+        return name
+    if name.lower() in SYSTEM_FIELDS:
+        return SYSTEM_FIELDS[name.lower()]
+
+    m = re.fullmatch(r"(.+?)\[(.+)\]", name)
+    base, hint = (m.group(1), m.group(2)) if m else (name, None)
+    candidates = field_index.get(base.strip().casefold(), [])
+    if hint and len(candidates) > 1:
+        suffix = TYPE_HINTS.get(hint.strip().casefold())
+        candidates = [f for f in candidates if suffix and str((f.get("schema") or {}).get("custom", "")).endswith(suffix)]
+    return candidates[0]["id"] if len(candidates) == 1 else None
+
+
+def field_values(value) -> set:
+    """Valores comparáveis de um campo (option.value, name, id, key), em casefold."""
+    items = value if isinstance(value, list) else [value]
+    out = set()
+    for item in items:
+        if isinstance(item, dict):
+            out |= {str(item[k]).casefold() for k in ("value", "name", "id", "key") if item.get(k) is not None}
+        elif item not in (None, ""):
+            out.add(str(item).casefold())
+    return out
+
+
+class BoardFilter:
+    """
+    Filtro de um board avaliado localmente sobre a issue (mesma semântica do JQL):
+      =, IN          algum valor do campo está na lista
+      !=, NOT IN     campo preenchido e nenhum valor na lista (JQL não devolve vazios)
+      IS [NOT] EMPTY
+    """
+
+    def __init__(self, project: str, order: str, clauses: list):
+        self.project = project
+        self.order = order
+        self.clauses = clauses  # [(field_id, op, {valores casefold})]
+
+    @property
+    def fields(self) -> set:
+        return {field for field, _, _ in self.clauses}
+
+    def matches(self, fields: dict) -> bool:
+        for field, op, values in self.clauses:
+            present = field_values(fields.get(field))
+            if op in ("=", "in"):
+                ok = bool(present & values)
+            elif op in ("!=", "not in"):
+                ok = bool(present) and not present & values
+            elif op == "is":
+                ok = not present
+            else:  # is not
+                ok = bool(present)
+            if not ok:
+                return False
+        return True
+
+
+def build_filter(jql: str, field_index: dict):
+    """JQL do board -> BoardFilter (exige exatamente 1 `project = X`), ou None se não der pra avaliar local."""
+    parsed = parse_jql(jql)
+    if parsed is None:
+        return None
+    clauses, order = parsed
+
+    project, local = None, []
+    for field, op, values in clauses:
+        if field.lower() == "project":
+            if project is not None or op not in ("=", "in") or len(values) != 1:
+                return None
+            project = values[0]
+            continue
+        if op in ("is", "is not") and values[0].lower() not in ("empty", "null"):
+            return None
+        field_id = resolve_field(field, field_index)
+        if field_id is None:
+            return None
+        local.append((field_id, op, {v.casefold() for v in values}))
+    if project is None:
+        return None
+    return BoardFilter(project, order, local)
+
+
+_END = object()
+
+
+class ProjectScan:
+    """
+    Uma busca só (`project = X ORDER BY ...`) alimentando vários boards:
+    cada página é filtrada localmente (BoardFilter) e a parte de cada board
+    vai pra fila dele, em ordem. Os boards consomem com pages(nome), que
+    entrega (issues, token) no mesmo formato de iter_pages_enhanced.
+    - todo board recebe TODAS as páginas (mesmo vazias): o contador de páginas
+      dos checkpoints fica igual ao da busca, então a retomada funciona
+    - `done_pages[board]` = páginas já concluídas no checkpoint do board;
+      a busca recomeça do board mais atrasado e os outros pulam o que já têm
+    - `prepare(issues)` roda 1x por página antes de distribuir (ex.: histórico)
+    - `strip` = campos pedidos só pra filtrar, removidos antes de gravar
+    """
+
+    def __init__(self, jql: str, fields: list, filters: dict, done_pages: dict, start_token,
+                 search_pages, prepare=None, strip=(), log=print, queue_pages: int = 4):
+        self.jql = jql
+        self.fields = fields
+        self.filters = filters
+        self.done_pages = done_pages
+        self.start_page = min(done_pages.values()) if done_pages else 0
+        self.start_token = start_token
+        self.search_pages = search_pages
+        self.prepare = prepare
+        self.strip = set(strip)
+        self.log = log
+        self.queues = {name: queue.Queue(maxsize=queue_pages) for name in done_pages}
+        self.detached = set()
+        self.thread = None
+
+    def start(self):
+        if not self.queues:
+            # retomada com a busca de todos os boards já concluída: ninguém consumiria as páginas
+            self.log("busca única já concluída em todos os boards; nada a buscar")
+            return self
+        self.thread = threading.Thread(target=self._run, name="project-scan", daemon=True)
+        self.thread.start()
+        return self
+
+    def _put(self, name: str, item):
+        while name not in self.detached:
+            try:
+                self.queues[name].put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _run(self):
+        page = self.start_page
+        routed = {name: 0 for name in self.queues}
+        end = _END
+        try:
+            for issues, token in self.search_pages(self.jql, self.fields, self.start_token):
+                page += 1
+                if self.prepare:
+                    self.prepare(issues)
+                parts = {
+                    name: [i for i in issues if self.filters[name].matches(i.get("fields") or {})]
+                    for name in self.queues if page > self.done_pages[name]
+                }
+                for issue in issues:
+                    for field in self.strip:
+                        (issue.get("fields") or {}).pop(field, None)
+                for name, part in parts.items():
+                    routed[name] += len(part)
+                    self._put(name, (part, token))
+            self.log(f"busca única concluída: {page} páginas; " +
+                     ", ".join(f"{name}={n}" for name, n in routed.items()))
+        except BaseException as e:
+            end = e
+        for name in self.queues:
+            self._put(name, end)
+
+    def pages(self, name: str):
+        q = self.queues[name]
+        try:
+            while True:
+                item = q.get()
+                if item is _END:
+                    return
+                if isinstance(item, BaseException):
+                    raise RuntimeError(f"busca única falhou: {item}") from item
+                yield item
+        finally:
+            # board parou (terminou ou deu erro): a busca não espera mais por ele
+            self.detached.add(name)
@@ -0,0 +1,91 @@
+import os
+import json
+import pathlib
+
+
+class BoardCheckpoint:
+    """
+    Journal append-only de um board em andamento (<board>/.checkpoint.ndjson):
+      {"jql": ...}                                        cabeçalho: busca que está sendo feita
+      {"entry": {...}}                                    issue concluída (JSON gravado + anexos resolvidos)
+      {"page": n, "phase": "search"|"missing", "token": ...}   página concluída; token = próxima página
+    Cada página só é registrada depois que o JSON e os anexos dela terminaram,
+    então depois de uma queda o backup continua da última página registrada.
+    O arquivo some quando o board termina (index.json gravado).
+    """
+
+    def __init__(self, board_dir: pathlib.Path, jql: str):
+        self.path = board_dir / ".checkpoint.ndjson"
+        self.jql = jql
+        self.entries = []
+        self.pages = 0
+        self.token = None
+        self.search_done = False
+        self.resumed = False
+        self.fp = None
+
+        if self.path.exists():
+            self._load()
+        if not self.resumed:
+            self.path.unlink(missing_ok=True)
+
+    def _load(self):
+        entries, pages, token, search_done = [], 0, None, False
+        pending = []
+        good_size = 0  # bytes até o último marcador de página válido
+        size = 0
+        with open(self.path, "rb") as fp:
+            for i, line in enumerate(fp):
+                size += len(line)
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    break  # última linha cortada pela queda
+                if i == 0:
+                    if rec.get("jql") != self.jql:
+                        return  # checkpoint de outra busca (JQL/watermark mudou): ignora
+                    good_size = size
+                    continue
+                if "entry" in rec:
+                    pending.append(rec["entry"])
+                elif "page" in rec:
+                    # só vale o que veio ANTES de um marcador de página
+                    entries.extend(pending)
+                    pending = []
+                    pages = rec["page"]
+                    good_size = size
+                    if rec.get("phase") == "search":
+                        token = rec.get("token")
+                        search_done = token is None
+                    else:
+                        search_done = True
+
+        # descarta o rabo sem marcador (página que não terminou)
+        with open(self.path, "r+b") as fp:
+            fp.truncate(good_size)
+        self.entries, self.pages, self.token, self.search_done = entries, pages, token, search_done
+        self.resumed = True
+
+    def page_done(self, entries: list, phase: str, token):
+        if self.fp is None:
+            new_file = not self.path.exists() or self.path.stat().st_size == 0
+            self.fp = open(self.path, "a", encoding="utf-8")
+            if new_file:
+                self.fp.write(json.dumps({"jql": self.jql}, ensure_ascii=False) + "\n")
+        self.pages += 1
+        for entry in entries:
+            self.fp.write(json.dumps({"entry": entry}, ensure_ascii=False) + "\n")
+        self.fp.write(json.dumps({"page": self.pages, "phase": phase, "token": token}) + "\n")
+        self.fp.flush()
+        os.fsync(self.fp.fileno())
+
+    def close(self):
+        """Fecha o arquivo mantendo o checkpoint (board interrompido: a próxima execução retoma)."""
+        if self.fp is not None:
+            self.fp.close()
+            self.fp = None
+
+    def finish(self):
+        """Board concluído: o checkpoint não é mais necessário."""
+        self.close()
+        self.path.unlink(missing_ok=True)
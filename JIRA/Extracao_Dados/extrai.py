@@ -1,272 +1,786 @@
-import os
-import re
-import json
-import pathlib
-import requests
-from dotenv import load_dotenv
-from requests.auth import HTTPBasicAuth
-import time 
-import random
-
-load_dotenv()
-
-JIRA_BASE  = os.getenv("JIRA_BASE")   # ex: https://mblabs.atlassian.net
-JIRA_EMAIL = os.getenv("JIRA_EMAIL")
-JIRA_TOKEN = os.getenv("JIRA_TOKEN")
-
-if not (JIRA_BASE and JIRA_EMAIL and JIRA_TOKEN):
-    raise SystemExit("Faltou configurar JIRA_BASE / JIRA_EMAIL / JIRA_TOKEN no .env")
-
-AUTH = HTTPBasicAuth(JIRA_EMAIL, JIRA_TOKEN)
-
-HEADERS_JSON = {
-    "Accept": "application/json",
-    "Content-Type": "application/json",
-}
-HEADERS_BIN = {"Accept": "*/*"}
-
-OUT_DIR = pathlib.Path("jira_backup")
-OUT_DIR.mkdir(parents=True, exist_ok=True)
-
-IMAGE_MIMES = {"image/png", "image/jpeg", "image/jpg", "image/gif", "image/webp"}
-
-# ========= CONFIG: 4 boards (nome + JQL do filtro do board) =========
-BOARDS = [
-    {"name": "Board 1 - EUR - Conta Digital", "jql": 'project = EUR AND issuetype != Bug AND "EUR-Funcionalidade[Dropdown]" NOT IN ("CARTÃO BENEFÍCIO", EMPRESTIMO, PIX, TECNOLOGIA) AND "EUR-Categoria[Select List (multiple choices)]" != INFRA ORDER BY Rank ASC'},
-    {"name": "Board 2 - EUR - Empréstimos", "jql": 'project = EUR AND issuetype != Bug AND "EUR-Funcionalidade[Dropdown]" = EMPRESTIMO ORDER BY Rank ASC'},
-    {"name": "Board 3 - EUR - PIX", "jql": 'project = EUR AND "EUR-Funcionalidade[Dropdown]" = PIX ORDER BY Rank ASC'},
-    {"name": "Board 4 - EUR - Cartão Benefício", "jql": 'project = EUR AND issuetype != Bug AND "EUR-Funcionalidade[Dropdown]" = "CARTÃO BENEFÍCIO" ORDER BY Rank ASC'},
-]
-
-# Campos padrão (API names) + seus custom fields
-FIELDS = [
-    "summary",
-    "description",
-    "status",
-    "parent",
-    "assignee",
-    "reporter",
-    "priority",
-    "timeoriginalestimate",
-    "timetracking",
-    "created",
-    "updated",
-    "duedate",
-    "comment",
-    "attachment",
-
-    # custom fields
-    "customfield_10532",
-    "customfield_10529",
-    "customfield_10630",
-    "customfield_10632",
-    "customfield_10631",
-    "customfield_10582",
-]
-
-SESSION = requests.Session()
-SESSION.auth = AUTH
-
-def safe_name(s: str) -> str:
-    s = re.sub(r"[^\w\-\.\(\)\[\] ]+", "_", s, flags=re.UNICODE)
-    return s.strip()[:120] if s else "SEM_NOME"
-
-def jira_post(path: str, body: dict, timeout=120) -> dict:
-    url = f"{JIRA_BASE}{path}"
-    r = SESSION.post(url, headers=HEADERS_JSON, json=body, timeout=timeout)
-    r.raise_for_status()
-    return r.json()
-
-def download_file(url: str, dest: pathlib.Path, max_retries: int = 8):
-    """
-    Baixa anexos respeitando rate limit (429).
-    - Usa Retry-After quando existir
-    - Backoff exponencial com jitter
-    """
-    dest.parent.mkdir(parents=True, exist_ok=True)
-
-    for attempt in range(1, max_retries + 1):
-        r = SESSION.get(url, headers=HEADERS_BIN, stream=True, timeout=180)
-
-        # OK
-        if r.status_code == 200:
-            with open(dest, "wb") as f:
-                for chunk in r.iter_content(chunk_size=1024 * 256):
-                    if chunk:
-                        f.write(chunk)
-            return
-
-        # Rate limit
-        if r.status_code == 429:
-            retry_after = r.headers.get("Retry-After")
-            if retry_after and retry_after.isdigit():
-                wait_s = int(retry_after)
-            else:
-                # backoff exponencial: 2,4,8,16... + jitter
-                wait_s = min(60, 2 ** attempt) + random.random()
-
-            print(f"    429 ao baixar anexo. Tentativa {attempt}/{max_retries}. Aguardando {wait_s:.1f}s...")
-            time.sleep(wait_s)
-            continue
-
-        # Outros erros: mostra detalhe e pula (não derruba o backup inteiro)
-        try:
-            body_preview = r.text[:300]
-        except Exception:
-            body_preview = "<sem body>"
-
-        print(f"    ERRO {r.status_code} ao baixar {url} (tentativa {attempt}/{max_retries})")
-        print(f"    Body (preview): {body_preview}")
-
-        # Para 403/404 etc, não adianta insistir muito; quebra logo
-        if r.status_code in (401, 403, 404):
-            return
-
-        # Para demais, tenta mais algumas vezes
-        time.sleep(min(30, 2 ** attempt) + random.random())
-
-    print(f"    Falhou após {max_retries} tentativas: {url}")
-
-def fetch_all_issues_enhanced(jql: str, page_size=100):
-    """
-    Enhanced search (POST /rest/api/3/search/jql):
-    pagina usando nextPageToken (não startAt).
-    """
-    all_issues = []
-    next_token = None
-    page = 0
-
-    while True:
-        page += 1
-        body = {
-            "jql": jql,
-            "maxResults": page_size,
-            "fields": FIELDS,
-        }
-        if next_token:
-            body["nextPageToken"] = next_token
-
-        data = jira_post("/rest/api/3/search/jql", body=body, timeout=180)
-
-        issues = data.get("issues", []) or []
-        all_issues.extend(issues)
-
-        next_token = data.get("nextPageToken")  # se vier, tem próxima página
-        print(f"  - página {page}: +{len(issues)} issues (acumulado={len(all_issues)}) token={'SIM' if next_token else 'NÃO'}")
-
-        # Regra de parada: sem token = acabou (ou Atlassian resolveu devolver tudo numa página)
-        if not next_token:
-            break
-
-        # Proteção anti-loop (nunca deveria acontecer)
-        if page > 5000:
-            raise RuntimeError("Paginação estourou 5000 páginas — algo errado com nextPageToken.")
-
-    return all_issues
-
-def main():
-    import time
-    import random
-
-    manifest = {
-        "jira_base": JIRA_BASE,
-        "boards": [],
-    }
-
-    for b in BOARDS:
-        board_name = b["name"]
-        jql = b["jql"]
-
-        board_dir = OUT_DIR / safe_name(board_name)
-        board_dir.mkdir(parents=True, exist_ok=True)
-
-        print(f"\n[{board_name}]")
-        print(f"JQL: {jql}")
-
-        issues = fetch_all_issues_enhanced(jql, page_size=100)
-        print(f"[{board_name}] TOTAL baixado: {len(issues)}")
-
-        board_index = {
-            "board": board_name,
-            "jql": jql,
-            "total_issues": len(issues),
-            "issues": [],
-        }
-
-        for issue in issues:
-            key = issue.get("key")
-            f = issue.get("fields", {}) or {}
-            summary = f.get("summary", "")
-            itype = (f.get("issuetype") or {}).get("name", "")
-            status = (f.get("status") or {}).get("name", "")
-
-            issue_folder = board_dir / safe_name(key)
-            issue_folder.mkdir(parents=True, exist_ok=True)
-
-            # 1) JSON bruto
-            with open(issue_folder / "issue_raw.json", "w", encoding="utf-8") as fp:
-                json.dump(issue, fp, ensure_ascii=False, indent=2)
-
-            # 2) Imagens anexadas (com: skip se já existe + pausa leve + retry/backoff no download_file)
-            attachments = f.get("attachment") or []
-            img_dir = issue_folder / "imagens"
-            saved = 0
-
-            for att in attachments:
-                mime = att.get("mimeType")
-                if mime not in IMAGE_MIMES:
-                    continue
-
-                url = att.get("content")
-                if not url:
-                    continue
-
-                filename = safe_name(att.get("filename", f"{key}_img"))
-                dest_path = img_dir / filename
-
-                # ✅ skip se já baixou antes (ótimo para retomar após erro)
-                if dest_path.exists() and dest_path.stat().st_size > 0:
-                    continue
-
-                # ✅ pequena pausa para reduzir 429
-                time.sleep(0.2 + random.random() * 0.3)  # 0.2 a 0.5s
-
-                # ✅ baixa com retry/backoff (sua download_file deve estar com o tratamento de 429)
-                try:
-                    download_file(url, dest_path)
-                    saved += 1
-                except Exception as e:
-                    # não derruba o backup inteiro por causa de 1 anexo
-                    print(f"    Falha ao baixar anexo em {key}: {e}")
-
-            board_index["issues"].append({
-                "key": key,
-                "summary": summary,
-                "issuetype": itype,
-                "status": status,
-                "images_downloaded": saved,
-                "folder": str(issue_folder.relative_to(OUT_DIR)),
-            })
-
-        # index.json do board
-        with open(board_dir / "index.json", "w", encoding="utf-8") as fp:
-            json.dump(board_index, fp, ensure_ascii=False, indent=2)
-
-        manifest["boards"].append({
-            "name": board_name,
-            "folder": str(board_dir.relative_to(OUT_DIR)),
-            "total_issues": len(issues),
-            "index_file": str((board_dir / "index.json").relative_to(OUT_DIR)),
-        })
-
-        print(f"[{board_name}] OK -> {board_dir.resolve()}")
-
-    # manifest geral
-    with open(OUT_DIR / "backup_manifest.json", "w", encoding="utf-8") as fp:
-        json.dump(manifest, fp, ensure_ascii=False, indent=2)
-
-    print(f"\nBackup final em: {OUT_DIR.resolve()}")
-
-
-if __name__ == "__main__":
-    main()
+import os
+import re
+import sys
+import json
+import shutil
+import threading
+import pathlib
+import argparse
+import requests
+from dotenv import load_dotenv
+from collections import deque
+from contextlib import ExitStack
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))  # JIRA/ -> pacote common
+from common.config import exit_on_config_error, jira_auth, require_env
+from common.jira_client import JiraClient
+from common.metrics import METRICS
+from blobstore import BlobStore
+from archive import FolderWriter, PackedArchive, WriterStage
+from query_index import QueryIndex
+from checkpoint import BoardCheckpoint
+from history import attach_full_history
+from board_scan import ProjectScan, build_filter, load_field_index
+
+# .env só quando roda como script (o CLI apmo carrega antes de importar o módulo)
+if __name__ == "__main__":
+    load_dotenv()
+
+# JIRA_BASE + JIRA_EMAIL / JIRA_TOKEN (ou JIRA_AUTH_HEADER) são lidos em init(), não no import
+JIRA_BASE = None   # ex: https://mblabs.atlassian.net
+
+OUT_DIR = pathlib.Path("jira_backup")
+
+# estado do modo incremental (watermark de `updated` por board), ao lado do backup_manifest.json
+STATE_FILE = OUT_DIR / "backup_state.json"
+STATE_LOCK = threading.Lock()  # boards em paralelo atualizam o mesmo estado
+# margem de segurança na watermark (atraso de indexação do Jira / relógio)
+INCREMENTAL_OVERLAP_MIN = int(os.getenv("JIRA_INCREMENTAL_OVERLAP_MIN", "5"))
+
+IMAGE_MIMES = {"image/png", "image/jpeg", "image/jpg", "image/gif", "image/webp"}
+
+# formato do JSON das issues:
+#   folders -> <board>/<key>/issue_raw.json (compacto, gravado em .tmp + rename)
+#   ndjson  -> segmentos NDJSON compactos por board + índice de offsets por key
+OUTPUT_FORMAT = os.getenv("JIRA_BACKUP_FORMAT", "folders")
+OUTPUT_GZIP = os.getenv("JIRA_BACKUP_GZIP", "") == "1"
+# gravação (JSON das issues + índice SQLite) roda numa thread por board; a busca
+# só espera o disco quando a fila enche
+WRITE_QUEUE = int(os.getenv("JIRA_WRITE_QUEUE", "256"))
+
+# anexos deduplicados (por id do Jira e por SHA-256); pastas das issues só têm hardlinks
+BLOBS = None  # BlobStore, aberto em init()
+
+# ========= CONFIG: concorrência + orçamento de requisições =========
+DOWNLOAD_WORKERS = int(os.getenv("JIRA_DOWNLOAD_WORKERS", "8"))    # downloads simultâneos (todos os boards)
+RATE_PER_SEC = float(os.getenv("JIRA_RATE_PER_SEC", "10"))         # teto de requisições/s ao Jira
+RATE_BURST = int(os.getenv("JIRA_RATE_BURST", "20"))               # rajada máxima do token bucket
+BOARD_WORKERS = int(os.getenv("JIRA_BOARD_WORKERS", "4"))          # boards processados em paralelo
+# changelog + comentários completos via endpoints bulk (backup "de auditoria")
+FULL_HISTORY = os.getenv("JIRA_BACKUP_HISTORY", "") == "1"
+# boards do mesmo projeto saem de UMA busca `project = X`, filtrada localmente por board
+SINGLE_SCAN = os.getenv("JIRA_BACKUP_SINGLE_SCAN", "") == "1"
+
+# ========= CONFIG: 4 boards (nome + JQL do filtro do board) =========
+BOARDS = [
+    {"name": "Board 1 - EUR - Conta Digital", "jql": 'project = EUR AND issuetype != Bug AND "EUR-Funcionalidade[Dropdown]" NOT IN ("CARTÃO BENEFÍCIO", EMPRESTIMO, PIX, TECNOLOGIA) AND "EUR-Categoria[Select List (multiple choices)]" != INFRA ORDER BY Rank ASC'},
+    {"name": "Board 2 - EUR - Empréstimos", "jql": 'project = EUR AND issuetype != Bug AND "EUR-Funcionalidade[Dropdown]" = EMPRESTIMO ORDER BY Rank ASC'},
+    {"name": "Board 3 - EUR - PIX", "jql": 'project = EUR AND "EUR-Funcionalidade[Dropdown]" = PIX ORDER BY Rank ASC'},
+    {"name": "Board 4 - EUR - Cartão Benefício", "jql": 'project = EUR AND issuetype != Bug AND "EUR-Funcionalidade[Dropdown]" = "CARTÃO BENEFÍCIO" ORDER BY Rank ASC'},
+]
+
+# Campos padrão (API names) + seus custom fields
+FIELDS = [
+    "summary",
+    "description",
+    "status",
+    "parent",
+    "assignee",
+    "reporter",
+    "priority",
+    "timeoriginalestimate",
+    "timetracking",
+    "created",
+    "updated",
+    "duedate",
+    "comment",
+    "attachment",
+
+    # custom fields
+    "customfield_10532",
+    "customfield_10529",
+    "customfield_10630",
+    "customfield_10632",
+    "customfield_10631",
+    "customfield_10582",
+]
+
+# índice SQLite (campos + anexos + FTS5) atualizado conforme as issues são gravadas
+SQLITE_INDEX = os.getenv("JIRA_BACKUP_SQLITE", "1") == "1"
+QUERY_INDEX = None  # QueryIndex, aberto em init()
+
+# client compartilhado: pool do tamanho do pool de downloads (+ folga para a busca)
+JIRA = None  # JiraClient, criado em init()
+
+def init():
+    """
+    Credenciais do .env, pasta do backup, BlobStore, índice SQLite e JiraClient.
+    Roda 1x por processo (main() chama): um worker que faz vários backups
+    reaproveita o client (conexões + rate limit) entre as execuções.
+    """
+    global JIRA_BASE, BLOBS, QUERY_INDEX, JIRA
+    if JIRA is not None:
+        return
+    base, = require_env("JIRA_BASE")
+    auth = jira_auth()
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    BLOBS = BlobStore(OUT_DIR / "_blobs")
+    QUERY_INDEX = QueryIndex(
+        OUT_DIR / "backup_index.sqlite",
+        custom_fields=[f for f in FIELDS if f.startswith("customfield_")],
+    )
+    JIRA = JiraClient(
+        base, **auth,
+        rate=RATE_PER_SEC, burst=RATE_BURST, pool_size=DOWNLOAD_WORKERS + 4,
+    )
+    JIRA_BASE = base
+
+def safe_name(s: str) -> str:
+    s = re.sub(r"[^\w\-\.\(\)\[\] ]+", "_", s, flags=re.UNICODE)
+    return s.strip()[:120] if s else "SEM_NOME"
+
+def jira_post(path: str, body: dict, timeout=120) -> dict:
+    return JIRA.post(path, body, timeout=timeout)
+
+def jira_get(path: str, params: dict = None, timeout=60) -> dict:
+    return JIRA.get(path, params=params, timeout=timeout)
+
+def download_file(url: str, dest: pathlib.Path, resume: bool = True):
+    """
+    Baixa anexos pelo JiraClient (rate limit global, Retry-After, backoff com jitter).
+    Com resume=True um .part que já existe é continuado com HTTP Range.
+    Retorna o SHA-256 do arquivo salvo, ou None se falhou.
+    """
+    return JIRA.download(url, dest, resume=resume)
+
+def download_task(att: dict, key: str):
+    """
+    Task do pool: baixa o anexo pro .part do BlobStore (hash calculado no streaming),
+    confere o tamanho informado pelo Jira e move pro store com rename atômico.
+    Devolve o caminho do blob, ou None se falhou.
+    Nunca deixa exceção de 1 anexo derrubar o backup.
+    """
+    att_id = attachment_id(att)
+    tmp = BLOBS.temp_path(att_id)
+    try:
+        sha256 = download_file(att["content"], tmp)
+        if not sha256:
+            return None
+        expected = att.get("size")
+        if expected and tmp.stat().st_size != expected:
+            print(f"    Tamanho divergente em {key} ({att.get('filename')}): "
+                  f"{tmp.stat().st_size} != {expected}; descartando .part")
+            tmp.unlink(missing_ok=True)
+            return None
+        return BLOBS.put(att_id, tmp, sha256, attachment_meta(att))
+    except Exception as e:
+        # .part fica no disco: a próxima tentativa continua de onde parou
+        print(f"    Falha ao baixar anexo em {key}: {e}")
+        return None
+
+def iter_issues_enhanced(jql: str, page_size=100, fields=None, log=print):
+    """Enhanced search em streaming (nextPageToken + prefetch da próxima página)."""
+    return JIRA.search(jql, fields or FIELDS, page_size=page_size, log=log)
+
+def iter_pages_enhanced(jql: str, page_size=100, fields=None, log=print, start_token=None):
+    """Mesma busca, página a página: (issues, next_token)."""
+    return JIRA.search_pages(jql, fields or FIELDS, page_size=page_size, log=log, start_token=start_token)
+
+def fetch_all_issues_enhanced(jql: str, page_size=100, fields=None, log=print):
+    """Versão que materializa a lista (só para buscas pequenas, ex.: listagem de keys)."""
+    return list(iter_issues_enhanced(jql, page_size=page_size, fields=fields, log=log))
+
+
+class BoardLog:
+    """
+    Log de progresso de UM board: com vários boards em paralelo,
+    cada linha vai pro stdout com o prefixo do board e pra <board>/progress.log.
+    """
+
+    stdout_lock = threading.Lock()  # linhas de boards diferentes não se misturam
+
+    def __init__(self, board_name: str, board_dir: pathlib.Path):
+        self.prefix = f"[{board_name}]"
+        self.fp = open(board_dir / "progress.log", "a", encoding="utf-8")
+
+    def __call__(self, msg: str):
+        with self.stdout_lock:
+            print(f"{self.prefix} {msg}")
+        self.fp.write(f"{datetime.now():%Y-%m-%d %H:%M:%S} {msg}\n")
+        self.fp.flush()
+
+    def close(self):
+        self.fp.close()
+
+
+# ========= MODO INCREMENTAL =========
+
+def load_state() -> dict:
+    if STATE_FILE.exists():
+        with open(STATE_FILE, "r", encoding="utf-8") as fp:
+            return json.load(fp)
+    return {"boards": {}}
+
+def save_state(state: dict):
+    write_json_atomic(STATE_FILE, state)
+
+def write_json_atomic(path: pathlib.Path, obj):
+    """Grava num .tmp, fsync e rename: uma queda nunca deixa o JSON pela metade."""
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as fp:
+        json.dump(obj, fp, ensure_ascii=False, indent=2)
+        fp.flush()
+        os.fsync(fp.fileno())
+    os.replace(tmp, path)
+
+def load_board_index(board_dir: pathlib.Path):
+    index_file = board_dir / "index.json"
+    if not index_file.exists():
+        return None
+    with open(index_file, "r", encoding="utf-8") as fp:
+        return json.load(fp)
+
+def parse_jira_dt(value: str) -> datetime:
+    """Datas do Jira vêm como 2026-10-16T10:22:33.123-0300."""
+    return datetime.fromisoformat(value)
+
+def jira_user_tz():
+    """
+    JQL interpreta datas no fuso do usuário da API (perfil do Jira),
+    então a watermark precisa ser convertida pra esse fuso.
+    """
+    try:
+        tz_name = jira_get("/rest/api/3/myself").get("timeZone")
+        return ZoneInfo(tz_name) if tz_name else timezone.utc
+    except (requests.RequestException, ZoneInfoNotFoundError) as e:
+        print(f"Não consegui ler o fuso do usuário ({e}); usando UTC (com margem de 14h).")
+        return None
+
+def with_updated_since(jql: str, watermark: str, tz) -> str:
+    """Injeta `AND updated >= "yyyy-MM-dd HH:mm"` antes do ORDER BY do JQL do board."""
+    overlap = timedelta(minutes=INCREMENTAL_OVERLAP_MIN)
+    if tz is None:
+        # sem fuso conhecido: cobre qualquer offset possível
+        tz, overlap = timezone.utc, overlap + timedelta(hours=14)
+    since = (parse_jira_dt(watermark) - overlap).astimezone(tz)
+
+    m = re.search(r"\s+ORDER\s+BY\s+.*$", jql, flags=re.IGNORECASE | re.DOTALL)
+    where, order = (jql[:m.start()], jql[m.start():]) if m else (jql, "")
+    return f'({where}) AND updated >= "{since:%Y-%m-%d %H:%M}"{order}'
+
+def list_board_keys(jql: str, log=print) -> list[str]:
+    """Só as keys do board (na ordem do JQL): pedir só `id` libera páginas de até 5000."""
+    return [i["key"] for i in fetch_all_issues_enhanced(jql, page_size=5000, fields=["id"], log=log)]
+
+def iter_pages_by_keys(keys: list[str], batch_size=100, log=print):
+    """
+    Busca `key in (...)` em lotes. Key apagada ou movida de projeto depois da listagem
+    faz o Jira recusar o lote inteiro com 400: as keys citadas no erro saem do lote
+    e, se o erro não disser quais são, o lote é dividido ao meio até isolá-las.
+    """
+    batches = deque(keys[i:i + batch_size] for i in range(0, len(keys), batch_size))
+    while batches:
+        batch = batches.popleft()
+        try:
+            # 1 página por lote (page_size = tamanho do lote): o 400 vem antes de qualquer issue
+            pages = list(iter_pages_enhanced(f"key in ({', '.join(batch)})", page_size=batch_size, log=log))
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code != 400:
+                raise
+            try:
+                errors = " ".join(e.response.json().get("errorMessages") or [])
+            except ValueError:
+                errors = ""
+            gone = {k for k in re.findall(r"'([A-Z][A-Z0-9_]*-\d+)'", errors) if k in batch}
+            if not gone and len(batch) == 1:
+                gone = set(batch)
+            if gone:
+                log(f"  {len(gone)} keys não existem mais no Jira (apagadas/movidas), pulando: {', '.join(sorted(gone))}")
+                rest = [k for k in batch if k not in gone]
+                if rest:
+                    batches.appendleft(rest)
+            else:
+                batches.extendleft([batch[len(batch) // 2:], batch[:len(batch) // 2]])
+            continue
+        yield from pages
+
+def board_incremental(b: dict, state: dict, current_keys: dict) -> bool:
+    """Board pode rodar incremental: tem keys listadas, index.json anterior e watermark do mesmo JQL."""
+    board_state = state["boards"].get(b["name"]) or {}
+    return bool(
+        b["name"] in current_keys
+        and load_board_index(OUT_DIR / safe_name(b["name"])) is not None
+        and board_state.get("watermark")
+        and board_state.get("jql") == b["jql"]   # mudou o filtro do board -> refaz completo
+    )
+
+def plan_project_scans(boards: list, state: dict, current_keys: dict, tz, full_history: bool) -> dict:
+    """
+    Modo busca única: boards do mesmo projeto (e mesmo ORDER BY) saem de UMA
+    busca `project = X` com a união dos campos; cada página é filtrada
+    localmente pelo JQL de cada board (nomes de campo resolvidos em /rest/api/3/field).
+    Boards com JQL que não dá pra avaliar local (OR, funções...) continuam
+    com a própria busca. Retorna { nome do board: ProjectScan }.
+    """
+    field_index = load_field_index(JIRA)
+    groups = {}
+    for b in boards:
+        flt = build_filter(b["jql"], field_index)
+        if flt is None:
+            print(f"[{b['name']}] JQL não avaliável localmente; mantém a busca própria")
+            continue
+        groups.setdefault((flt.project.upper(), flt.order), []).append((b, flt))
+
+    scans = {}
+    for (project, order), members in groups.items():
+        if len(members) < 2:
+            continue  # 1 board só: a busca própria já é 1 passada
+
+        jql = f'project = "{project}"' + (f" ORDER BY {order}" if order else "")
+        # filtro por `updated` só se TODOS os boards do grupo estão incrementais (menor watermark)
+        if all(board_incremental(b, state, current_keys) for b, _ in members):
+            watermarks = [state["boards"][b["name"]]["watermark"] for b, _ in members]
+            jql = with_updated_since(jql, min(watermarks, key=parse_jira_dt), tz)
+
+        # campos só usados no filtro são pedidos na busca e removidos antes de gravar
+        extra = sorted(set().union(*(flt.fields for _, flt in members)) - set(FIELDS))
+
+        checkpoints = {}
+        for b, _ in members:
+            board_dir = OUT_DIR / safe_name(b["name"])
+            board_dir.mkdir(parents=True, exist_ok=True)
+            checkpoints[b["name"]] = BoardCheckpoint(board_dir, jql)
+        done_pages = {name: ck.pages for name, ck in checkpoints.items() if not ck.search_done}
+        behind = min(done_pages, key=done_pages.get) if done_pages else None
+        start_token = checkpoints[behind].token if behind and done_pages[behind] else None
+
+        def scan_log(msg, prefix=f"[busca única {project}]"):
+            with BoardLog.stdout_lock:
+                print(f"{prefix} {msg}")
+
+        scan = ProjectScan(
+            jql, FIELDS + extra, {b["name"]: flt for b, flt in members}, done_pages, start_token,
+            search_pages=lambda q, fields, token: iter_pages_enhanced(
+                q, page_size=100, fields=fields, log=None, start_token=token),
+            prepare=(lambda issues, log=scan_log: attach_full_history(JIRA, issues, log=log)) if full_history else None,
+            strip=extra, log=scan_log,
+        )
+        scan.checkpoints = checkpoints
+        scan_log(f"{jql} -> {', '.join(b['name'] for b, _ in members)}")
+        for b, _ in members:
+            scans[b["name"]] = scan
+    return scans
+
+def retire_issue_folder(board_dir: pathlib.Path, board_name: str, key: str, moved_to, log=print):
+    """
+    Issue saiu do board:
+    - mudou de board  -> a pasta antiga é apagada (a nova fica no outro board)
+    - sumiu de todos  -> a pasta vai pra _removidas/<board>/ (backup não perde nada)
+    """
+    folder = board_dir / safe_name(key)
+    if not folder.exists():
+        return
+    if moved_to:
+        log(f"  ~ {key} mudou para [{moved_to}]")
+        shutil.rmtree(folder)
+    else:
+        log(f"  - {key} removida/fora de todos os boards -> _removidas")
+        dest = OUT_DIR / "_removidas" / safe_name(board_name) / safe_name(key)
+        if dest.exists():
+            shutil.rmtree(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(folder), str(dest))
+
+
+def open_issue_writer(board_dir: pathlib.Path, output_format: str, compress: bool):
+    if output_format == "ndjson":
+        writer = PackedArchive(board_dir, compress=compress)
+    else:
+        writer = FolderWriter(board_dir, safe_name)
+    return WriterStage(writer, queue_size=WRITE_QUEUE, name=f"grava-{board_dir.name[:20]}")
+
+
+def main(incremental: bool = False, output_format: str = OUTPUT_FORMAT, compress: bool = OUTPUT_GZIP,
+         board_workers: int = BOARD_WORKERS, full_history: bool = FULL_HISTORY, single_scan: bool = SINGLE_SCAN):
+    init()
+    manifest = {
+        "jira_base": JIRA_BASE,
+        "boards": [],
+    }
+    state = load_state() if incremental else {"boards": {}}
+
+    # boards rodam em paralelo; todos dividem o mesmo JiraClient (RateLimiter)
+    # e o mesmo pool de downloads. Na busca única todos os boards precisam
+    # consumir ao mesmo tempo (a busca alimenta as filas de todos).
+    if single_scan:
+        board_workers = max(board_workers, len(BOARDS))
+    with ThreadPoolExecutor(max_workers=max(1, board_workers), thread_name_prefix="board") as boards_pool, \
+         ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS, thread_name_prefix="anexo") as pool:
+
+        # incremental: lista barata das keys atuais de TODOS os boards,
+        # pra detectar issues apagadas e issues que mudaram de board
+        current_keys = {}
+        tz = None
+        if incremental:
+            tz = jira_user_tz()
+            print("\nListando keys atuais dos boards...")
+            listed = boards_pool.map(lambda b: list_board_keys(b["jql"], log=None), BOARDS)
+            current_keys = {b["name"]: keys for b, keys in zip(BOARDS, listed)}
+
+        scans = plan_project_scans(BOARDS, state, current_keys, tz, full_history) if single_scan else {}
+        for scan in {id(s): s for s in scans.values()}.values():
+            scan.start()
+
+        def run_board(b: dict) -> dict:
+            result = backup_board(
+                b, pool, state, current_keys, tz,
+                output_format=output_format, compress=compress, full_history=full_history,
+                scan=scans.get(b["name"]),
+            )
+            with STATE_LOCK:
+                save_state(state)  # watermark só avança quando o board termina
+                BLOBS.save()
+            return result
+
+        # manifest na ordem de BOARDS, independente de qual termina primeiro
+        manifest["boards"] = list(boards_pool.map(run_board, BOARDS))
+
+    QUERY_INDEX.close()
+
+    # manifest geral
+    write_json_atomic(OUT_DIR / "backup_manifest.json", manifest)
+
+    print(f"\nBackup final em: {OUT_DIR.resolve()}")
+
+
+def backup_board(b: dict, pool: ThreadPoolExecutor, state: dict, current_keys: dict, tz=None,
+                 output_format: str = OUTPUT_FORMAT, compress: bool = OUTPUT_GZIP,
+                 full_history: bool = FULL_HISTORY, scan: ProjectScan = None) -> dict:
+    board_name = b["name"]
+
+    board_dir = OUT_DIR / safe_name(board_name)
+    board_dir.mkdir(parents=True, exist_ok=True)
+
+    # board que cai no meio (busca, download ou gravação) ainda fecha a thread de gravação,
+    # o checkpoint e o log: um worker que roda vários backups não acumula threads nem arquivos
+    with ExitStack() as cleanup:
+        log = BoardLog(board_name, board_dir)
+        cleanup.callback(log.close)
+        log("início")
+        writer = open_issue_writer(board_dir, output_format, compress)
+        cleanup.callback(close_quietly, writer)
+        try:
+            return _backup_board(b, pool, state, current_keys, tz, output_format, compress, full_history, scan,
+                                 board_dir, log, writer, cleanup)
+        except BaseException as e:
+            log(f"ERRO: {e}")
+            raise
+
+
+def close_quietly(resource):
+    """Fecha no caminho de erro sem esconder a exceção original."""
+    try:
+        resource.close()
+    except Exception:
+        pass
+
+
+def _backup_board(b: dict, pool: ThreadPoolExecutor, state: dict, current_keys: dict, tz, output_format: str,
+                  compress: bool, full_history: bool, scan, board_dir: pathlib.Path, log, writer,
+                  cleanup: ExitStack) -> dict:
+    board_name = b["name"]
+    jql = b["jql"]
+    board_state = state["boards"].get(board_name) or {}
+    old_index = load_board_index(board_dir)
+    incremental = board_incremental(b, state, current_keys)
+
+    if incremental:
+        keys = current_keys[board_name]
+        old_entries = {e["key"]: e for e in old_index["issues"]}
+        search_jql = with_updated_since(jql, board_state["watermark"], tz)
+        log(f"JQL (incremental): {search_jql}")
+
+        # keys que saíram do board: mudaram de board ou foram apagadas
+        still_here = set(keys)
+        for key in old_entries:
+            if key not in still_here:
+                moved_to = next((name for name, ks in current_keys.items()
+                                 if name != board_name and key in ks), None)
+                retire_issue_folder(board_dir, board_name, key, moved_to, log=log)
+                writer.remove(key)
+                if SQLITE_INDEX:
+                    writer.submit(QUERY_INDEX.remove, key, board_name)
+    else:
+        search_jql = jql
+        log(f"JQL: {jql}")
+        keys = []   # preenchida durante o streaming (só as keys ficam em memória)
+        old_entries = {}
+
+    entries = dict(old_entries)
+    watermark = board_state.get("watermark") if incremental else None
+
+    # checkpoint: o que já foi concluído numa execução que caiu não é refeito
+    # (na busca única o checkpoint segue as páginas da busca do projeto)
+    if scan is not None:
+        log(f"busca única: {scan.jql}")
+        ckpt = scan.checkpoints[board_name]
+    else:
+        ckpt = BoardCheckpoint(board_dir, search_jql)
+    cleanup.callback(ckpt.close)
+    if ckpt.resumed:
+        log(f"retomando do checkpoint: {len(ckpt.entries)} issues em {ckpt.pages} páginas já concluídas")
+    for entry in ckpt.entries:
+        entries[entry["key"]] = entry
+        if not incremental:
+            keys.append(entry["key"])
+        if entry.get("updated") and (watermark is None or parse_jira_dt(entry["updated"]) > parse_jira_dt(watermark)):
+            watermark = entry["updated"]
+
+    page_group = []      # (entrada do index, [futures dos anexos]) da página atual
+    in_flight = deque()  # páginas na fila de gravação esperando disco + anexos
+
+    def flush_pages(wait: bool):
+        """Registra no checkpoint as páginas já no disco (fsync) e com os anexos prontos (em ordem)."""
+        while in_flight:
+            phase, token, group, written = in_flight[0]
+            if not wait and not (written.done() and all(fut.done() for _, futures in group for fut in futures)):
+                break
+            written.result()  # erro de gravação interrompe o board antes do checkpoint
+            for entry, futures in group:
+                entry["images_downloaded"] = sum(1 for fut in futures if fut.result())
+                # sha256 de cada anexo no manifesto do board (conferido pelo verify.py)
+                for att in entry["attachments"]:
+                    att["sha256"] = (BLOBS.by_id.get(att["id"]) or {}).get("sha256")
+            if SQLITE_INDEX:
+                QUERY_INDEX.commit()
+            ckpt.page_done([entry for entry, _ in group], phase, token)
+            in_flight.popleft()
+
+    def board_pages():
+        """(fase, issues da página, token da próxima página)"""
+        fetched = {e["key"] for e in ckpt.entries}
+        if not ckpt.search_done:
+            if scan is not None:
+                pages = scan.pages(board_name)
+            else:
+                pages = iter_pages_enhanced(search_jql, page_size=100, log=log, start_token=ckpt.token)
+            for issues, token in pages:
+                fetched.update(i.get("key") for i in issues)
+                yield "search", issues, token
+
+        # keys que entraram no board sem `updated` novo (ex.: JQL do board mudou de semântica)
+        if incremental:
+            missing = [k for k in keys if k not in old_entries and k not in fetched]
+            if missing:
+                log(f"  + {len(missing)} issues novas no board fora da watermark")
+                for issues, token in iter_pages_by_keys(missing, log=log):
+                    yield "missing", issues, token
+
+    def board_issues():
+        for phase, issues, token in board_pages():
+            # histórico completo: 1 bulk de changelog por página + comentários só das threads cortadas
+            # (páginas da busca única já vêm com o histórico, buscado 1x pra todos os boards)
+            if full_history and not (scan is not None and phase == "search"):
+                attach_full_history(JIRA, issues, log=log)
+
+            # solta cada issue assim que ela é gravada
+            issues.reverse()
+            while issues:
+                yield issues.pop()
+
+            # página inteira na fila de gravação: a barreira faz o fsync do lote
+            in_flight.append((phase, token, list(page_group), writer.barrier()))
+            page_group.clear()
+            flush_pages(wait=False)
+
+    rewritten = 0
+    fetched = 0
+
+    # streaming: cada issue é gravada assim que a página chega
+    for issue in board_issues():
+        fetched += 1
+        key = issue.get("key")
+        if not incremental:
+            keys.append(key)
+        f = issue.get("fields", {}) or {}
+        summary = f.get("summary", "")
+        itype = (f.get("issuetype") or {}).get("name", "")
+        status = (f.get("status") or {}).get("name", "")
+        updated = f.get("updated")
+
+        if updated and (watermark is None or parse_jira_dt(updated) > parse_jira_dt(watermark)):
+            watermark = updated
+
+        issue_folder = board_dir / safe_name(key)
+
+        # incremental: mesma versão já no disco -> não reescreve
+        old = old_entries.get(key)
+        if old and old.get("updated") == updated and writer.has(key):
+            # índice SQLite criado depois do backup: indexa sem regravar
+            if SQLITE_INDEX and not QUERY_INDEX.has(key, board_name):
+                writer.submit(QUERY_INDEX.upsert, issue, board_name, BLOBS.by_id)
+            continue
+
+        rewritten += 1
+
+        # 1) JSON bruto (pasta da issue ou segmento NDJSON do board), na thread de gravação
+        writer.write(key, issue)
+        if SQLITE_INDEX:
+            writer.submit(QUERY_INDEX.upsert, issue, board_name, BLOBS.by_id)
+
+        # 2) Imagens anexadas: vão pro pool (skip se já existe; LIMITER controla o ritmo)
+        futures = submit_image_downloads(pool, key, f.get("attachment") or [], issue_folder / "imagens")
+
+        entry = {
+            "key": key,
+            "summary": summary,
+            "issuetype": itype,
+            "status": status,
+            "updated": updated,
+            "images_downloaded": 0,
+            "folder": str(issue_folder.relative_to(OUT_DIR)),
+            "attachments": [attachment_record(att, key) for att in image_attachments(f.get("attachment") or [])],
+        }
+        entries[key] = entry
+        page_group.append((entry, futures))
+
+    log(f"TOTAL baixado: {fetched}")
+
+    # espera os anexos DESTE board antes de fechar o index.json
+    flush_pages(wait=True)
+    writer.close()
+    if SQLITE_INDEX:
+        QUERY_INDEX.fill_sha256(BLOBS.by_id)
+
+    # index completo do board, na ordem do JQL (Rank)
+    board_index = {
+        "board": board_name,
+        "jql": jql,
+        "total_issues": len(keys),
+        "issues": [entries[k] for k in keys if k in entries],
+    }
+    log(f"reescritas: {rewritten} / {len(keys)}")
+
+    # index.json do board
+    write_json_atomic(board_dir / "index.json", board_index)
+    ckpt.finish()
+
+    log(f"OK -> {board_dir.resolve()}")
+
+    with STATE_LOCK:
+        state["boards"][board_name] = {
+            "jql": jql,
+            "watermark": watermark,
+            "last_run": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+
+    return {
+        "name": board_name,
+        "folder": str(board_dir.relative_to(OUT_DIR)),
+        "total_issues": len(keys),
+        "index_file": str((board_dir / "index.json").relative_to(OUT_DIR)),
+        "format": writer.format + (".gz" if output_format == "ndjson" and compress else ""),
+    }
+
+
+def attachment_id(att: dict) -> str:
+    return str(att.get("id") or att.get("content"))
+
+def attachment_meta(att: dict) -> dict:
+    return {
+        "filename": att.get("filename"),
+        "mimeType": att.get("mimeType"),
+        "jira_size": att.get("size"),
+        "created": att.get("created"),
+    }
+
+def attachment_record(att: dict, key: str) -> dict:
+    """Anexo no index.json do board: o que o Jira informou + onde foi salvo (sha256 entra quando termina)."""
+    return {
+        "id": attachment_id(att),
+        "file": safe_name(att.get("filename", f"{key}_img")),
+        "size": att.get("size"),
+        "created": att.get("created"),
+        "sha256": None,
+    }
+
+def image_attachments(attachments: list) -> list:
+    """Só os anexos que o backup baixa (imagens com URL de conteúdo)."""
+    return [att for att in attachments if att.get("mimeType") in IMAGE_MIMES and att.get("content")]
+
+def submit_image_downloads(pool: ThreadPoolExecutor, key: str, attachments: list, img_dir: pathlib.Path) -> list:
+    """
+    Cada anexo é baixado no máximo 1x (mesmo repetido em várias issues/boards);
+    a pasta da issue recebe um hardlink pro blob.
+    Devolve Futures que resolvem True quando o arquivo foi baixado e linkado
+    (anexo que já estava no store conta como pronto: o images_downloaded do
+    index.json não depende de qual board/issue baixou primeiro).
+    """
+    futures = []
+    for att in image_attachments(attachments):
+        filename = safe_name(att.get("filename", f"{key}_img"))
+        dest_path = img_dir / filename
+        att_id = attachment_id(att)
+
+        # ✅ já está no store: só garante o link (nenhuma requisição)
+        blob = BLOBS.get(att_id)
+        if blob:
+            BLOBS.link(blob, dest_path)
+            futures.append(resolved(True))
+            continue
+
+        # ✅ backup antigo (antes do store) com o arquivo completo: importa sem baixar de novo
+        if dest_path.exists() and dest_path.stat().st_size == att.get("size", dest_path.stat().st_size) > 0:
+            BLOBS.adopt(att_id, dest_path, attachment_meta(att))
+            futures.append(resolved(True))
+            continue
+
+        blob_future = BLOBS.once(att_id, lambda: pool.submit(download_task, att, key))
+        futures.append(link_when_done(blob_future, dest_path, key))
+    return futures
+
+def resolved(value) -> Future:
+    fut = Future()
+    fut.set_result(value)
+    return fut
+
+def link_when_done(blob_future: Future, dest_path: pathlib.Path, key: str) -> Future:
+    """Quando o blob termina de baixar, cria o hardlink na pasta da issue."""
+    done = Future()
+
+    def _link(f: Future):
+        blob = f.result()
+        try:
+            if blob:
+                BLOBS.link(blob, dest_path)
+            done.set_result(bool(blob))
+        except OSError as e:
+            print(f"    Falha ao linkar anexo em {key}: {e}")
+            done.set_result(False)
+
+    blob_future.add_done_callback(_link)
+    return done
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backup dos boards EUR do Jira (JSON + imagens).")
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="só busca issues com `updated` >= watermark de cada board (backup_state.json)",
+    )
+    parser.add_argument(
+        "--format", choices=["folders", "ndjson"], default=OUTPUT_FORMAT,
+        help="folders = issue_raw.json por issue; ndjson = segmentos compactos por board com índice por key",
+    )
+    parser.add_argument("--gzip", action="store_true", default=OUTPUT_GZIP, help="comprime os segmentos ndjson")
+    parser.add_argument(
+        "--boards-parallel", type=int, default=BOARD_WORKERS,
+        help="quantos boards processar ao mesmo tempo (todos dividem o mesmo rate limit)",
+    )
+    parser.add_argument(
+        "--history", action="store_true", default=FULL_HISTORY,
+        help="inclui changelog e comentários completos (endpoints bulk, em lotes por página)",
+    )
+    parser.add_argument(
+        "--single-scan", action="store_true", default=SINGLE_SCAN,
+        help="1 busca só por projeto (project = X) distribuída localmente entre os boards",
+    )
+    args = parser.parse_args()
+    with exit_on_config_error(), METRICS.run("extrai"):
+        main(
+            incremental=args.incremental, output_format=args.format, compress=args.gzip,
+            board_workers=args.boards_parallel, full_history=args.history, single_scan=args.single_scan,
+        )
@@ -0,0 +1,80 @@
+from collections import defaultdict
+
+CHANGELOG_BULK_PATH = "/rest/api/3/changelog/bulkfetch"
+CHANGELOG_BULK_MAX_IDS = 1000   # limite de issues por chamada do bulkfetch
+COMMENTS_PAGE_SIZE = 100
+
+
+def fetch_changelogs(client, issue_ids: list[str]) -> dict:
+    """
+    Changelog completo de várias issues com POST /rest/api/3/changelog/bulkfetch
+    (até 1000 issues por chamada, paginado por nextPageToken).
+    Retorna { issue_id: [histories...] }.
+    """
+    histories = defaultdict(list)
+    for i in range(0, len(issue_ids), CHANGELOG_BULK_MAX_IDS):
+        body = {"issueIdsOrKeys": issue_ids[i:i + CHANGELOG_BULK_MAX_IDS], "maxResults": 1000}
+        while True:
+            data = client.post(CHANGELOG_BULK_PATH, body)
+            for item in data.get("issueChangeLogs", []) or []:
+                histories[str(item.get("issueId"))].extend(item.get("changeHistories", []) or [])
+            token = data.get("nextPageToken")
+            if not token:
+                break
+            body = {**body, "nextPageToken": token}
+    return histories
+
+
+def fetch_all_comments(client, key: str) -> list:
+    """Todos os comentários de UMA issue (GET /issue/{key}/comment paginado por startAt)."""
+    comments = []
+    start = 0
+    while True:
+        data = client.get(
+            f"/rest/api/3/issue/{key}/comment",
+            params={"startAt": start, "maxResults": COMMENTS_PAGE_SIZE, "orderBy": "created"},
+        )
+        page = data.get("comments", []) or []
+        comments.extend(page)
+        start += len(page)
+        if not page or start >= data.get("total", 0):
+            break
+    return comments
+
+
+def comments_truncated(issue: dict) -> bool:
+    """O campo `comment` da busca vem cortado em threads longas: total > quantidade entregue."""
+    comment = (issue.get("fields") or {}).get("comment") or {}
+    return comment.get("total", 0) > len(comment.get("comments") or [])
+
+
+def attach_full_history(client, issues: list, log=print):
+    """
+    Completa as issues de UMA página (in-place):
+    - issue["changelog"] = {"histories": [...], "total": n}  (1 chamada bulk pra página inteira)
+    - fields.comment com TODOS os comentários, só nas issues em que veio cortado
+    O bulk do changelog e a paginação dos comentários rodam em paralelo no executor do client.
+    """
+    if not issues:
+        return
+
+    executor = client.executor()
+    ids = [str(i["id"]) for i in issues if i.get("id")]
+    changelog_future = executor.submit(fetch_changelogs, client, ids)
+
+    truncated = [i for i in issues if comments_truncated(i)]
+    comment_futures = [(i, executor.submit(fetch_all_comments, client, i["key"])) for i in truncated]
+
+    histories = changelog_future.result()
+    for issue in issues:
+        items = sorted(histories.get(str(issue.get("id")), []), key=lambda h: h.get("created", ""))
+        issue["changelog"] = {"startAt": 0, "maxResults": len(items), "total": len(items), "histories": items}
+
+    for issue, fut in comment_futures:
+        comments = fut.result()
+        issue.setdefault("fields", {})["comment"] = {
+            "startAt": 0, "maxResults": len(comments), "total": len(comments), "comments": comments,
+        }
+
+    if log:
+        log(f"    histórico: changelog de {len(ids)} issues, comentários completos em {len(truncated)}")
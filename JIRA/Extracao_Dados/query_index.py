@@ -0,0 +1,231 @@
+import sys
+import json
+import sqlite3
+import pathlib
+import threading
+
+# colunas fixas (campos padrão); custom fields viram colunas com o próprio id
+BASE_COLUMNS = [
+    "summary", "status", "issuetype", "priority", "assignee", "reporter",
+    "parent", "created", "updated", "duedate",
+]
+
+
+def field_value(value):
+    """Valor de campo do Jira -> algo que cabe numa coluna SQLite."""
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    if isinstance(value, dict):
+        for k in ("value", "displayName", "name", "key"):
+            if value.get(k) is not None:
+                return value[k]
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, list):
+        return ", ".join(str(field_value(v)) for v in value)
+    return str(value)
+
+
+def adf_text(node) -> str:
+    """Extrai o texto puro de um documento ADF (description / corpo de comentário)."""
+    if isinstance(node, str):
+        return node
+    parts = []
+
+    def walk(n):
+        if isinstance(n, dict):
+            if n.get("type") == "text":
+                parts.append(n.get("text", ""))
+            elif n.get("type") == "mention":
+                parts.append((n.get("attrs") or {}).get("text", ""))
+            for child in n.get("content") or []:
+                walk(child)
+            if n.get("type") in ("paragraph", "heading", "listItem", "codeBlock", "tableRow"):
+                parts.append("\n")
+        elif isinstance(n, list):
+            for child in n:
+                walk(child)
+
+    walk(node)
+    return "".join(parts).strip()
+
+
+class QueryIndex:
+    """
+    Índice SQLite do backup (jira_backup/backup_index.sqlite):
+      issues        1 linha por issue (campos padrão + custom fields de FIELDS)
+      issue_boards  em quais boards a issue aparece
+      attachments   anexos (id, issue, nome, mime, tamanho, sha256 do BlobStore)
+      issues_fts    FTS5 sobre summary, description e comentários
+    Atualizado issue a issue durante o backup (commit por lote).
+    """
+
+    def __init__(self, path: pathlib.Path, custom_fields: list[str], commit_every: int = 200):
+        self.path = path
+        self.custom_fields = custom_fields
+        self.commit_every = commit_every
+        self.lock = threading.Lock()
+        self.conn = None
+        self.fts = True
+        self.pending = 0
+
+    def _connect(self):
+        if self.conn is not None:
+            return self.conn
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+
+        cols = ", ".join(f'"{c}" TEXT' for c in BASE_COLUMNS + self.custom_fields)
+        self.conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS issues (key TEXT PRIMARY KEY, id TEXT, {cols});
+            CREATE TABLE IF NOT EXISTS issue_boards (
+                key TEXT NOT NULL, board TEXT NOT NULL, PRIMARY KEY (key, board)
+            );
+            CREATE TABLE IF NOT EXISTS attachments (
+                id TEXT PRIMARY KEY, issue_key TEXT NOT NULL, filename TEXT,
+                mime_type TEXT, size INTEGER, created TEXT, sha256 TEXT
+            );
+            CREATE INDEX IF NOT EXISTS ix_issue_boards_board ON issue_boards(board);
+            CREATE INDEX IF NOT EXISTS ix_attachments_issue ON attachments(issue_key);
+            CREATE INDEX IF NOT EXISTS ix_issues_status ON issues(status);
+        """)
+
+        # custom fields novos em FIELDS -> colunas novas
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(issues)")}
+        for c in BASE_COLUMNS + self.custom_fields:
+            if c not in existing:
+                self.conn.execute(f'ALTER TABLE issues ADD COLUMN "{c}" TEXT')
+
+        try:
+            self.conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS issues_fts USING fts5("
+                "key UNINDEXED, summary, description, comments, tokenize='unicode61 remove_diacritics 2')"
+            )
+        except sqlite3.OperationalError as e:
+            print(f"SQLite sem FTS5 ({e}); índice full-text desativado.")
+            self.fts = False
+        return self.conn
+
+    def has(self, key: str, board: str) -> bool:
+        with self.lock:
+            conn = self._connect()
+            row = conn.execute("SELECT 1 FROM issue_boards WHERE key = ? AND board = ?", (key, board)).fetchone()
+        return row is not None
+
+    def upsert(self, issue: dict, board: str, sha_by_attachment: dict = None):
+        key = issue.get("key")
+        f = issue.get("fields", {}) or {}
+        columns = BASE_COLUMNS + self.custom_fields
+        values = [field_value(f.get(c)) for c in columns]
+        comments = (f.get("comment") or {}).get("comments") or []
+
+        with self.lock:
+            conn = self._connect()
+            quoted = ", ".join(f'"{c}"' for c in columns)
+            marks = ", ".join("?" for _ in columns)
+            conn.execute(
+                f"INSERT OR REPLACE INTO issues (key, id, {quoted}) VALUES (?, ?, {marks})",
+                [key, issue.get("id")] + values,
+            )
+            conn.execute("INSERT OR IGNORE INTO issue_boards (key, board) VALUES (?, ?)", (key, board))
+
+            conn.execute("DELETE FROM attachments WHERE issue_key = ?", (key,))
+            for att in f.get("attachment") or []:
+                att_id = str(att.get("id") or att.get("content"))
+                sha = ((sha_by_attachment or {}).get(att_id) or {}).get("sha256")
+                conn.execute(
+                    "INSERT OR REPLACE INTO attachments (id, issue_key, filename, mime_type, size, created, sha256) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (att_id, key, att.get("filename"), att.get("mimeType"), att.get("size"), att.get("created"), sha),
+                )
+
+            if self.fts:
+                conn.execute("DELETE FROM issues_fts WHERE key = ?", (key,))
+                conn.execute(
+                    "INSERT INTO issues_fts (key, summary, description, comments) VALUES (?, ?, ?, ?)",
+                    (
+                        key,
+                        f.get("summary") or "",
+                        adf_text(f.get("description") or ""),
+                        "\n\n".join(adf_text(c.get("body") or "") for c in comments),
+                    ),
+                )
+            self._maybe_commit()
+
+    def remove(self, key: str, board: str):
+        """Tira a issue do board; se não sobrou em nenhum board, some do índice."""
+        with self.lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM issue_boards WHERE key = ? AND board = ?", (key, board))
+            if conn.execute("SELECT 1 FROM issue_boards WHERE key = ?", (key,)).fetchone() is None:
+                conn.execute("DELETE FROM issues WHERE key = ?", (key,))
+                conn.execute("DELETE FROM attachments WHERE issue_key = ?", (key,))
+                if self.fts:
+                    conn.execute("DELETE FROM issues_fts WHERE key = ?", (key,))
+            self._maybe_commit()
+
+    def fill_sha256(self, sha_by_attachment: dict):
+        """Completa o sha256 dos anexos baixados depois do upsert da issue."""
+        with self.lock:
+            conn = self._connect()
+            missing = [row[0] for row in conn.execute("SELECT id FROM attachments WHERE sha256 IS NULL")]
+            for att_id in missing:
+                sha = (sha_by_attachment.get(att_id) or {}).get("sha256")
+                if sha:
+                    conn.execute("UPDATE attachments SET sha256 = ? WHERE id = ?", (sha, att_id))
+            conn.commit()
+            self.pending = 0
+
+    def _maybe_commit(self):
+        self.pending += 1
+        if self.pending >= self.commit_every:
+            self.conn.commit()
+            self.pending = 0
+
+    def commit(self):
+        with self.lock:
+            if self.conn is not None:
+                self.conn.commit()
+                self.pending = 0
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                self.conn.commit()
+                self.conn.close()
+                self.conn = None
+
+
+def search(db_path: pathlib.Path, text: str, limit: int = 50) -> list[tuple]:
+    """Busca full-text: devolve (key, board, status, summary) ordenado por relevância."""
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(
+            """
+            SELECT i.key, GROUP_CONCAT(b.board, ' | '), i.status, i.summary
+            FROM issues_fts
+            JOIN issues i ON i.key = issues_fts.key
+            LEFT JOIN issue_boards b ON b.key = i.key
+            WHERE issues_fts MATCH ?
+            GROUP BY i.key
+            ORDER BY MIN(issues_fts.rank)
+            LIMIT ?
+            """,
+            (text, limit),
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    # uso: python query_index.py "PIX"                      (busca full-text)
+    #      python query_index.py --sql "SELECT ... FROM issues"
+    db = pathlib.Path("jira_backup") / "backup_index.sqlite"
+    if len(sys.argv) > 2 and sys.argv[1] == "--sql":
+        conn = sqlite3.connect(db)
+        for row in conn.execute(sys.argv[2]):
+            print(row)
+        conn.close()
+    else:
+        for key, boards, status, summary in search(db, " ".join(sys.argv[1:])):
+            print(f"{key:<12} [{status}] {summary}  ({boards})")
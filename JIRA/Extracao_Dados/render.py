@@ -0,0 +1,501 @@
+import os
+import sys
+import json
+import html
+import hashlib
+import pathlib
+import argparse
+from urllib.parse import quote
+from concurrent.futures import ProcessPoolExecutor
+
+from archive import read_issue, load_index
+
+# Site estático do backup (offline), gerado a partir dos index.json + JSON bruto das issues:
+#   _site/index.html                      lista de boards
+#   _site/<board>/index.html, page-N.html lista paginada das issues (ordem do index.json = Rank)
+#   _site/<board>/<KEY>.html              description + comentários (ADF -> HTML) + imagens
+# Com --format md sai o mesmo em Markdown. As imagens não são copiadas: as páginas
+# apontam pras pastas imagens/ do backup.
+# Só re-renderiza issue cujo JSON (ou entrada no index.json) mudou desde a última vez
+# (_site/render_state.<formato>.json); as páginas de índice são sempre refeitas (baratas).
+
+OUT_DIR = pathlib.Path("jira_backup")
+SITE_DIR_NAME = "_site"
+RENDER_WORKERS = int(os.getenv("JIRA_RENDER_WORKERS", str(os.cpu_count() or 4)))
+PAGE_SIZE = int(os.getenv("JIRA_RENDER_PAGE_SIZE", "200"))   # issues por página do índice do board
+
+# muda quando o layout muda: força re-render de tudo
+RENDER_VERSION = 1
+
+SAFE_SCHEMES = ("http://", "https://", "mailto:")
+
+CSS = """
+body{font-family:system-ui,sans-serif;max-width:960px;margin:2em auto;padding:0 1em;color:#172b4d}
+table{border-collapse:collapse}td,th{border:1px solid #dfe1e6;padding:4px 8px;text-align:left;vertical-align:top}
+pre{background:#f4f5f7;padding:8px;overflow:auto}code{background:#f4f5f7}blockquote{border-left:3px solid #dfe1e6;margin-left:0;padding-left:1em}
+.meta td:first-child{font-weight:600}.comment{border-top:1px solid #dfe1e6;margin-top:1em}.who{color:#5e6c84}
+img{max-width:100%}.nav a{margin-right:.5em}.panel{background:#deebff;padding:8px}
+"""
+
+
+# ========= ADF -> HTML =========
+
+def _href(url) -> str:
+    url = str(url or "")
+    return url if url.lower().startswith(SAFE_SCHEMES) else "#"
+
+
+def _marks_html(text: str, marks: list) -> str:
+    out = html.escape(text)
+    for mark in marks or []:
+        kind = mark.get("type")
+        attrs = mark.get("attrs") or {}
+        if kind == "strong":
+            out = f"<strong>{out}</strong>"
+        elif kind == "em":
+            out = f"<em>{out}</em>"
+        elif kind == "code":
+            out = f"<code>{out}</code>"
+        elif kind == "strike":
+            out = f"<s>{out}</s>"
+        elif kind == "underline":
+            out = f"<u>{out}</u>"
+        elif kind == "subsup":
+            tag = "sub" if attrs.get("type") == "sub" else "sup"
+            out = f"<{tag}>{out}</{tag}>"
+        elif kind == "link":
+            out = f'<a href="{html.escape(_href(attrs.get("href")))}">{out}</a>'
+    return out
+
+
+def adf_html(node, images: dict) -> str:
+    """Documento ADF (description / corpo de comentário) -> HTML. `images`: nome do anexo -> URL local."""
+    if node is None:
+        return ""
+    if isinstance(node, str):
+        return f"<p>{html.escape(node)}</p>"
+    if isinstance(node, list):
+        return "".join(adf_html(n, images) for n in node)
+
+    kind = node.get("type")
+    attrs = node.get("attrs") or {}
+    inner = "".join(adf_html(n, images) for n in node.get("content") or [])
+
+    if kind == "text":
+        return _marks_html(node.get("text", ""), node.get("marks"))
+    if kind == "hardBreak":
+        return "<br>"
+    if kind == "paragraph":
+        return f"<p>{inner}</p>"
+    if kind == "heading":
+        level = min(max(int(attrs.get("level") or 1), 1), 6)
+        return f"<h{level}>{inner}</h{level}>"
+    if kind == "bulletList":
+        return f"<ul>{inner}</ul>"
+    if kind == "orderedList":
+        return f'<ol start="{int(attrs.get("order") or 1)}">{inner}</ol>'
+    if kind in ("listItem", "taskItem"):
+        return f"<li>{inner}</li>"
+    if kind == "taskList":
+        return f"<ul>{inner}</ul>"
+    if kind == "codeBlock":
+        return f"<pre><code>{inner}</code></pre>"
+    if kind == "blockquote":
+        return f"<blockquote>{inner}</blockquote>"
+    if kind == "rule":
+        return "<hr>"
+    if kind == "panel":
+        return f'<div class="panel">{inner}</div>'
+    if kind == "expand":
+        return f"<details><summary>{html.escape(attrs.get('title') or '')}</summary>{inner}</details>"
+    if kind == "table":
+        return f"<table>{inner}</table>"
+    if kind == "tableRow":
+        return f"<tr>{inner}</tr>"
+    if kind in ("tableHeader", "tableCell"):
+        tag = "th" if kind == "tableHeader" else "td"
+        return f"<{tag}>{inner}</{tag}>"
+    if kind in ("mention", "emoji", "status"):
+        text = attrs.get("text") or attrs.get("shortName") or ""
+        return f"<span>{html.escape(text)}</span>"
+    if kind == "date":
+        return f"<span>{html.escape(str(attrs.get('timestamp') or ''))}</span>"
+    if kind in ("inlineCard", "blockCard", "embedCard"):
+        url = attrs.get("url") or ""
+        return f'<a href="{html.escape(_href(url))}">{html.escape(url)}</a>'
+    if kind in ("mediaSingle", "mediaGroup"):
+        return f"<div>{inner}</div>"
+    if kind == "media":
+        name = attrs.get("alt") or ""
+        if name in images:
+            return f'<img src="{html.escape(images[name])}" alt="{html.escape(name)}">'
+        return f"<em>[anexo: {html.escape(name or str(attrs.get('id') or '?'))}]</em>"
+    return inner  # doc e tipos desconhecidos: só o conteúdo
+
+
+# ========= ADF -> Markdown =========
+
+def _marks_md(text: str, marks: list) -> str:
+    out = text
+    for mark in marks or []:
+        kind = mark.get("type")
+        if kind == "strong":
+            out = f"**{out}**"
+        elif kind == "em":
+            out = f"*{out}*"
+        elif kind == "code":
+            out = f"`{out}`"
+        elif kind == "strike":
+            out = f"~~{out}~~"
+        elif kind == "link":
+            out = f"[{out}]({_href((mark.get('attrs') or {}).get('href'))})"
+    return out
+
+
+def _md_inline(nodes, images: dict) -> str:
+    return "".join(adf_markdown(n, images) for n in nodes or [])
+
+
+def adf_markdown(node, images: dict, indent: str = "") -> str:
+    """Documento ADF -> Markdown (mesma cobertura do adf_html; tabelas viram tabela GFM)."""
+    if node is None:
+        return ""
+    if isinstance(node, str):
+        return node + "\n\n"
+    if isinstance(node, list):
+        return "".join(adf_markdown(n, images, indent) for n in node)
+
+    kind = node.get("type")
+    attrs = node.get("attrs") or {}
+    content = node.get("content") or []
+
+    if kind == "text":
+        return _marks_md(node.get("text", ""), node.get("marks"))
+    if kind == "hardBreak":
+        return "  \n" + indent
+    if kind == "paragraph":
+        return _md_inline(content, images) + "\n\n"
+    if kind == "heading":
+        return "#" * min(max(int(attrs.get("level") or 1), 1), 6) + " " + _md_inline(content, images) + "\n\n"
+    if kind in ("bulletList", "orderedList", "taskList"):
+        lines = []
+        for i, item in enumerate(content, start=int(attrs.get("order") or 1)):
+            bullet = f"{i}." if kind == "orderedList" else "-"
+            body = adf_markdown(item.get("content") or [], images, indent + "   ").strip()
+            lines.append(f"{indent}{bullet} {body}")
+        return "\n".join(lines) + "\n\n"
+    if kind == "codeBlock":
+        return f"```{attrs.get('language') or ''}\n" + "".join(n.get("text", "") for n in content) + "\n```\n\n"
+    if kind == "blockquote":
+        body = adf_markdown(content, images).strip()
+        return "\n".join("> " + line for line in body.splitlines()) + "\n\n"
+    if kind == "rule":
+        return "---\n\n"
+    if kind == "table":
+        rows = [
+            [adf_markdown(cell.get("content") or [], images).strip().replace("\n", " ").replace("|", "\\|")
+             for cell in row.get("content") or []]
+            for row in content
+        ]
+        if not rows:
+            return ""
+        width = max(len(r) for r in rows)
+        rows = [r + [""] * (width - len(r)) for r in rows]
+        lines = ["| " + " | ".join(rows[0]) + " |", "|" + " --- |" * width]
+        lines += ["| " + " | ".join(r) + " |" for r in rows[1:]]
+        return "\n".join(lines) + "\n\n"
+    if kind in ("mention", "emoji", "status"):
+        return attrs.get("text") or attrs.get("shortName") or ""
+    if kind == "date":
+        return str(attrs.get("timestamp") or "")
+    if kind in ("inlineCard", "blockCard", "embedCard"):
+        return f"<{attrs.get('url') or ''}>"
+    if kind == "media":
+        name = attrs.get("alt") or ""
+        if name in images:
+            return f"![{name}]({images[name]})\n\n"
+        return f"*[anexo: {name or attrs.get('id') or '?'}]*\n\n"
+    return adf_markdown(content, images, indent)
+
+
+# ========= página da issue =========
+
+def _name(value) -> str:
+    if isinstance(value, dict):
+        return value.get("displayName") or value.get("name") or value.get("value") or value.get("key") or ""
+    return "" if value is None else str(value)
+
+
+def issue_page(issue: dict, entry: dict, images: dict, fmt: str, board_link: str) -> str:
+    f = issue.get("fields") or {}
+    key = issue.get("key") or entry["key"]
+    meta = [
+        ("Tipo", _name(f.get("issuetype"))), ("Status", _name(f.get("status"))),
+        ("Prioridade", _name(f.get("priority"))), ("Responsável", _name(f.get("assignee"))),
+        ("Relator", _name(f.get("reporter"))), ("Pai", _name(f.get("parent"))),
+        ("Criada", _name(f.get("created"))), ("Atualizada", _name(f.get("updated"))),
+    ]
+    comments = (f.get("comment") or {}).get("comments") or []
+    # imagens do backup, no fim da página; o ADF referencia pelo nome original do anexo
+    gallery = list(images.items())
+    saved_as = {a["id"]: a["file"] for a in entry.get("attachments", [])}
+    images = dict(images)
+    for att in f.get("attachment") or []:
+        file = saved_as.get(str(att.get("id")))
+        if file in images and att.get("filename"):
+            images.setdefault(att["filename"], images[file])
+
+    if fmt == "md":
+        out = [f"[← board]({board_link})\n\n# {key}: {f.get('summary') or ''}\n\n"]
+        out += [f"- **{label}:** {value}\n" for label, value in meta if value]
+        out.append("\n## Descrição\n\n" + adf_markdown(f.get("description"), images))
+        if comments:
+            out.append(f"## Comentários ({len(comments)})\n\n")
+            for c in comments:
+                out.append(f"**{_name(c.get('author'))}** — {c.get('created') or ''}\n\n")
+                out.append(adf_markdown(c.get("body"), images))
+        if gallery:
+            out.append("## Imagens\n\n" + "".join(f"![{name}]({url})\n\n" for name, url in gallery))
+        return "".join(out)
+
+    rows = "".join(f"<tr><td>{label}</td><td>{html.escape(value)}</td></tr>" for label, value in meta if value)
+    out = [
+        f'<!doctype html><html lang="pt-br"><head><meta charset="utf-8"><title>{html.escape(key)}</title>',
+        f"<style>{CSS}</style></head><body>",
+        f'<p class="nav"><a href="{html.escape(board_link)}">← board</a></p>',
+        f"<h1>{html.escape(key)}: {html.escape(f.get('summary') or '')}</h1>",
+        f'<table class="meta">{rows}</table>',
+        "<h2>Descrição</h2>", adf_html(f.get("description"), images),
+    ]
+    if comments:
+        out.append(f"<h2>Comentários ({len(comments)})</h2>")
+        for c in comments:
+            out.append(f'<div class="comment"><p class="who"><strong>{html.escape(_name(c.get("author")))}</strong> '
+                       f'— {html.escape(c.get("created") or "")}</p>{adf_html(c.get("body"), images)}</div>')
+    if gallery:
+        out.append("<h2>Imagens</h2>")
+        out += [f'<p><img src="{html.escape(url)}" alt="{html.escape(name)}"></p>' for name, url in gallery]
+    out.append("</body></html>")
+    return "".join(out)
+
+
+def write_atomic(path: pathlib.Path, text: str):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as fp:
+        fp.write(text)
+    os.replace(tmp, path)
+
+
+def render_issue(task: dict):
+    """Roda no pool de processos: lê o JSON da issue, renderiza e grava a página. Retorna o erro ou None."""
+    try:
+        if task["source"] == "ndjson":
+            issue = read_issue(pathlib.Path(task["board_dir"]), task["key"], {task["key"]: task["packed"]})
+        else:
+            with open(task["json_path"], "r", encoding="utf-8") as fp:
+                issue = json.load(fp)
+        text = issue_page(issue, task["entry"], task["images"], task["format"], task["board_link"])
+        write_atomic(pathlib.Path(task["out_path"]), text)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        return f"{e.__class__.__name__}: {e}"
+    return None
+
+
+# ========= índice dos boards =========
+
+def url_path(target: pathlib.Path, start: pathlib.Path) -> str:
+    """Caminho relativo como URL (nomes de board têm espaço e acento)."""
+    return quote(pathlib.PurePath(os.path.relpath(target, start)).as_posix())
+
+
+def page_name(n: int, fmt: str) -> str:
+    return f"index.{fmt}" if n == 1 else f"page-{n}.{fmt}"
+
+
+def board_pages(board: dict, site_board: pathlib.Path, fmt: str, page_size: int) -> list[str]:
+    """Páginas do índice do board (ordem do index.json). Retorna os nomes gravados."""
+    issues = board.get("issues", [])
+    total_pages = max(1, -(-len(issues) // page_size))
+    names = []
+    for n in range(1, total_pages + 1):
+        chunk = issues[(n - 1) * page_size:n * page_size]
+        links = [(page_name(i, fmt), i) for i in range(1, total_pages + 1)]
+        if fmt == "md":
+            out = [f"[← boards](../index.md)\n\n# {board['board']}\n\n",
+                   f"{len(issues)} issues · página {n} de {total_pages}\n\n",
+                   "| Key | Resumo | Tipo | Status | Atualizada | Imagens |\n|---|---|---|---|---|---|\n"]
+            for e in chunk:
+                summary = (e.get("summary") or "").replace("|", "\\|")
+                out.append(f"| [{e['key']}]({quote(e['key'])}.md) | {summary} | {e.get('issuetype') or ''} | "
+                           f"{e.get('status') or ''} | {e.get('updated') or ''} | {e.get('images_downloaded', 0)} |\n")
+            if total_pages > 1:
+                out.append("\n" + " ".join(f"[{i}]({name})" if i != n else f"**{i}**" for name, i in links) + "\n")
+        else:
+            out = [f'<!doctype html><html lang="pt-br"><head><meta charset="utf-8"><title>{html.escape(board["board"])}</title>',
+                   f"<style>{CSS}</style></head><body>",
+                   '<p class="nav"><a href="../index.html">← boards</a></p>',
+                   f"<h1>{html.escape(board['board'])}</h1>",
+                   f"<p>{len(issues)} issues · página {n} de {total_pages}</p>",
+                   "<table><tr><th>Key</th><th>Resumo</th><th>Tipo</th><th>Status</th><th>Atualizada</th><th>Imagens</th></tr>"]
+            for e in chunk:
+                out.append(f'<tr><td><a href="{quote(e["key"])}.html">{html.escape(e["key"])}</a></td>'
+                           f"<td>{html.escape(e.get('summary') or '')}</td><td>{html.escape(e.get('issuetype') or '')}</td>"
+                           f"<td>{html.escape(e.get('status') or '')}</td><td>{html.escape(e.get('updated') or '')}</td>"
+                           f"<td>{e.get('images_downloaded', 0)}</td></tr>")
+            out.append("</table>")
+            if total_pages > 1:
+                out.append('<p class="nav">' + "".join(
+                    f'<a href="{name}">{i}</a>' if i != n else f"<strong>{i}</strong> " for name, i in links) + "</p>")
+            out.append("</body></html>")
+        name = page_name(n, fmt)
+        write_atomic(site_board / name, "".join(out))
+        names.append(name)
+    return names
+
+
+def site_index(site_dir: pathlib.Path, boards: list[tuple[str, str, int]], fmt: str):
+    if fmt == "md":
+        text = "# Backup do Jira\n\n" + "".join(
+            f"- [{name}]({quote(folder)}/index.md) ({total} issues)\n" for name, folder, total in boards)
+    else:
+        text = (f'<!doctype html><html lang="pt-br"><head><meta charset="utf-8"><title>Backup do Jira</title>'
+                f"<style>{CSS}</style></head><body><h1>Backup do Jira</h1><ul>" + "".join(
+                    f'<li><a href="{quote(folder)}/index.html">{html.escape(name)}</a> ({total} issues)</li>'
+                    for name, folder, total in boards) + "</ul></body></html>")
+    write_atomic(site_dir / f"index.{fmt}", text)
+
+
+# ========= execução =========
+
+def fingerprint(source_stat: str, entry: dict) -> str:
+    """Versão do JSON da issue + entrada do index.json (imagens baixadas depois mudam a página)."""
+    data = f"{RENDER_VERSION}|{source_stat}|{json.dumps(entry, sort_keys=True, ensure_ascii=False)}"
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+def load_state(path: pathlib.Path, fmt: str) -> dict:
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as fp:
+            state = json.load(fp)
+        if state.get("version") == RENDER_VERSION and state.get("format") == fmt:
+            return state
+    return {"version": RENDER_VERSION, "format": fmt, "issues": {}}
+
+
+def plan_board(out_dir: pathlib.Path, board_dir: pathlib.Path, site_dir: pathlib.Path, board: dict,
+               state: dict, fmt: str, force: bool) -> tuple[list[dict], set]:
+    """(tarefas das issues que mudaram, chaves de estado do board)."""
+    site_board = site_dir / board_dir.name
+    packed = load_index(board_dir / "issues.idx.ndjson") if (board_dir / "issues.idx.ndjson").exists() else None
+    tasks, seen = [], set()
+    for entry in board.get("issues", []):
+        key = entry["key"]
+        if packed is not None:
+            if key not in packed:
+                continue
+            p = packed[key]
+            source_stat = f"{p['seg']}:{p['off']}:{p['len']}"
+        else:
+            json_path = out_dir / entry["folder"] / "issue_raw.json"
+            try:
+                st = json_path.stat()
+            except FileNotFoundError:
+                continue
+            source_stat = f"{st.st_mtime_ns}:{st.st_size}"
+
+        state_key = f"{board_dir.name}/{key}"
+        seen.add(state_key)
+        fp = fingerprint(source_stat, entry)
+        out_path = site_board / f"{key}.{fmt}"
+        if not force and state["issues"].get(state_key) == fp and out_path.exists():
+            continue
+
+        images = {}
+        for att in entry.get("attachments", []):
+            image = out_dir / entry["folder"] / "imagens" / att["file"]
+            if image.exists():
+                images[att["file"]] = url_path(image, site_board)
+        tasks.append({
+            "key": key,
+            "state_key": state_key,
+            "fingerprint": fp,
+            "source": "ndjson" if packed is not None else "folders",
+            "board_dir": str(board_dir),
+            "packed": packed[key] if packed is not None else None,
+            "json_path": str(out_dir / entry["folder"] / "issue_raw.json"),
+            "entry": entry,
+            "images": images,
+            "format": fmt,
+            "board_link": page_name(1, fmt),
+            "out_path": str(out_path),
+        })
+    return tasks, seen
+
+
+def render_site(out_dir: pathlib.Path = OUT_DIR, fmt: str = "html", workers: int = RENDER_WORKERS,
+                page_size: int = PAGE_SIZE, force: bool = False) -> dict:
+    """Renderiza (incremental) o backup em out_dir/_site. Retorna contagens."""
+    site_dir = out_dir / SITE_DIR_NAME
+    site_dir.mkdir(parents=True, exist_ok=True)
+    state_file = site_dir / f"render_state.{fmt}.json"  # 1 por formato: alternar não refaz tudo
+    state = load_state(state_file, fmt)
+
+    boards, tasks, seen = [], [], set()
+    for index_file in sorted(out_dir.glob("*/index.json")):
+        board_dir = index_file.parent
+        if board_dir.name.startswith("_"):
+            continue
+        with open(index_file, "r", encoding="utf-8") as fp:
+            board = json.load(fp)
+        (site_dir / board_dir.name).mkdir(exist_ok=True)
+        board_tasks, board_seen = plan_board(out_dir, board_dir, site_dir, board, state, fmt, force)
+        tasks += board_tasks
+        seen |= board_seen
+        pages = board_pages(board, site_dir / board_dir.name, fmt, page_size)
+        for old in (site_dir / board_dir.name).glob(f"page-*.{fmt}"):
+            if old.name not in pages:
+                old.unlink()  # board encolheu (ou page_size mudou)
+        boards.append((board["board"], board_dir.name, len(board.get("issues", []))))
+    site_index(site_dir, boards, fmt)
+
+    # issues que saíram dos boards: some a página
+    removed = [k for k in state["issues"] if k not in seen]
+    for state_key in removed:
+        (site_dir / f"{state_key}.{fmt}").unlink(missing_ok=True)
+        del state["issues"][state_key]
+
+    print(f"{len(boards)} boards, {len(seen)} issues: {len(tasks)} pra renderizar, "
+          f"{len(seen) - len(tasks)} sem mudança, {len(removed)} removidas")
+    failed = 0
+    try:
+        if tasks:
+            with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+                for task, error in zip(tasks, pool.map(render_issue, tasks, chunksize=32)):
+                    if error:
+                        failed += 1
+                        print(f"  Falha renderizando {task['key']}: {error}")
+                    else:
+                        state["issues"][task["state_key"]] = task["fingerprint"]
+    finally:
+        # estado gravado mesmo se cair no meio: o que já saiu não é refeito
+        write_atomic(state_file, json.dumps(state, ensure_ascii=False))
+
+    print(f"Site em: {(site_dir / f'index.{fmt}').resolve()}")
+    return {"boards": len(boards), "issues": len(seen), "rendered": len(tasks) - failed,
+            "failed": failed, "removed": len(removed)}
+
+
+if __name__ == "__main__":
+    # uso: python render.py                 (HTML incremental em jira_backup/_site)
+    #      python render.py --format md --force
+    parser = argparse.ArgumentParser(description="Gera um site estático navegável a partir do backup")
+    parser.add_argument("--dir", type=pathlib.Path, default=OUT_DIR, help="pasta do backup")
+    parser.add_argument("--format", choices=["html", "md"], default="html")
+    parser.add_argument("--workers", type=int, default=RENDER_WORKERS, help="processos renderizando em paralelo")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE, help="issues por página do índice do board")
+    parser.add_argument("--force", action="store_true", help="renderiza tudo de novo")
+    args = parser.parse_args()
+
+    result = render_site(args.dir, fmt=args.format, workers=args.workers, page_size=args.page_size, force=args.force)
+    if result["failed"]:
+        sys.exit(1)
@@ -0,0 +1,297 @@
+import os
+import sys
+import json
+import pathlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))  # JIRA/ -> pacote common
+from common.config import exit_on_config_error, jira_auth, require_env
+from common.jira_client import JiraClient
+from common.metrics import METRICS
+from blobstore import BlobStore, file_sha256
+
+# Confere o backup contra os manifestos (index.json de cada board + _blobs/attachments.json):
+#   stat (padrão)  existência e tamanho de blobs e links, sem ler conteúdo
+#   --deep         + SHA-256 de cada blob (pool de processos)
+#   --refetch      baixa de novo só os anexos que falharam e refaz os links
+#   --prune        apaga blobs/imagens órfãos
+
+OUT_DIR = pathlib.Path("jira_backup")
+HASH_WORKERS = int(os.getenv("JIRA_VERIFY_WORKERS", str(os.cpu_count() or 4)))
+DOWNLOAD_WORKERS = int(os.getenv("JIRA_DOWNLOAD_WORKERS", "8"))
+
+# falhas que só se resolvem baixando de novo (o resto é só refazer o link)
+REFETCH_REASONS = {"not_in_store", "blob_missing", "size", "hash", "changed"}
+
+
+def board_dirs(out_dir: pathlib.Path) -> list[pathlib.Path]:
+    return sorted(p.parent for p in out_dir.glob("*/index.json") if not p.parent.name.startswith("_"))
+
+
+def expected_attachments(out_dir: pathlib.Path):
+    """
+    { id do anexo: {"record": registro do index.json, "paths": [cópias nas pastas das issues], "keys": [...]} }
+    e as pastas das issues que ainda não têm a lista de anexos no index.json (backup antigo).
+    """
+    expected, legacy = {}, []
+    for board_dir in board_dirs(out_dir):
+        with open(board_dir / "index.json", "r", encoding="utf-8") as fp:
+            index = json.load(fp)
+        for entry in index.get("issues", []):
+            if "attachments" not in entry:
+                legacy.append(out_dir / entry["folder"])
+                continue
+            for att in entry["attachments"]:
+                item = expected.setdefault(att["id"], {"record": att, "paths": [], "keys": []})
+                item["paths"].append(out_dir / entry["folder"] / "imagens" / att["file"])
+                item["keys"].append(entry["key"])
+    return expected, legacy
+
+
+def same_file(a: pathlib.Path, b: pathlib.Path) -> bool:
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+
+def check(out_dir: pathlib.Path, blobs: BlobStore, deep: bool = False, workers: int = HASH_WORKERS) -> dict:
+    expected, legacy = expected_attachments(out_dir)
+    failures = {}  # id -> [motivos]
+    to_hash = {}   # caminho -> sha256 esperado (blobs e cópias que não são hardlink)
+
+    def fail(att_id, reason):
+        failures.setdefault(att_id, []).append(reason)
+
+    for att_id, item in expected.items():
+        record = item["record"]
+        meta = blobs.by_id.get(att_id)
+        if not meta:
+            fail(att_id, "not_in_store")
+            continue
+        blob = blobs.blob_path(meta["sha256"])
+        if not blob.exists():
+            fail(att_id, "blob_missing")
+            continue
+        size = blob.stat().st_size
+        if record.get("size") is not None and size != record["size"]:
+            fail(att_id, "size")
+            continue
+        # anexo diferente do que o index.json registrou (Jira devolveu outro conteúdo/versão)
+        if (record.get("sha256") and record["sha256"] != meta["sha256"]) or \
+                (record.get("created") and meta.get("created") and record["created"] != meta["created"]):
+            fail(att_id, "changed")
+            continue
+        if deep:
+            to_hash[blob] = meta["sha256"]
+
+        for path in item["paths"]:
+            if not path.exists():
+                fail(att_id, "link_missing")
+            elif not same_file(blob, path):
+                # cópia (FS sem hardlink) ou arquivo trocado
+                if path.stat().st_size != size:
+                    fail(att_id, "link_size")
+                elif deep:
+                    to_hash[path] = meta["sha256"]
+
+    if to_hash:
+        print(f"Calculando SHA-256 de {len(to_hash)} arquivos ({workers} processos)...")
+        paths = list(to_hash)
+        owners = {}
+        for att_id, item in expected.items():
+            meta = blobs.by_id.get(att_id)
+            if meta:
+                owners.setdefault(blobs.blob_path(meta["sha256"]), []).append(att_id)
+            for path in item["paths"]:
+                owners.setdefault(path, []).append(att_id)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for path, digest in zip(paths, pool.map(file_sha256, paths, chunksize=16)):
+                if digest != to_hash[path]:
+                    reason = "hash" if path.parent.parent.name == "sha256" else "link_hash"
+                    for att_id in owners.get(path, []):
+                        fail(att_id, reason)
+
+    return {
+        "attachments": len(expected),
+        "legacy_entries": len(legacy),
+        "failures": {att_id: sorted(set(reasons)) for att_id, reasons in failures.items()},
+        "orphans": find_orphans(out_dir, blobs, expected, legacy),
+        "expected": expected,
+    }
+
+
+def find_orphans(out_dir: pathlib.Path, blobs: BlobStore, expected: dict, legacy: list = ()) -> dict:
+    """
+    Blobs sem anexo no manifesto, imagens que nenhuma issue referencia e .part esquecidos.
+    Imagens das issues `legacy` (sem lista de anexos no index.json) nunca contam como órfãs:
+    não há como saber quais são delas, e o --prune apagaria anexos válidos.
+    """
+    known_shas = {meta["sha256"] for meta in blobs.by_id.values()}
+    blob_files = [p for p in (blobs.root / "sha256").glob("*/*") if p.is_file()]
+    expected_paths = {path for item in expected.values() for path in item["paths"]}
+    legacy = set(legacy)
+    images = [p for d in board_dirs(out_dir) for p in d.glob("*/imagens/*") if p.is_file()]
+    return {
+        "blobs": [str(p) for p in blob_files if p.name not in known_shas],
+        "images": [str(p) for p in images if p not in expected_paths and p.parent.parent not in legacy],
+        "parts": [str(p) for p in blobs.tmp_dir.glob("*.part")],
+    }
+
+
+def refetch(client: JiraClient, blobs: BlobStore, report: dict, workers: int = DOWNLOAD_WORKERS) -> dict:
+    """Baixa de novo só o que falhou; falha só de link é refeita a partir do blob. Retorna {id: ok}."""
+    expected = report["expected"]
+
+    # blob corrompido sai do store antes do pool (senão put() acharia que o conteúdo já existe);
+    # 1x por sha256: anexos com o mesmo conteúdo dividem o blob e não podem apagar o que outro já rebaixou
+    corrupt = {
+        blobs.by_id[att_id]["sha256"] for att_id, reasons in report["failures"].items()
+        if {"hash", "size"} & set(reasons) and att_id in blobs.by_id
+    }
+    for sha256 in corrupt:
+        blobs.blob_path(sha256).unlink(missing_ok=True)
+
+    def fix(att_id: str) -> bool:
+        item, reasons = expected[att_id], report["failures"][att_id]
+        record = item["record"]
+        if REFETCH_REASONS & set(reasons):
+            meta = blobs.by_id.get(att_id) or {}
+            tmp = blobs.temp_path(att_id)
+            sha256 = client.download(f"/rest/api/3/attachment/content/{att_id}", tmp, resume=False)
+            if not sha256:
+                return False
+            if record.get("size") is not None and tmp.stat().st_size != record["size"]:
+                print(f"  {att_id}: Jira continua devolvendo {tmp.stat().st_size} bytes (esperado {record['size']})")
+                tmp.unlink(missing_ok=True)
+                return False
+            blob = blobs.put(att_id, tmp, sha256, {
+                "filename": meta.get("filename", record["file"]),
+                "mimeType": meta.get("mimeType"),
+                "jira_size": record.get("size"),
+                "created": record.get("created"),
+            })
+            record["sha256"] = sha256
+        else:
+            blob = blobs.get(att_id)
+            if blob is None:
+                return False
+        for path in item["paths"]:
+            blobs.link(blob, path)
+        return True
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="refetch") as pool:
+        results = dict(zip(report["failures"], pool.map(fix, report["failures"])))
+    blobs.save()
+    return results
+
+
+def update_indexes(out_dir: pathlib.Path, expected: dict):
+    """Grava nos index.json o sha256 dos anexos baixados de novo."""
+    for board_dir in board_dirs(out_dir):
+        path = board_dir / "index.json"
+        with open(path, "r", encoding="utf-8") as fp:
+            index = json.load(fp)
+        changed = False
+        for entry in index.get("issues", []):
+            for att in entry.get("attachments", []):
+                item = expected.get(att["id"])
+                if item and item["record"].get("sha256") != att.get("sha256"):
+                    att["sha256"] = item["record"]["sha256"]
+                    changed = True
+        if changed:
+            tmp = path.with_name(path.name + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as fp:
+                json.dump(index, fp, ensure_ascii=False, indent=2)
+                fp.flush()
+                os.fsync(fp.fileno())
+            os.replace(tmp, path)
+
+
+def prune(orphans: dict):
+    for kind in ("blobs", "images", "parts"):
+        for path in orphans[kind]:
+            pathlib.Path(path).unlink(missing_ok=True)
+        if orphans[kind]:
+            print(f"  removidos {len(orphans[kind])} {kind} órfãos")
+
+
+def print_report(report: dict):
+    failures = report["failures"]
+    by_reason = {}
+    for reasons in failures.values():
+        for reason in reasons:
+            by_reason[reason] = by_reason.get(reason, 0) + 1
+    print(f"\n{report['attachments']} anexos conferidos, {len(failures)} com problema")
+    for reason, n in sorted(by_reason.items()):
+        print(f"  {reason}: {n}")
+    for att_id, reasons in list(failures.items())[:20]:
+        item = report["expected"][att_id]
+        print(f"  - {att_id} ({', '.join(item['keys'][:3])}): {', '.join(reasons)}")
+    if len(failures) > 20:
+        print(f"  ... e mais {len(failures) - 20}")
+    orphans = report["orphans"]
+    print(f"Órfãos: {len(orphans['blobs'])} blobs, {len(orphans['images'])} imagens, {len(orphans['parts'])} .part")
+    if report["legacy_entries"]:
+        print(f"{report['legacy_entries']} issues sem lista de anexos no index.json (backup antigo): "
+              f"rode um backup completo pra incluí-las")
+
+
+def verify_backup(out_dir: pathlib.Path = OUT_DIR, deep: bool = False, workers: int = HASH_WORKERS,
+                  refetch_failed: bool = False, prune_orphans: bool = False) -> dict:
+    """
+    Confere o backup e grava <out_dir>/verify_report.json. Com refetch_failed, baixa de novo
+    o que falhou (credenciais do Jira só são exigidas se houver o que baixar).
+    Retorna o relatório; "unresolved" = anexos que continuam com problema.
+    """
+    blobs = BlobStore(out_dir / "_blobs")
+    report = check(out_dir, blobs, deep=deep, workers=workers)
+    print_report(report)
+    unresolved = list(report["failures"])
+
+    if refetch_failed and report["failures"]:
+        jira_base, = require_env("JIRA_BASE")
+        client = JiraClient(
+            jira_base, **jira_auth(),
+            rate=float(os.getenv("JIRA_RATE_PER_SEC", "10")), pool_size=DOWNLOAD_WORKERS + 2,
+        )
+        print(f"\nRebaixando/relinkando {len(report['failures'])} anexos...")
+        try:
+            results = refetch(client, blobs, report)
+        finally:
+            client.close()
+        update_indexes(out_dir, report["expected"])
+        unresolved = [att_id for att_id, ok in results.items() if not ok]
+        print(f"Corrigidos: {len(results) - len(unresolved)}; ainda com problema: {len(unresolved)}")
+
+    if prune_orphans:
+        prune(report["orphans"])
+
+    report = {k: v for k, v in report.items() if k != "expected"}
+    report["unresolved"] = unresolved
+    with open(out_dir / "verify_report.json", "w", encoding="utf-8") as fp:
+        json.dump(report, fp, ensure_ascii=False, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    # uso: python verify.py                 (stat: tamanho e links)
+    #      python verify.py --deep          (+ SHA-256 em paralelo)
+    #      python verify.py --deep --refetch --prune
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Confere a integridade do backup (anexos x manifestos)")
+    parser.add_argument("--dir", type=pathlib.Path, default=OUT_DIR, help="pasta do backup")
+    parser.add_argument("--deep", action="store_true", help="recalcula o SHA-256 de todos os arquivos")
+    parser.add_argument("--workers", type=int, default=HASH_WORKERS, help="processos pro hash")
+    parser.add_argument("--refetch", action="store_true", help="baixa de novo só os anexos com problema")
+    parser.add_argument("--prune", action="store_true", help="apaga blobs/imagens órfãos e .part esquecidos")
+    args = parser.parse_args()
+
+    with exit_on_config_error(), METRICS.run("verify"):
+        result = verify_backup(args.dir, deep=args.deep, workers=args.workers,
+                               refetch_failed=args.refetch, prune_orphans=args.prune)
+    if result["unresolved"]:
+        sys.exit(1)
@@ -1,22 +1,41 @@
-import os
-import requests
-from dotenv import load_dotenv
-
-load_dotenv()
-
-CLIENT_ID = os.getenv("SLACK_CLIENT_ID")
-CLIENT_SECRET = os.getenv("SLACK_CLIENT_SECRET")
-CODE = os.getenv("SLACK_OAUTH_CODE")
-REDIRECT_URI = os.getenv("SLACK_REDIRECT_URI", "https://localhost:8123/callback")
-
-resp = requests.post(
-    "https://slack.com/api/oauth.v2.access",
-    data={
-        "client_id": CLIENT_ID,
-        "client_secret": CLIENT_SECRET,
-        "code": CODE,
-        "redirect_uri": REDIRECT_URI
-    }
-)
-
-print(resp.json())
+import os
+import sys
+import pathlib
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))  # JIRA/ -> pacote common
+from common.config import exit_on_config_error, require_env
+from common.slack_tokens import TokenManager
+
+REDIRECT_URI = "https://localhost:8123/callback"
+
+
+def mask(token) -> str:
+    return f"{token[:10]}…" if token else "-"
+
+
+def exchange_code(code: str = None, redirect_uri: str = None) -> dict:
+    """
+    Troca o code do OAuth pelos tokens e grava no arquivo compartilhado do TokenManager;
+    a partir daí slack.py / archive_channel.py / Bankeiro renovam sozinhos antes de expirar.
+    Sem argumentos usa SLACK_OAUTH_CODE / SLACK_REDIRECT_URI do ambiente.
+    """
+    client_id, client_secret = require_env("SLACK_CLIENT_ID", "SLACK_CLIENT_SECRET")
+    code = code or require_env("SLACK_OAUTH_CODE")[0]
+    redirect_uri = redirect_uri or os.getenv("SLACK_REDIRECT_URI", REDIRECT_URI)
+
+    manager = TokenManager(client_id=client_id, client_secret=client_secret)
+    resp = manager.exchange_code(code, redirect_uri)
+
+    user = resp.get("authed_user") or {}
+    print(f"Team: {(resp.get('team') or {}).get('name')}")
+    print(f"Bot token:  {mask(resp.get('access_token'))} (expires_in={resp.get('expires_in')})")
+    print(f"User token: {mask(user.get('access_token'))} (expires_in={user.get('expires_in')})")
+    print(f"Saved to {manager.path}")
+    return resp
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    with exit_on_config_error():
+        exchange_code()
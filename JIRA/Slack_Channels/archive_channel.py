@@ -1,55 +1,106 @@
-import os
-import requests
-from dotenv import load_dotenv
-
-load_dotenv()
-TOKEN = os.getenv("SLACK_BOT_TOKEN")  
-
-def find_channel_id_by_name(name, token):
-    url = "https://slack.com/api/conversations.list"
-    headers = {
-    "Authorization": f"Bearer {token}",
-    "Content-Type": "application/json; charset=utf-8"
-    }
-    params = {
-        "exclude_archived": True,
-        "limit": 1000,          # adjust if needed
-        "types": "private_channel"
-    }
-
-    while True:
-        resp = requests.get(url, headers=headers, params=params)
-        data = resp.json()
-        if not data.get("ok"):
-            print("Error listing channels:", data.get("error"))
-            return None
-
-        for ch in data.get("channels", []):
-            if ch.get("name") == name:
-                return ch["id"]
-
-        cursor = data.get("response_metadata", {}).get("next_cursor")
-        if not cursor:
-            break
-        params["cursor"] = cursor
-
-    return None
-
-def archive_channel(channel_id, token):
-    url = "https://slack.com/api/conversations.archive"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-    payload = {"channel": channel_id}
-    resp = requests.post(url, headers=headers, json=payload)
-    print("Archive response:", resp.json())
-
-if __name__ == "__main__":
-    channel_name = "teste-enzo"
-    cid = find_channel_id_by_name(channel_name, TOKEN)
-    if not cid:
-        print("Channel not found")
-    else:
-        print("Channel ID:", cid)
-        archive_channel(cid, TOKEN)
+import os
+import sys
+import pathlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))  # JIRA/ -> pacote common
+from common.config import exit_on_config_error
+from common.metrics import METRICS
+from common.slack_client import SlackClient
+from common.slack_tokens import slack_token
+from channel_directory import ChannelDirectory
+
+if __name__ == "__main__":
+    load_dotenv()  # o CLI apmo carrega o .env antes de importar o módulo
+
+# archive/unarchive são Tier 2: o limiter do client segura o ritmo, isso só sobrepõe a latência
+ARCHIVE_WORKERS = int(os.getenv("SLACK_ARCHIVE_WORKERS", "4"))
+
+
+def find_channel_id_by_name(name, directory: ChannelDirectory):
+    # busca no diretório local (1 varredura de conversations.list por TTL, não por busca)
+    directory.ensure_fresh()
+    ch = directory.by_name(name)
+    return ch["id"] if ch else None
+
+
+def archive_channel(channel_id, client: SlackClient, directory: ChannelDirectory = None, archive: bool = True):
+    method = "conversations.archive" if archive else "conversations.unarchive"
+    data = client.call(method, channel=channel_id)
+    if directory is not None:
+        if data.get("ok") or data.get("error") in ("already_archived", "not_archived"):
+            directory.update({"id": channel_id}, is_archived=archive)
+        else:
+            # channel_not_found, sem permissão...: o índice pode estar velho, relê o canal
+            directory.refresh_channel(channel_id)
+    print(f"{'Archive' if archive else 'Unarchive'} {channel_id}:", data.get("error") or "ok")
+    return data
+
+
+def bulk_archive(patterns: list[str], client: SlackClient, directory: ChannelDirectory,
+                 archive: bool = True, regex: bool = False, apply: bool = False, workers: int = ARCHIVE_WORKERS):
+    """
+    Arquiva (ou desarquiva) todos os canais cujo nome bate com os padrões.
+    Sem apply=True só lista o que seria feito.
+    """
+    directory.ensure_fresh()
+    targets = [ch for ch in directory.match(patterns, regex=regex) if ch["is_archived"] != archive]
+
+    action = "archive" if archive else "unarchive"
+    for ch in targets:
+        print(f"  {action}: {ch['name']} ({ch['id']}, {ch.get('num_members') or '?'} members)")
+    print(f"\n{len(targets)} channels to {action}")
+
+    if not apply or not targets:
+        if targets:
+            print("Dry run: nothing changed (use --apply).")
+        return
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="archive") as pool:
+            list(pool.map(lambda ch: archive_channel(ch["id"], client, directory, archive), targets))
+    finally:
+        directory.save()
+
+
+def run(command: str, patterns: list[str], regex: bool = False, apply: bool = False,
+        refresh: bool = False, workers: int = ARCHIVE_WORKERS):
+    """archive / unarchive / list dos canais que batem com os padrões (bot token)."""
+    client = SlackClient(slack_token("bot"), pool_size=workers)
+    try:
+        directory = ChannelDirectory(client)
+        if refresh:
+            directory.refresh()
+
+        if command == "list":
+            directory.ensure_fresh()
+            for ch in directory.match(patterns, regex=regex):
+                state = "archived" if ch["is_archived"] else "active"
+                print(f"{ch['id']}  {ch['name']}  [{state}] {ch.get('num_members') or '?'} members")
+        else:
+            bulk_archive(
+                patterns, client, directory,
+                archive=command == "archive", regex=regex, apply=apply, workers=workers,
+            )
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    # uso: python archive_channel.py archive 'bkr_development_*' [--apply]
+    #      python archive_channel.py unarchive '^bkr_development_.*-gestão$' --regex --apply
+    #      python archive_channel.py list 'bkr_*'
+    parser = argparse.ArgumentParser(description="Arquiva/desarquiva canais do Slack por padrão de nome")
+    parser.add_argument("command", choices=["archive", "unarchive", "list"])
+    parser.add_argument("patterns", nargs="+", help="globs (bkr_development_*) ou regex com --regex")
+    parser.add_argument("--regex", action="store_true", help="padrões são expressões regulares")
+    parser.add_argument("--apply", action="store_true", help="executa (senão é dry run)")
+    parser.add_argument("--refresh", action="store_true", help="força nova varredura do diretório de canais")
+    parser.add_argument("--workers", type=int, default=ARCHIVE_WORKERS)
+    args = parser.parse_args()
+
+    with exit_on_config_error(), METRICS.run("archive_channel"):
+        run(args.command, args.patterns, regex=args.regex, apply=args.apply, refresh=args.refresh, workers=args.workers)
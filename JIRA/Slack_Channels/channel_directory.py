@@ -0,0 +1,144 @@
+import os
+import re
+import json
+import time
+import fnmatch
+import pathlib
+import threading
+
+from common.config import ConfigError
+from common.slack_client import SlackClient
+
+DIRECTORY_FILE = pathlib.Path(os.getenv(
+    "SLACK_CHANNEL_DIRECTORY_FILE", pathlib.Path(__file__).with_name("channel_directory.json")
+))
+DIRECTORY_TTL = int(os.getenv("SLACK_CHANNEL_DIRECTORY_TTL", str(6 * 3600)))  # segundos
+
+
+def normalize_channel_name(name: str) -> str:
+    # o Slack grava o nome em minúsculas e sem espaços
+    return name.strip().lower().replace(" ", "-")
+
+
+def compile_pattern(pattern: str) -> re.Pattern:
+    """Regex de nome de canal vinda da linha de comando: erro vira mensagem de 1 linha (exit_on_config_error)."""
+    try:
+        return re.compile(pattern)
+    except re.error as e:
+        raise ConfigError(f"Invalid --regex pattern '{pattern}': {e}") from None
+
+
+class ChannelDirectory:
+    """
+    Índice local dos canais do workspace (id -> nome, arquivado, nº de membros),
+    montado com UMA varredura paginada de conversations.list e salvo em disco
+    (DIRECTORY_FILE). Depois disso:
+    - dentro do TTL, as buscas são só em memória
+    - create/archive/unarchive feitos pelas ferramentas atualizam o índice na hora
+    - archive/unarchive que falha relê só aquele canal com conversations.info
+      (refresh_channel; canal que sumiu sai do índice)
+    - passou do TTL: nova varredura completa
+    """
+
+    def __init__(self, client: SlackClient, path: pathlib.Path = DIRECTORY_FILE, ttl: int = DIRECTORY_TTL):
+        self.client = client
+        self.path = path
+        self.ttl = ttl
+        self.channels = {}
+        self.fetched_at = 0.0
+        self.lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as fp:
+                data = json.load(fp)
+        except ValueError:
+            return  # arquivo corrompido: refaz na próxima ensure_fresh()
+        self.channels = data.get("channels", {})
+        self.fetched_at = data.get("fetched_at", 0.0)
+
+    def save(self):
+        with self.lock:
+            data = {"fetched_at": self.fetched_at, "channels": self.channels}
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as fp:
+                json.dump(data, fp, ensure_ascii=False)
+                fp.flush()
+                os.fsync(fp.fileno())
+            os.replace(tmp, self.path)
+
+    @staticmethod
+    def _entry(ch: dict) -> dict:
+        return {
+            "id": ch["id"],
+            "name": ch["name"],
+            "is_archived": bool(ch.get("is_archived")),
+            "is_private": bool(ch.get("is_private")),
+            "num_members": ch.get("num_members"),
+        }
+
+    def refresh(self):
+        """Varredura completa (públicos + privados, inclusive arquivados)."""
+        started = time.time()
+        channels = {}
+        for ch in self.client.paginate(
+            "conversations.list", "channels", limit=1000,
+            types="public_channel,private_channel", exclude_archived=False,
+        ):
+            channels[ch["id"]] = self._entry(ch)
+        with self.lock:
+            self.channels = channels
+            self.fetched_at = started
+        self.save()
+        print(f"Channel directory refreshed: {len(channels)} channels")
+
+    def ensure_fresh(self):
+        if not self.channels or time.time() - self.fetched_at > self.ttl:
+            self.refresh()
+
+    def refresh_channel(self, channel_id: str):
+        """Relê um canal só (conversations.info) quando o índice pode estar desatualizado."""
+        data = self.client.get("conversations.info", channel=channel_id)
+        if data.get("ok"):
+            self.update(data["channel"])
+        elif data.get("error") == "channel_not_found":
+            self.remove(channel_id)
+
+    def update(self, ch: dict, **changes):
+        """Atualiza (ou inclui) um canal no índice após uma operação feita por nós."""
+        with self.lock:
+            entry = self._entry({**self.channels.get(ch["id"], {}), **ch})
+            entry.update(changes)
+            self.channels[ch["id"]] = entry
+
+    def remove(self, channel_id: str):
+        with self.lock:
+            self.channels.pop(channel_id, None)
+
+    # ========= consultas (em memória) =========
+
+    def by_name(self, name: str):
+        wanted = normalize_channel_name(name)
+        for ch in self.channels.values():
+            if normalize_channel_name(ch["name"]) == wanted:
+                return ch
+        return None
+
+    def names(self) -> dict:
+        """{ nome normalizado: canal }"""
+        return {normalize_channel_name(ch["name"]): ch for ch in self.channels.values()}
+
+    def match(self, patterns: list[str], regex: bool = False) -> list[dict]:
+        """Canais cujo nome bate com algum padrão (glob como `bkr_development_*`, ou regex)."""
+        if regex:
+            compiled = [compile_pattern(p) for p in patterns]
+            hit = lambda name: any(c.fullmatch(name) for c in compiled)
+        else:
+            hit = lambda name: any(fnmatch.fnmatchcase(name, normalize_channel_name(p)) for p in patterns)
+        return sorted(
+            (ch for ch in self.channels.values() if hit(normalize_channel_name(ch["name"]))),
+            key=lambda ch: ch["name"],
+        )
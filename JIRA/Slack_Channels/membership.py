@@ -0,0 +1,136 @@
+import os
+import sys
+import pathlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))  # JIRA/ -> pacote common
+from common.config import exit_on_config_error
+from common.metrics import METRICS
+from common.slack_client import SlackClient
+from common.slack_tokens import slack_token
+from channel_directory import ChannelDirectory
+from user_directory import UserDirectory
+
+if __name__ == "__main__":
+    load_dotenv()  # o CLI apmo carrega o .env antes de importar o módulo
+
+# canais lidos/ajustados em paralelo (cada método continua no ritmo do próprio tier)
+MEMBERSHIP_WORKERS = int(os.getenv("SLACK_MEMBERSHIP_WORKERS", "8"))
+
+# conversations.invite aceita até 1000 usuários por chamada
+INVITE_BATCH = 1000
+
+
+def channel_members(client: SlackClient, channel_id: str) -> set:
+    """Membros atuais do canal (conversations.members paginado)."""
+    return set(client.paginate("conversations.members", "members", limit=1000, channel=channel_id))
+
+
+def token_user(client: SlackClient):
+    """Usuário dono do token (nunca é removido dos canais)."""
+    data = client.get("auth.test")
+    return data.get("user_id") if data.get("ok") else None
+
+
+def channel_changes(client: SlackClient, target: dict, protected: set) -> dict:
+    """
+    target = {"id", "name", "present": {users}, "absent": {users}, "exact": bool}
+      present  têm que estar no canal
+      absent   não podem estar (só é aplicado se a remoção for pedida)
+      exact    o canal fica só com `present` (+ protegidos)
+    Retorna o target com "invite" e "kick" calculados contra os membros atuais.
+    """
+    current = channel_members(client, target["id"])
+    present = set(target.get("present") or ())
+    if target.get("exact"):
+        kick = current - present
+    else:
+        kick = current & set(target.get("absent") or ())
+    return {
+        **target,
+        "invite": sorted(present - current),
+        "kick": sorted(kick - protected),
+    }
+
+
+def plan_membership(client: SlackClient, targets: list[dict], protected=(), workers: int = MEMBERSHIP_WORKERS) -> list[dict]:
+    """Lê os membros de todos os canais em paralelo e calcula o diff de cada um."""
+    protected = set(protected)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="members") as pool:
+        return list(pool.map(lambda t: channel_changes(client, t, protected), targets))
+
+
+def apply_channel_changes(client: SlackClient, change: dict):
+    cid, name = change["id"], change.get("name", change["id"])
+    users = change["invite"]
+    # convites em lotes (force: convida os válidos mesmo se algum falhar)
+    for i in range(0, len(users), INVITE_BATCH):
+        data = client.call("conversations.invite", channel=cid, users=",".join(users[i:i + INVITE_BATCH]), force=True)
+        if not data.get("ok"):
+            print(f"  ⚠ Invite error for {name}: {data.get('error')}")
+
+    # conversations.kick é 1 usuário por chamada
+    for user in change["kick"]:
+        data = client.call("conversations.kick", channel=cid, user=user)
+        if not data.get("ok") and data.get("error") != "not_in_channel":
+            print(f"  ⚠ Kick error for {user} in {name}: {data.get('error')}")
+
+    if users or change["kick"]:
+        print(f"✓ {name}: +{len(users)} -{len(change['kick'])}")
+
+
+def apply_membership(client: SlackClient, changes: list[dict], workers: int = MEMBERSHIP_WORKERS):
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="members") as pool:
+        list(pool.map(lambda c: apply_channel_changes(client, c), [c for c in changes if c["invite"] or c["kick"]]))
+
+
+def print_changes(changes: list[dict]):
+    for c in changes:
+        if c["invite"] or c["kick"]:
+            print(f"  {c.get('name', c['id'])}: invite {c['invite'] or '-'} kick {c['kick'] or '-'}")
+    invites = sum(len(c["invite"]) for c in changes)
+    kicks = sum(len(c["kick"]) for c in changes)
+    print(f"\n{len(changes)} channels checked: {invites} invites, {kicks} kicks")
+
+
+def run(command: str, users: list[str], channels: list[str], regex: bool = False, apply: bool = False,
+        workers: int = MEMBERSHIP_WORKERS) -> list[dict]:
+    """add / remove das pessoas em todos os canais ativos que batem com os padrões. Retorna o plano."""
+    client = SlackClient(slack_token("user"), pool_size=workers)
+    try:
+        directory = ChannelDirectory(client)
+        directory.ensure_fresh()
+
+        people = set(UserDirectory(client).resolve_many(u for u in users if u.strip()))
+        matched = [ch for ch in directory.match(channels, regex=regex) if not ch["is_archived"]]
+        key = "present" if command == "add" else "absent"
+        targets = [{"id": ch["id"], "name": ch["name"], key: people} for ch in matched]
+
+        changes = plan_membership(client, targets, protected={token_user(client)}, workers=workers)
+        print_changes(changes)
+        if apply:
+            apply_membership(client, changes, workers=workers)
+        elif any(c["invite"] or c["kick"] for c in changes):
+            print("Dry run: nothing changed (use --apply).")
+        return changes
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    # uso: python membership.py add U123,fulano@bankeiro.com.br --channels 'bkr_development_*-gestão' [--apply]
+    #      python membership.py remove U123 --channels 'bkr_development_*' --apply
+    parser = argparse.ArgumentParser(description="Garante (ou remove) membros em vários canais do Slack")
+    parser.add_argument("command", choices=["add", "remove"])
+    parser.add_argument("users", help="user IDs, e-mails, @handles ou nomes, separados por vírgula")
+    parser.add_argument("--channels", nargs="+", required=True, help="globs (ou regex com --regex) de nomes de canal")
+    parser.add_argument("--regex", action="store_true")
+    parser.add_argument("--apply", action="store_true", help="executa (senão é dry run)")
+    parser.add_argument("--workers", type=int, default=MEMBERSHIP_WORKERS)
+    args = parser.parse_args()
+
+    with exit_on_config_error(), METRICS.run("membership"):
+        run(args.command, args.users.split(","), args.channels, regex=args.regex, apply=args.apply, workers=args.workers)
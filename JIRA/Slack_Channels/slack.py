@@ -1,117 +1,180 @@
-import os
-import requests
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-# ========= CONFIG =========
-
-name_format = "bkr_development_"
-
-TEAMS = [
-    'Adquirência', 'Autorizadores', 'Benefícios', 'Caixinha', 'Cartão', 'Conta',
-    'Crédito', 'Investimento', 'Misc', 'Novos-Cores', 'Onboarding',
-    'Regulatório', 'Transacional'
-]
-
-SLACK_CHANNELS_GESTAO = [name_format + team.lower() + "-gestão" for team in TEAMS]
-SLACK_CHANNELS_OPERACAO = [name_format + team.lower() + "-operação" for team in TEAMS]
-
-# IDs das pessoas que vão entrar em TODOS os canais
-COMMON_USERS = [
-    "U04VDUQJM4P",  # Victor Freitas
-    # "U07NZ0M0S9K",  # Leonardo Nori
-]
-
-# ID da pessoa extra só para canais de gestão
-GESTAO_EXTRA_USER = "U06JRM6AJ" # Marabita
-
-# ========= API HELPERS =========
-
-def create_slack_channel(channel_name: str, token: str) -> dict:
-    url = "https://slack.com/api/conversations.create"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json; charset=utf-8"
-    }
-    payload = {
-        "name": channel_name,
-        "is_private": True
-    }
-
-    response = requests.post(url, headers=headers, json=payload)
-    result = response.json()
-
-    if result.get("ok"):
-        real_name = result["channel"]["name"]
-        print(f"✓ Channel '{channel_name}' created as '{real_name}'")
-    else:
-        error = result.get("error", "Unknown error")
-        print(f"✗ Failed to create channel '{channel_name}': {error}")
-
-    return result
-
-
-def invite_users_to_channel(channel_id: str, user_ids: list[str], token: str) -> None:
-    """
-    Invite multiple users to a channel.
-    Slack expects a comma-separated list of user IDs.
-    """
-    if not user_ids:
-        return
-
-    url = "https://slack.com/api/conversations.invite"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json; charset=utf-8"
-    }
-    payload = {
-        "channel": channel_id,
-        "users": ",".join(user_ids)
-    }
-    resp = requests.post(url, headers=headers, json=payload)
-    data = resp.json()
-
-    if not data.get("ok"):
-        # erros comuns: already_in_channel, cant_invite_self, etc.
-        print(f"  ⚠ Invite error for {channel_id}: {data.get('error')}")
-
-
-# ========= BULK CREATION =========
-
-def create_all_channels():
-    token = os.getenv("SLACK_USER_TOKEN")
-    if not token:
-        print("Error: SLACK_USER_TOKEN not found in .env file")
-        return
-
-    print(f"Creating {len(SLACK_CHANNELS_GESTAO) + len(SLACK_CHANNELS_OPERACAO)} Slack channels...\n")
-
-    # Canais de GESTÃO: você + COMMON_USERS + GESTAO_EXTRA_USER
-    for channel in SLACK_CHANNELS_GESTAO:
-        res = create_slack_channel(channel, token)
-        if res.get("ok"):
-            cid = res["channel"]["id"]
-            invite_users_to_channel(cid, COMMON_USERS + [GESTAO_EXTRA_USER], token)
-
-    # Canais de OPERAÇÃO: você + COMMON_USERS
-    for channel in SLACK_CHANNELS_OPERACAO:
-        res = create_slack_channel(channel, token)
-        if res.get("ok"):
-            cid = res["channel"]["id"]
-            invite_users_to_channel(cid, COMMON_USERS, token)
-
-    print("\nFinished creating and populating channels.")
-
-
-if __name__ == "__main__":
-    # quando estiver tudo certo, só rodar:
-    # create_all_channels()
-
-    # exemplo de teste em um único canal
-    token = os.getenv("SLACK_USER_TOKEN")
-    res = create_slack_channel("bkr_development_novos-cores-gestão", token)
-    if res.get("ok"):
-        cid = res["channel"]["id"]
-        invite_users_to_channel(cid, COMMON_USERS + [GESTAO_EXTRA_USER], token)
+import os
+import sys
+import pathlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))  # JIRA/ -> pacote common
+from common.config import exit_on_config_error
+from common.metrics import METRICS
+from common.slack_client import SlackClient
+from common.slack_tokens import slack_token
+from channel_directory import ChannelDirectory, normalize_channel_name
+from membership import apply_channel_changes, plan_membership, token_user
+from user_directory import UserDirectory
+
+# Load environment variables (só como script; o CLI apmo carrega antes de importar o módulo)
+if __name__ == "__main__":
+    load_dotenv()
+
+# ========= CONFIG =========
+
+name_format = "bkr_development_"
+
+TEAMS = [
+    'Adquirência', 'Autorizadores', 'Benefícios', 'Caixinha', 'Cartão', 'Conta',
+    'Crédito', 'Investimento', 'Misc', 'Novos-Cores', 'Onboarding',
+    'Regulatório', 'Transacional'
+]
+
+SLACK_CHANNELS_GESTAO = [name_format + team.lower() + "-gestão" for team in TEAMS]
+SLACK_CHANNELS_OPERACAO = [name_format + team.lower() + "-operação" for team in TEAMS]
+
+# Pessoas que vão entrar em TODOS os canais
+# (user ID, e-mail, @handle ou nome: resolvidos pelo UserDirectory)
+COMMON_USERS = [
+    "U04VDUQJM4P",  # Victor Freitas
+    # "U07NZ0M0S9K",  # Leonardo Nori
+]
+
+# Pessoa extra só para canais de gestão
+GESTAO_EXTRA_USER = "U06JRM6AJ" # Marabita
+
+# canais criados/convidados em paralelo (o ritmo real é ditado pelo tier de cada método)
+APPLY_WORKERS = int(os.getenv("SLACK_APPLY_WORKERS", "8"))
+
+# ========= API HELPERS =========
+
+def create_slack_channel(channel_name: str, client: SlackClient) -> dict:
+    result = client.call("conversations.create", name=channel_name, is_private=True)
+
+    if result.get("ok"):
+        real_name = result["channel"]["name"]
+        print(f"✓ Channel '{channel_name}' created as '{real_name}'")
+    else:
+        error = result.get("error", "Unknown error")
+        print(f"✗ Failed to create channel '{channel_name}': {error}")
+
+    return result
+
+
+# ========= PLAN / APPLY =========
+
+def desired_channels(people: UserDirectory) -> dict:
+    """{ nome do canal: [user ids] } de todos os canais que devem existir."""
+    common = people.resolve_many(COMMON_USERS)
+    gestao = people.resolve_many(COMMON_USERS + [GESTAO_EXTRA_USER])
+
+    desired = {}
+    # Canais de GESTÃO: você + COMMON_USERS + GESTAO_EXTRA_USER
+    for channel in SLACK_CHANNELS_GESTAO:
+        desired[channel] = gestao
+    # Canais de OPERAÇÃO: você + COMMON_USERS
+    for channel in SLACK_CHANNELS_OPERACAO:
+        desired[channel] = common
+    return desired
+
+
+def plan_channels(directory: ChannelDirectory, desired: dict, kick: bool = False,
+                  workers: int = APPLY_WORKERS) -> list[dict]:
+    """
+    Diff entre o desejado e o que já existe (diretório local de canais):
+      create    canal novo: cria e convida
+      exists    já existe: convida só quem falta (membros lidos com conversations.members);
+                com kick=True também remove quem não está na lista
+      archived  existe arquivado: não mexe (desarquivar é manual)
+    """
+    directory.ensure_fresh()
+    existing = directory.names()
+    plan = []
+    for name, users in desired.items():
+        ch = existing.get(normalize_channel_name(name))
+        if ch is None:
+            plan.append({"name": name, "action": "create", "id": None, "invite": users, "kick": []})
+        elif ch.get("is_archived"):
+            plan.append({"name": name, "action": "archived", "id": ch["id"], "invite": [], "kick": []})
+        else:
+            plan.append({"name": name, "action": "exists", "id": ch["id"], "present": set(users), "exact": kick})
+
+    # membros atuais dos canais existentes, em paralelo
+    existing_steps = [step for step in plan if step["action"] == "exists"]
+    if existing_steps:
+        protected = {token_user(directory.client)}
+        reconciled = iter(plan_membership(directory.client, existing_steps, protected, workers))
+        plan = [next(reconciled) if step["action"] == "exists" else step for step in plan]
+    return plan
+
+
+def print_plan(plan: list[dict]):
+    for step in plan:
+        mark = {"create": "+", "exists": "=", "archived": "!"}[step["action"]]
+        print(f"  {mark} {step['name']} ({step['action']}, {len(step['invite'])} invites, {len(step['kick'])} kicks)")
+    counts = {a: sum(1 for s in plan if s["action"] == a) for a in ("create", "exists", "archived")}
+    print(f"\nPlan: {counts['create']} to create, {counts['exists']} existing, {counts['archived']} archived")
+
+
+def apply_step(client: SlackClient, directory: ChannelDirectory, step: dict):
+    if step["action"] == "archived":
+        print(f"! Channel '{step['name']}' is archived; skipping")
+        return
+
+    if step["action"] == "create":
+        res = create_slack_channel(step["name"], client)
+        if not res.get("ok"):
+            # name_taken aqui = canal privado que o token não enxerga
+            return
+        directory.update({**res["channel"], "is_private": True})
+
+        # canal novo: só o criador está dentro, convida todo mundo direto
+        step = {**step, "id": res["channel"]["id"]}
+
+    # convites (e kicks, com --kick) pelo mesmo caminho do membership.py
+    apply_channel_changes(client, step)
+
+
+def apply_plan(client: SlackClient, directory: ChannelDirectory, plan: list[dict], workers: int = APPLY_WORKERS):
+    """Executa o plano em paralelo; cada método do Slack respeita o próprio tier."""
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="slack") as pool:
+            list(pool.map(lambda step: apply_step(client, directory, step), plan))
+    finally:
+        directory.save()
+
+
+# ========= BULK CREATION =========
+
+def create_all_channels(apply: bool = True, workers: int = APPLY_WORKERS, kick: bool = False):
+    token = slack_token("user")
+    token()  # sem token: ConfigError antes de planejar qualquer coisa
+
+    client = SlackClient(token, pool_size=workers)
+    directory = ChannelDirectory(client)
+    try:
+        desired = desired_channels(UserDirectory(client))
+        print(f"Planning {len(desired)} Slack channels...\n")
+        plan = plan_channels(directory, desired, kick=kick, workers=workers)
+        print_plan(plan)
+
+        if not apply:
+            print("\nDry run: nothing changed (use --apply).")
+            return
+
+        print()
+        apply_plan(client, directory, plan, workers)
+        print("\nFinished creating and populating channels.")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    # python slack.py            -> só mostra o plano
+    # python slack.py --apply    -> cria o que falta e convida (pode rodar de novo sem problema)
+    parser = argparse.ArgumentParser(description="Provisiona os canais bkr_development_* (plan/apply)")
+    parser.add_argument("--apply", action="store_true", help="executa o plano (senão é dry run)")
+    parser.add_argument("--workers", type=int, default=APPLY_WORKERS, help="canais processados em paralelo")
+    parser.add_argument("--kick", action="store_true", help="remove dos canais existentes quem não está na lista")
+    args = parser.parse_args()
+    with exit_on_config_error(), METRICS.run("slack_channels"):
+        create_all_channels(apply=args.apply, workers=args.workers, kick=args.kick)
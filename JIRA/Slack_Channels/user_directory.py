@@ -0,0 +1,208 @@
+import os
+import re
+import sys
+import json
+import time
+import pathlib
+import threading
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))  # JIRA/ -> pacote common
+from common.config import exit_on_config_error
+from common.metrics import METRICS
+from common.slack_client import SlackClient
+from common.slack_tokens import slack_token
+
+if __name__ == "__main__":
+    load_dotenv()  # o CLI apmo carrega o .env antes de importar o módulo
+
+USER_DIRECTORY_FILE = pathlib.Path(os.getenv(
+    "SLACK_USER_DIRECTORY_FILE", pathlib.Path(__file__).with_name("user_directory.json")
+))
+USER_DIRECTORY_TTL = int(os.getenv("SLACK_USER_DIRECTORY_TTL", str(24 * 3600)))  # segundos
+
+USER_ID_RE = re.compile(r"^[UW][A-Z0-9]{6,}$")
+
+
+class UnknownUser(ValueError):
+    pass
+
+
+def _key(value: str) -> str:
+    return value.strip().lstrip("@").casefold()
+
+
+class UserDirectory:
+    """
+    Diretório local de usuários do workspace (users.list paginado, salvo em
+    USER_DIRECTORY_FILE com TTL). Resolve em memória por:
+      - user ID (U.../W..., nem precisa do diretório)
+      - e-mail
+      - @handle, display name ou nome real
+    Usuário que não está no cache (entrou depois da varredura) é buscado
+    sozinho (users.lookupByEmail / users.info) e entra no cache, sem varredura.
+    Passou do TTL: users.list é varrido de novo por inteiro (a API não filtra
+    por data de alteração); enquanto isso as buscas usam o cache anterior.
+    """
+
+    def __init__(self, client: SlackClient, path: pathlib.Path = USER_DIRECTORY_FILE, ttl: int = USER_DIRECTORY_TTL):
+        self.client = client
+        self.path = path
+        self.ttl = ttl
+        self.users = {}
+        self.fetched_at = 0.0
+        self.index = {}
+        self.dirty = False
+        self.lock = threading.Lock()          # protege users/index/dirty
+        self.refresh_lock = threading.Lock()  # 1 varredura por vez
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as fp:
+                data = json.load(fp)
+        except ValueError:
+            return
+        self.users = data.get("users", {})
+        self.fetched_at = data.get("fetched_at", 0.0)
+        self.index = self._build_index(self.users)
+
+    def save(self):
+        with self.lock:
+            data = {"fetched_at": self.fetched_at, "users": self.users}
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as fp:
+                json.dump(data, fp, ensure_ascii=False)
+                fp.flush()
+                os.fsync(fp.fileno())
+            os.replace(tmp, self.path)
+            self.dirty = False
+
+    @staticmethod
+    def _entry(user: dict) -> dict:
+        profile = user.get("profile") or {}
+        return {
+            "id": user["id"],
+            "name": user.get("name"),
+            "email": profile.get("email"),
+            "display_name": profile.get("display_name"),
+            "real_name": profile.get("real_name") or user.get("real_name"),
+            "deleted": bool(user.get("deleted")),
+            "is_bot": bool(user.get("is_bot")),
+            "updated": user.get("updated"),
+        }
+
+    @staticmethod
+    def _build_index(users: dict) -> dict:
+        index = {}
+        for field in ("real_name", "display_name", "name", "email"):
+            for user in users.values():
+                if user.get(field) and not user["deleted"]:
+                    index.setdefault(field, {}).setdefault(_key(user[field]), set()).add(user["id"])
+        return index
+
+    def refresh(self):
+        """
+        Varredura completa de users.list. A rede fica fora do lock: o diretório
+        novo é montado à parte e trocado de uma vez no final.
+        """
+        started = time.time()
+        users = {}
+        for user in self.client.paginate("users.list", "members", limit=200):
+            users[user["id"]] = self._entry(user)
+        index = self._build_index(users)
+        changed = sum(1 for uid, entry in users.items() if self.users.get(uid) != entry)
+        with self.lock:
+            self.users, self.index = users, index
+            self.fetched_at = started
+        self.save()
+        print(f"User directory refreshed: {len(users)} users ({changed} changed)")
+
+    def _stale(self) -> bool:
+        return not self.users or time.time() - self.fetched_at > self.ttl
+
+    def ensure_fresh(self):
+        if self._stale():
+            with self.refresh_lock:
+                if self._stale():  # outra thread pode ter acabado de varrer
+                    self.refresh()
+
+    def _fetch_one(self, identifier: str):
+        """Busca 1 usuário que não está no cache (e-mail ou ID)."""
+        if "@" in identifier.strip("@"):
+            data = self.client.get("users.lookupByEmail", email=identifier.strip())
+        elif USER_ID_RE.match(identifier):
+            data = self.client.get("users.info", user=identifier)
+        else:
+            return None
+        if not data.get("ok"):
+            return None
+        entry = self._entry(data["user"])
+        with self.lock:
+            self.users = {**self.users, entry["id"]: entry}
+            self.index = self._build_index(self.users)
+            self.dirty = True
+        return entry["id"]
+
+    def resolve(self, identifier: str) -> str:
+        """E-mail, @handle, display name, nome real ou ID -> user ID."""
+        identifier = identifier.strip()
+        if USER_ID_RE.match(identifier):
+            return identifier
+
+        self.ensure_fresh()
+        key = _key(identifier)
+        field_order = ("email",) if "@" in identifier.strip("@") else ("name", "display_name", "real_name")
+        for field in field_order:
+            ids = self.index.get(field, {}).get(key)
+            if ids and len(ids) == 1:
+                return next(iter(ids))
+            if ids:
+                raise UnknownUser(f"'{identifier}' is ambiguous ({field}): {sorted(ids)}")
+
+        uid = self._fetch_one(identifier)
+        if uid is None:
+            raise UnknownUser(f"Slack user not found: '{identifier}'")
+        return uid
+
+    def resolve_many(self, identifiers) -> list[str]:
+        """Resolve uma lista inteira (sem repetir, mantendo a ordem); erro lista todos que falharam."""
+        ids, errors = [], []
+        for identifier in identifiers:
+            try:
+                uid = self.resolve(identifier)
+            except UnknownUser as e:
+                errors.append(str(e))
+                continue
+            if uid not in ids:
+                ids.append(uid)
+        if self.dirty:
+            self.save()
+        if errors:
+            raise UnknownUser("; ".join(errors))
+        return ids
+
+    def describe(self, user_id: str) -> str:
+        user = self.users.get(user_id) or {}
+        return user.get("real_name") or user.get("display_name") or user.get("name") or user_id
+
+
+if __name__ == "__main__":
+    # uso: python user_directory.py fulano@bankeiro.com.br @handle "Nome Real" U123ABC
+    with exit_on_config_error(), METRICS.run("user_directory"):
+        client = SlackClient(slack_token("user"))
+        try:
+            people = UserDirectory(client)
+            for identifier in sys.argv[1:]:
+                try:
+                    uid = people.resolve(identifier)
+                    print(f"{identifier} -> {uid} ({people.describe(uid)})")
+                except UnknownUser as e:
+                    print(f"{identifier} -> {e}")
+            if people.dirty:
+                people.save()
+        finally:
+            client.close()
@@ -0,0 +1,223 @@
+import sys
+import pathlib
+import argparse
+import importlib
+from contextlib import contextmanager
+
+# CLI único das ferramentas do APMO:
+#   python apmo.py backup [--incremental] [--format ndjson] [--single-scan] ...
+#   python apmo.py render [--format md] [--force]        (site estático do backup)
+#   python apmo.py verify [--deep] [--refetch] [--prune] (integridade dos anexos do backup)
+#   python apmo.py report [--daemon]                     (visão geral do Bankeiro Plataforma)
+#   python apmo.py report --config reports.json [--post] (relatórios declarativos)
+#   python apmo.py channels create|archive|unarchive|list|invite|remove ... [--apply]
+#   python apmo.py oauth [--code ...]
+# Nada pesado é importado aqui em cima: cada subcomando carrega o .env e só então
+# importa o módulo da ferramenta. As mesmas operações são funções (backup(),
+# report(), create_channels(), ...): um worker de longa duração roda vários jobs
+# no mesmo processo, reaproveitando módulos já importados e clients já abertos.
+
+ROOT = pathlib.Path(__file__).resolve().parent
+
+# módulo -> pasta (os scripts importam os vizinhos pelo nome, então a pasta entra no sys.path)
+TOOLS = {
+    "extrai": "Extracao_Dados",
+    "render": "Extracao_Dados",
+    "verify": "Extracao_Dados",
+    "main": "Bankeiro_Plataforma",
+    "report_engine": "Bankeiro_Plataforma",
+    "slack": "Slack_Channels",
+    "archive_channel": "Slack_Channels",
+    "membership": "Slack_Channels",
+    "access": "Slack_Channels",
+}
+
+
+def tool(module: str):
+    """Importa o módulo da ferramenta (1x por processo) depois de carregar o .env dela."""
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    from common.config import load_env
+
+    folder = ROOT / TOOLS[module]
+    load_env(folder)
+    if str(folder) not in sys.path:
+        sys.path.insert(0, str(folder))
+    return importlib.import_module(module)
+
+
+@contextmanager
+def metrics_run(name: str):
+    from common.metrics import METRICS
+    with METRICS.run(name):
+        yield
+
+
+def _given(**kwargs) -> dict:
+    """Só as opções passadas: o resto fica com o padrão (do .env) da própria ferramenta."""
+    return {k: v for k, v in kwargs.items() if v is not None}
+
+
+# ========= operações =========
+
+def backup(incremental: bool = False, output_format: str = None, compress: bool = None, board_workers: int = None,
+           full_history: bool = None, single_scan: bool = None):
+    """Backup dos boards EUR (Extracao_Dados/extrai.py)."""
+    extrai = tool("extrai")
+    with metrics_run("extrai"):
+        extrai.main(incremental=incremental, **_given(
+            output_format=output_format, compress=compress, board_workers=board_workers,
+            full_history=full_history, single_scan=single_scan,
+        ))
+
+
+def render(out_dir: pathlib.Path = None, fmt: str = "html", workers: int = None, page_size: int = None,
+           force: bool = False) -> dict:
+    """Site estático navegável do backup, incremental (Extracao_Dados/render.py)."""
+    renderer = tool("render")
+    return renderer.render_site(fmt=fmt, force=force, **_given(out_dir=out_dir, workers=workers, page_size=page_size))
+
+
+def verify(out_dir: pathlib.Path = None, deep: bool = False, workers: int = None, refetch: bool = False,
+           prune: bool = False) -> dict:
+    """Confere os anexos do backup contra os manifestos, rebaixando o que falhou (Extracao_Dados/verify.py)."""
+    checker = tool("verify")
+    with metrics_run("verify"):
+        return checker.verify_backup(deep=deep, refetch_failed=refetch, prune_orphans=prune,
+                                     **_given(out_dir=out_dir, workers=workers))
+
+
+def report(daemon: bool = False, interval: int = None):
+    """Visão geral do PLTF por Bankeiro Team no Slack (Bankeiro_Plataforma/main.py)."""
+    bankeiro = tool("main")
+    with metrics_run("bankeiro"):
+        if daemon:
+            bankeiro.run_daemon(**_given(poll_seconds=interval))
+        else:
+            bankeiro.main()
+
+
+def custom_reports(config: pathlib.Path, post: bool = False, workers: int = 4, client=None) -> dict:
+    """Relatórios declarativos do arquivo `config` (Bankeiro_Plataforma/report_engine.py)."""
+    engine = tool("report_engine")
+    with metrics_run("report_engine"):
+        return engine.main(pathlib.Path(config), post=post, workers=workers, client=client)
+
+
+def create_channels(apply: bool = False, workers: int = None, kick: bool = False):
+    """Provisiona os canais bkr_development_* (Slack_Channels/slack.py)."""
+    slack = tool("slack")
+    with metrics_run("slack_channels"):
+        slack.create_all_channels(apply=apply, kick=kick, **_given(workers=workers))
+
+
+def archive_channels(patterns: list[str], command: str = "archive", regex: bool = False, apply: bool = False,
+                     refresh: bool = False, workers: int = None):
+    """archive / unarchive / list por padrão de nome (Slack_Channels/archive_channel.py)."""
+    archive_channel = tool("archive_channel")
+    with metrics_run("archive_channel"):
+        archive_channel.run(command, patterns, regex=regex, apply=apply, refresh=refresh, **_given(workers=workers))
+
+
+def invite(users: list[str], channels: list[str], remove: bool = False, regex: bool = False, apply: bool = False,
+           workers: int = None) -> list[dict]:
+    """Garante (ou remove, com remove=True) pessoas em vários canais (Slack_Channels/membership.py)."""
+    membership = tool("membership")
+    with metrics_run("membership"):
+        return membership.run("remove" if remove else "add", users, channels, regex=regex, apply=apply,
+                              **_given(workers=workers))
+
+
+def oauth(code: str = None, redirect_uri: str = None) -> dict:
+    """Troca o code do OAuth do Slack pelos tokens rotativos (Slack_Channels/access.py)."""
+    return tool("access").exchange_code(code, redirect_uri)
+
+
+# ========= CLI =========
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="apmo", description="Ferramentas de Jira e Slack do APMO")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("backup", help="backup dos boards do Jira (JSON + imagens)")
+    p.add_argument("--incremental", action="store_true", help="só issues com `updated` >= watermark de cada board")
+    p.add_argument("--format", dest="output_format", choices=["folders", "ndjson"], help="formato do JSON das issues")
+    p.add_argument("--gzip", dest="compress", action="store_true", default=None, help="comprime os segmentos ndjson")
+    p.add_argument("--boards-parallel", dest="board_workers", type=int, help="boards processados ao mesmo tempo")
+    p.add_argument("--history", dest="full_history", action="store_true", default=None,
+                   help="inclui changelog e comentários completos")
+    p.add_argument("--single-scan", action="store_true", default=None, help="1 busca só por projeto")
+    p.set_defaults(run=lambda a: backup(
+        a.incremental, a.output_format, a.compress, a.board_workers, a.full_history, a.single_scan,
+    ))
+
+    p = sub.add_parser("render", help="site estático (HTML/Markdown) do backup, só re-renderiza o que mudou")
+    p.add_argument("--dir", type=pathlib.Path, help="pasta do backup (padrão: jira_backup)")
+    p.add_argument("--format", choices=["html", "md"], default="html")
+    p.add_argument("--workers", type=int, help="processos renderizando em paralelo")
+    p.add_argument("--page-size", type=int, help="issues por página do índice do board")
+    p.add_argument("--force", action="store_true", help="renderiza tudo de novo")
+    p.set_defaults(run=lambda a: render(a.dir, a.format, a.workers, a.page_size, a.force))
+
+    p = sub.add_parser("verify", help="confere a integridade do backup (anexos x manifestos)")
+    p.add_argument("--dir", type=pathlib.Path, help="pasta do backup (padrão: jira_backup)")
+    p.add_argument("--deep", action="store_true", help="recalcula o SHA-256 de todos os arquivos")
+    p.add_argument("--workers", type=int, help="processos pro hash")
+    p.add_argument("--refetch", action="store_true", help="baixa de novo só os anexos com problema")
+    p.add_argument("--prune", action="store_true", help="apaga blobs/imagens órfãos e .part esquecidos")
+    p.set_defaults(run=lambda a: verify(a.dir, a.deep, a.workers, a.refetch, a.prune)["unresolved"] and sys.exit(1))
+
+    p = sub.add_parser("report", help="relatório do Bankeiro no Slack (ou relatórios declarativos com --config)")
+    p.add_argument("--daemon", action="store_true", help="fica rodando e só atualiza o Slack quando os números mudam")
+    p.add_argument("--interval", type=int, help="segundos entre polls no modo daemon")
+    p.add_argument("--config", type=pathlib.Path, help="JSON com a lista de relatórios (report_engine)")
+    p.add_argument("--post", action="store_true", help="com --config: posta no Slack (senão só imprime)")
+    p.add_argument("--workers", type=int, default=4, help="com --config: projetos avaliados em paralelo")
+    p.set_defaults(run=lambda a: custom_reports(a.config, a.post, a.workers) if a.config else report(a.daemon, a.interval))
+
+    channels = sub.add_parser("channels", help="canais do Slack").add_subparsers(dest="action", required=True)
+
+    p = channels.add_parser("create", help="cria os canais bkr_development_* e convida (plan/apply)")
+    p.add_argument("--apply", action="store_true", help="executa o plano (senão é dry run)")
+    p.add_argument("--workers", type=int)
+    p.add_argument("--kick", action="store_true", help="remove dos canais existentes quem não está na lista")
+    p.set_defaults(run=lambda a: create_channels(a.apply, a.workers, a.kick))
+
+    for action, text in (("archive", "arquiva"), ("unarchive", "desarquiva"), ("list", "lista")):
+        p = channels.add_parser(action, help=f"{text} canais por padrão de nome")
+        p.add_argument("patterns", nargs="+", help="globs (bkr_development_*) ou regex com --regex")
+        p.add_argument("--regex", action="store_true")
+        p.add_argument("--apply", action="store_true", help="executa (senão é dry run)")
+        p.add_argument("--refresh", action="store_true", help="força nova varredura do diretório de canais")
+        p.add_argument("--workers", type=int)
+        p.set_defaults(run=lambda a: archive_channels(a.patterns, a.action, a.regex, a.apply, a.refresh, a.workers))
+
+    for action, text in (("invite", "garante"), ("remove", "remove")):
+        p = channels.add_parser(action, help=f"{text} pessoas em vários canais")
+        p.add_argument("users", help="user IDs, e-mails, @handles ou nomes, separados por vírgula")
+        p.add_argument("--channels", nargs="+", required=True, help="globs (ou regex com --regex) de nomes de canal")
+        p.add_argument("--regex", action="store_true")
+        p.add_argument("--apply", action="store_true", help="executa (senão é dry run)")
+        p.add_argument("--workers", type=int)
+        p.set_defaults(run=lambda a: invite(
+            a.users.split(","), a.channels, a.action == "remove", a.regex, a.apply, a.workers,
+        ))
+
+    p = sub.add_parser("oauth", help="troca o code do OAuth do Slack pelos tokens (SLACK_OAUTH_CODE)")
+    p.add_argument("--code", help="code recebido no redirect (padrão: SLACK_OAUTH_CODE)")
+    p.add_argument("--redirect-uri", help="padrão: SLACK_REDIRECT_URI")
+    p.set_defaults(run=lambda a: oauth(a.code, a.redirect_uri))
+    return parser
+
+
+def main(argv: list[str] = None):
+    args = build_parser().parse_args(argv)
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    from common.config import exit_on_config_error
+    with exit_on_config_error():
+        args.run(args)
+
+
+if __name__ == "__main__":
+    main()
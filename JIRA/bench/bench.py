@@ -0,0 +1,152 @@
+import os
+import sys
+import json
+import time
+import pathlib
+import argparse
+import tempfile
+import subprocess
+
+from fake_server import Config, FakeServer, make_dataset, parse_projects
+
+# Benchmark offline das ferramentas contra o fake_server (nada sai pra atlassian.net / slack.com).
+# Cada ferramenta roda como subprocess num diretório temporário, com o env apontando pro fake.
+# Uso:
+#   python bench.py                                   # todas, dataset padrão
+#   python bench.py --tools extrai --issues EUR=5000 --latency-ms 80 --rate-limit-prob 0.02
+#   python bench.py --json resultado.json
+
+JIRA_DIR = pathlib.Path(__file__).resolve().parents[1]
+
+TOOLS = {
+    "extrai": {"script": JIRA_DIR / "Extracao_Dados" / "extrai.py", "args": [], "metrics": "extrai"},
+    "bankeiro": {"script": JIRA_DIR / "Bankeiro_Plataforma" / "main.py", "args": [], "metrics": "bankeiro"},
+    "slack": {"script": JIRA_DIR / "Slack_Channels" / "slack.py", "args": ["--apply"], "metrics": "slack_channels"},
+}
+
+
+def tool_env(base: str, workdir: pathlib.Path, jira_rate: float, slack_rate_scale: float) -> dict:
+    """Env que aponta todas as ferramentas pro fake (caches/tokens no diretório temporário)."""
+    env = dict(os.environ)
+    env.update({
+        "JIRA_BASE": base,
+        "JIRA_EMAIL": "bench@bankeiro.test",
+        "JIRA_TOKEN": "bench",
+        "JIRA_AUTH_HEADER": "Basic YmVuY2g6YmVuY2g=",
+        "JIRA_RATE_PER_SEC": str(jira_rate),
+        "SLACK_API_URL": f"{base}/api/",
+        "SLACK_WEBHOOK_URL": f"{base}/webhook/bench",
+        "SLACK_USER_TOKEN": "xoxp-bench",
+        "SLACK_BOT_TOKEN": "xoxb-bench",
+        "SLACK_RATE_SCALE": str(slack_rate_scale),
+        "SLACK_TOKEN_FILE": str(workdir / "slack_tokens.json"),
+        "SLACK_CHANNEL_DIRECTORY_FILE": str(workdir / "channel_directory.json"),
+        "SLACK_USER_DIRECTORY_FILE": str(workdir / "user_directory.json"),
+        "BANKEIRO_CACHE_FILE": str(workdir / "bankeiro_cache.json"),
+        "BANKEIRO_SLACK_CHANNEL_ID": "",
+        "APMO_METRICS_DIR": str(workdir / "metrics"),
+        "PYTHONUNBUFFERED": "1",
+    })
+    return env
+
+
+def run_tool(server: FakeServer, name: str, jira_rate: float, slack_rate_scale: float, verbose: bool) -> dict:
+    tool = TOOLS[name]
+    server.stats.reset()
+    with tempfile.TemporaryDirectory(prefix=f"bench_{name}_") as tmp:
+        workdir = pathlib.Path(tmp)
+        started = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, str(tool["script"]), *tool["args"]],
+            cwd=workdir, env=tool_env(server.url, workdir, jira_rate, slack_rate_scale),
+            stdout=None if verbose else subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+        )
+        wall = time.perf_counter() - started
+        # resumo do common.metrics gravado pela própria ferramenta (tempo dormindo / retries do lado do client)
+        summaries = sorted((workdir / "metrics").glob(f"{tool['metrics']}-*.json"))
+        client = json.loads(summaries[-1].read_text(encoding="utf-8")) if summaries else {}
+
+    stats = server.stats.snapshot()
+    issues = stats["issues_served"]
+    requests_ = stats["total_requests"]
+    result = {
+        "tool": name,
+        "returncode": proc.returncode,
+        "wall_s": round(wall, 3),
+        "requests": requests_,
+        "issues": issues,
+        "issues_per_s": round(issues / wall, 1) if wall else None,
+        "mb": round(stats["total_bytes_out"] / 1e6, 3),
+        "mb_per_s": round(stats["total_bytes_out"] / 1e6 / wall, 3) if wall else None,
+        "requests_per_issue": round(requests_ / issues, 3) if issues else None,
+        "rate_limited": stats["rate_limited"],
+        "sleep_s": round(sum(client.get("sleep_s", {}).values()), 2) if client else None,
+        "retries": sum(client.get("retries", {}).values()) if client else None,
+        "statuses": stats["statuses"],
+        "endpoints": stats["requests"],
+    }
+    if proc.returncode != 0 and not verbose:
+        print(f"[{name}] saiu com código {proc.returncode}:\n{(proc.stdout or '')[-2000:]}")
+    return result
+
+
+def print_table(results: list[dict]):
+    cols = [("tool", 9), ("wall_s", 8), ("issues", 7), ("issues_per_s", 12), ("mb", 8), ("mb_per_s", 8),
+            ("requests", 8), ("requests_per_issue", 18), ("rate_limited", 12), ("retries", 7), ("sleep_s", 8)]
+    print("  ".join(name.rjust(width) for name, width in cols))
+    for r in results:
+        print("  ".join(("-" if r[name] is None else str(r[name])).rjust(width) for name, width in cols))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark offline de extrai.py, Bankeiro main.py e slack.py")
+    parser.add_argument("--tools", default=",".join(TOOLS), help=f"quais rodar ({','.join(TOOLS)})")
+    parser.add_argument("--issues", default="EUR=2000,PLTF=3000", help="issues por projeto: EUR=2000,PLTF=3000")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--attachments-per-issue", type=float, default=1.0)
+    parser.add_argument("--attachment-kb", type=int, default=64)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=30.0, help="latência simulada por requisição")
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--rate-limit-prob", type=float, default=0.0, help="chance de 429 em cada chamada")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--jira-rate", type=float, default=10.0, help="JIRA_RATE_PER_SEC passado pras ferramentas")
+    parser.add_argument(
+        "--slack-rate-scale", type=float, default=1.0,
+        help="multiplica os limites de tier do SlackClient (1 = ritmo real do Slack)",
+    )
+    parser.add_argument("--json", help="grava os resultados nesse arquivo")
+    parser.add_argument("-v", "--verbose", action="store_true", help="mostra a saída das ferramentas")
+    args = parser.parse_args()
+
+    names = [t.strip() for t in args.tools.split(",") if t.strip()]
+    unknown = set(names) - set(TOOLS)
+    if unknown:
+        parser.error(f"ferramentas desconhecidas: {', '.join(sorted(unknown))}")
+
+    server = FakeServer(
+        {}, Config(args.latency_ms, args.jitter_ms, args.page_size,
+                   rate_limit_prob=args.rate_limit_prob, retry_after=args.retry_after),
+    )
+    # o dataset precisa da URL real (porta livre escolhida pelo SO) pros links de anexo
+    server.data = make_dataset(
+        parse_projects(args.issues), seed=args.seed, attachments_per_issue=args.attachments_per_issue,
+        attachment_kb=args.attachment_kb, base_url=server.url,
+    )
+    server.start()
+    print(f"Fake em {server.url}: {len(server.data['issues'])} issues, {len(server.data['attachments'])} anexos\n")
+
+    results = []
+    try:
+        for name in names:
+            print(f"Rodando {name}...")
+            results.append(run_tool(server, name, args.jira_rate, args.slack_rate_scale, args.verbose))
+    finally:
+        server.stop()
+
+    print()
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fp:
+            json.dump({"params": vars(args), "results": results}, fp, indent=2, ensure_ascii=False)
+        print(f"\nResultados em {args.json}")
@@ -0,0 +1,656 @@
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import urllib.parse
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Servidor local que imita o Jira Cloud + Slack nos endpoints que as ferramentas usam.
+# Serve pra rodar backup / relatório / provisionamento sem tocar em atlassian.net / slack.com
+# (benchmark e teste de regressão). Uso:
+#   python fake_server.py --port 8765 --issues EUR=2000,PLTF=3000 --latency-ms 50 --rate-limit-prob 0.01
+
+# nomes dos custom fields sintéticos (o /rest/api/3/field devolve esse mapeamento)
+CUSTOM_FIELDS = {
+    "customfield_10630": "EUR-Funcionalidade",
+    "customfield_10631": "EUR-Categoria",
+    "customfield_11404": "Bankeiro Team",
+}
+
+FUNCIONALIDADES = ["CONTA", "PIX", "EMPRESTIMO", "CARTÃO BENEFÍCIO", "TECNOLOGIA", "ONBOARDING"]
+CATEGORIAS = ["PRODUTO", "INFRA", "SUSTENTAÇÃO"]
+TEAMS = [
+    "Adquirência", "Autorizadores", "Benefícios", "Caixinha", "Cartão", "Conta",
+    "Crédito", "Investimento", "Misc", "Novos Cores", "Onboarding", "Regulatório", "Transacional",
+]
+ISSUETYPES = ["Story", "Bug", "Task", "Incident (PRD)", "Kaizen", "Pendência", "Risco", "Problema"]
+STATUSES = [
+    ("Backlog", "new", "To Do"), ("REF. FUNCIONAL", "new", "To Do"), ("Pronto p/ Comprometimento", "new", "To Do"),
+    ("Comprometido", "indeterminate", "In Progress"), ("Develop", "indeterminate", "In Progress"),
+    ("Teste", "indeterminate", "In Progress"), ("Ready Release", "indeterminate", "In Progress"),
+    ("Done", "done", "Done"),
+]
+WORDS = ("pix conta cartão limite crédito boleto extrato transferência saldo onboarding "
+         "erro tela fluxo regra cadastro api timeout lentidão relatório ajuste").split()
+
+
+class Config:
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, page_size=100, id_page_size=5000,
+                 rate_limit_prob=0.0, retry_after=1.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.page_size = page_size
+        self.id_page_size = id_page_size
+        self.rate_limit_prob = rate_limit_prob
+        self.retry_after = retry_after
+
+
+# ========= dados sintéticos =========
+
+def adf(text: str) -> dict:
+    return {"type": "doc", "version": 1, "content": [
+        {"type": "paragraph", "content": [{"type": "text", "text": text}]}
+    ]}
+
+
+def make_dataset(projects: dict, seed: int = 42, attachments_per_issue: float = 1.0,
+                 attachment_kb: int = 64, shared_attachments: float = 0.2, comments_per_issue: int = 3,
+                 base_url: str = "http://127.0.0.1:8765") -> dict:
+    """
+    Gera issues determinísticas: { "issues": {key: issue}, "attachments": {id: size} }.
+    - projects: {"EUR": 2000, "PLTF": 3000}
+    - shared_attachments: fração de anexos que reaparece em outras issues (dedup)
+    """
+    rnd = random.Random(seed)
+    now = datetime(2026, 10, 1, 12, 0, tzinfo=timezone(timedelta(hours=-3)))
+    issues, attachments, att_created = {}, {}, {}
+    next_issue_id = 10000
+    next_att_id = 50000
+
+    for project, count in projects.items():
+        for n in range(1, count + 1):
+            key = f"{project}-{n}"
+            next_issue_id += 1
+            status, cat_key, cat_name = rnd.choice(STATUSES)
+            created = now - timedelta(days=rnd.randint(1, 900))
+            updated = created + timedelta(days=rnd.randint(0, (now - created).days))
+            summary = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(3, 8)))
+
+            atts = []
+            for _ in range(int(attachments_per_issue) + (rnd.random() < attachments_per_issue % 1)):
+                if attachments and rnd.random() < shared_attachments:
+                    att_id = rnd.choice(list(attachments))
+                else:
+                    next_att_id += 1
+                    att_id = str(next_att_id)
+                    attachments[att_id] = max(1, int(rnd.gauss(attachment_kb, attachment_kb / 4) * 1024))
+                    att_created[att_id] = created.isoformat(timespec="milliseconds")
+                atts.append({
+                    "id": att_id,
+                    "filename": f"print_{att_id}.png",
+                    "mimeType": "image/png",
+                    "size": attachments[att_id],
+                    "created": att_created[att_id],
+                    "content": f"{base_url}/rest/api/3/attachment/content/{att_id}",
+                })
+
+            comments = [
+                {"id": str(i + 1), "created": (created + timedelta(hours=i)).isoformat(timespec="milliseconds"),
+                 "author": {"displayName": f"Pessoa {rnd.randint(1, 40)}"},
+                 "body": adf(" ".join(rnd.choice(WORDS) for _ in range(12)))}
+                for i in range(comments_per_issue)
+            ]
+
+            issues[key] = {
+                "id": str(next_issue_id),
+                "key": key,
+                "fields": {
+                    "summary": summary,
+                    "description": adf(" ".join(rnd.choice(WORDS) for _ in range(40))),
+                    "issuetype": {"name": rnd.choice(ISSUETYPES)},
+                    "status": {"name": status, "statusCategory": {"key": cat_key, "name": cat_name}},
+                    "priority": {"name": rnd.choice(["Highest", "High", "Medium", "Low"])},
+                    "assignee": {"displayName": f"Pessoa {rnd.randint(1, 40)}", "accountId": f"acc-{rnd.randint(1, 40)}"},
+                    "reporter": {"displayName": f"Pessoa {rnd.randint(1, 40)}"},
+                    "parent": None,
+                    "created": created.strftime("%Y-%m-%dT%H:%M:%S.000%z"),
+                    "updated": updated.strftime("%Y-%m-%dT%H:%M:%S.000%z"),
+                    "duedate": None,
+                    "comment": {"comments": comments[:2], "total": len(comments), "maxResults": 2, "startAt": 0},
+                    "attachment": atts,
+                    "customfield_10630": {"value": rnd.choice(FUNCIONALIDADES)},
+                    "customfield_10631": [{"value": rnd.choice(CATEGORIAS)}],
+                    "customfield_11404": [{"value": rnd.choice(TEAMS)}],
+                },
+                "_comments": comments,
+            }
+    return {"issues": issues, "attachments": attachments}
+
+
+def attachment_bytes(att_id: str, size: int) -> bytes:
+    chunk = f"PNG{att_id}|".encode()
+    return (chunk * (size // len(chunk) + 1))[:size]
+
+
+# ========= mini avaliador de JQL =========
+
+CLAUSE_RE = re.compile(
+    r'^\s*(?P<field>"[^"]+"|[\w.\[\]]+)\s*(?P<op>!=|>=|<=|=|>|<|not in|in)\s*(?P<value>.+?)\s*$', re.I
+)
+
+
+def _unquote(v: str) -> str:
+    v = v.strip()
+    return v[1:-1] if len(v) >= 2 and v[0] == v[-1] and v[0] in "\"'" else v
+
+
+def _values(fields: dict, key: str, name: str) -> set:
+    name = _unquote(name).split("[")[0].strip().casefold()
+    if name == "project":
+        return {key.split("-")[0].casefold()}
+    if name == "key":
+        return {key.casefold()}
+    if name == "statuscategory":
+        cat = (fields.get("status") or {}).get("statusCategory") or {}
+        return {str(cat.get("key", "")).casefold(), str(cat.get("name", "")).casefold()}
+    field_id = next((fid for fid, fname in CUSTOM_FIELDS.items() if fname.casefold() == name), name)
+    if field_id.startswith("cf["):
+        field_id = f"customfield_{field_id[3:-1]}"
+    value = fields.get(field_id)
+    items = value if isinstance(value, list) else [value]
+    out = set()
+    for item in items:
+        if isinstance(item, dict):
+            out |= {str(item[k]).casefold() for k in ("value", "name", "key") if item.get(k)}
+        elif item is not None:
+            out.add(str(item).casefold())
+    return out
+
+
+def _relative(value: str):
+    m = re.fullmatch(r"-(\d+)([mhd])", value.strip())
+    if not m:
+        return None
+    n, unit = int(m.group(1)), m.group(2)
+    return datetime.now(timezone.utc) - {"m": timedelta(minutes=n), "h": timedelta(hours=n), "d": timedelta(days=n)}[unit]
+
+
+def _split_top(jql: str, word: str) -> list[str]:
+    """Divide em `word` (and/or) só fora de parênteses e aspas."""
+    sep = re.compile(rf"\s+{word}\s+", re.I)
+    parts, depth, quote, start, i = [], 0, None, 0, 0
+    while i < len(jql):
+        c = jql[i]
+        if quote:
+            quote = None if c == quote else quote
+        elif c in "\"'":
+            quote = c
+        elif c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif depth == 0:
+            m = sep.match(jql, i)
+            if m:
+                parts.append(jql[start:i])
+                start = i = m.end()
+                continue
+        i += 1
+    parts.append(jql[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _unwrap(part: str):
+    """Conteúdo de "( ... )" quando os parênteses envolvem a cláusula inteira; senão None."""
+    if not part.startswith("("):
+        return None
+    depth, quote = 0, None
+    for i, c in enumerate(part):
+        if quote:
+            quote = None if c == quote else quote
+        elif c in "\"'":
+            quote = c
+        elif c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+            if depth == 0:
+                return part[1:-1] if i == len(part) - 1 else None
+    return None
+
+
+def _clauses(jql: str) -> list:
+    """Cláusulas simples ligadas por AND, entrando nos grupos entre parênteses; OR = sem filtro (superconjunto)."""
+    if len(_split_top(jql, "or")) > 1:
+        return []
+    clauses = []
+    for part in _split_top(jql, "and"):
+        inner = _unwrap(part)
+        if inner is not None:
+            clauses += _clauses(inner)
+            continue
+        m = CLAUSE_RE.match(part)
+        if m:
+            clauses.append((m.group("field"), m.group("op").lower(), m.group("value")))
+    return clauses
+
+
+def jql_filter(jql: str):
+    """
+    Suporta AND de cláusulas simples (=, !=, in, not in, >= em updated/created),
+    inclusive dentro de parênteses, como o `(<jql do board>) AND updated >= ...` do
+    incremental. Grupos com OR são ignorados (devolve um superconjunto, o que basta
+    pra quem classifica localmente).
+    """
+    jql = re.split(r"\border\s+by\b", jql, flags=re.I)[0]
+    clauses = _clauses(jql.strip())
+
+    def keep(issue: dict) -> bool:
+        fields = issue["fields"]
+        for field, op, value in clauses:
+            if _unquote(field).lower() in ("updated", "created") and op in (">=", ">"):
+                threshold = _relative(value) or datetime.fromisoformat(_unquote(value).replace(" ", "T")).replace(
+                    tzinfo=timezone(timedelta(hours=-3)))
+                ts = datetime.strptime(fields[_unquote(field).lower()], "%Y-%m-%dT%H:%M:%S.000%z")
+                if ts < threshold:
+                    return False
+                continue
+            if op in ("in", "not in"):
+                wanted = {_unquote(v).casefold() for v in value.strip().strip("()").split(",") if v.strip()}
+            else:
+                wanted = {_unquote(value).casefold()}
+            hit = bool(_values(fields, issue["key"], field) & wanted)
+            if op in ("=", "in") and not hit:
+                return False
+            if op in ("!=", "not in") and hit:
+                return False
+        return True
+
+    return keep
+
+
+# ========= Slack =========
+
+class FakeSlack:
+    def __init__(self, users: int = 300):
+        self.lock = threading.Lock()
+        self.channels = {}
+        self.users = [
+            {"id": f"U{i:08d}", "name": f"user{i}", "updated": 1700000000 + i, "deleted": False,
+             "profile": {"email": f"user{i}@bankeiro.test", "display_name": f"user{i}", "real_name": f"Usuário {i}"}}
+            for i in range(users)
+        ]
+        self.messages = 0
+
+    def _page(self, items: list, params: dict, cap: int = 200):
+        start = int(params.get("cursor") or 0)
+        limit = min(int(params.get("limit") or 100), cap)
+        nxt = str(start + limit) if start + limit < len(items) else ""
+        return items[start:start + limit], {"next_cursor": nxt}
+
+    def handle(self, method: str, p: dict) -> dict:
+        with self.lock:
+            if method == "auth.test":
+                return {"ok": True, "user_id": "U99999999"}
+            if method == "conversations.list":
+                items = sorted(self.channels.values(), key=lambda c: c["id"])
+                if str(p.get("exclude_archived")).lower() == "true":
+                    items = [c for c in items if not c["is_archived"]]
+                page, meta = self._page(items, p, 1000)
+                return {"ok": True, "channels": [
+                    {k: v for k, v in c.items() if k != "members"} | {"num_members": len(c["members"])} for c in page
+                ], "response_metadata": meta}
+            if method == "conversations.create":
+                name = str(p.get("name", "")).lower()
+                if any(c["name"] == name for c in self.channels.values()):
+                    return {"ok": False, "error": "name_taken"}
+                cid = f"C{len(self.channels) + 1:08d}"
+                self.channels[cid] = {"id": cid, "name": name, "is_archived": False,
+                                      "is_private": bool(p.get("is_private")), "members": {"U99999999"}}
+                return {"ok": True, "channel": {"id": cid, "name": name}}
+            if method == "conversations.info":
+                c = self.channels.get(p.get("channel"))
+                if not c:
+                    return {"ok": False, "error": "channel_not_found"}
+                return {"ok": True, "channel": {k: v for k, v in c.items() if k != "members"}}
+            if method == "conversations.members":
+                c = self.channels.get(p.get("channel"))
+                if not c:
+                    return {"ok": False, "error": "channel_not_found"}
+                page, meta = self._page(sorted(c["members"]), p, 1000)
+                return {"ok": True, "members": page, "response_metadata": meta}
+            if method == "conversations.invite":
+                c = self.channels.get(p.get("channel"))
+                if not c:
+                    return {"ok": False, "error": "channel_not_found"}
+                users = [u for u in str(p.get("users", "")).split(",") if u]
+                already = [u for u in users if u in c["members"]]
+                c["members"] |= set(users)
+                if already and not p.get("force"):
+                    return {"ok": False, "error": "already_in_channel"}
+                return {"ok": True, "channel": {"id": c["id"]}}
+            if method == "conversations.kick":
+                c = self.channels.get(p.get("channel"))
+                if not c or p.get("user") not in c["members"]:
+                    return {"ok": False, "error": "not_in_channel"}
+                c["members"].discard(p.get("user"))
+                return {"ok": True}
+            if method in ("conversations.archive", "conversations.unarchive"):
+                c = self.channels.get(p.get("channel"))
+                if not c:
+                    return {"ok": False, "error": "channel_not_found"}
+                archive = method.endswith(".archive")
+                if c["is_archived"] == archive:
+                    return {"ok": False, "error": "already_archived" if archive else "not_archived"}
+                c["is_archived"] = archive
+                return {"ok": True}
+            if method == "users.list":
+                page, meta = self._page(self.users, p, 200)
+                return {"ok": True, "members": page, "response_metadata": meta}
+            if method in ("users.info", "users.lookupByEmail"):
+                for u in self.users:
+                    if u["id"] == p.get("user") or u["profile"]["email"] == p.get("email"):
+                        return {"ok": True, "user": u}
+                return {"ok": False, "error": "users_not_found"}
+            if method in ("chat.postMessage", "chat.update"):
+                self.messages += 1
+                return {"ok": True, "channel": p.get("channel"), "ts": p.get("ts") or f"{time.time():.6f}"}
+            if method == "oauth.v2.access":
+                token = {"access_token": f"xoxe.xoxp-fake-{time.time():.0f}", "refresh_token": "xoxe-1-fake",
+                         "expires_in": 43200}
+                return {"ok": True, "token_type": "bot", **token, "authed_user": {"id": "U99999999", **token}}
+            return {"ok": False, "error": "unknown_method"}
+
+
+# ========= HTTP =========
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = {}
+        self.statuses = {}
+        self.bytes_out = {}
+        self.rate_limited = 0
+        self.issues_served = 0
+
+    def add_issues(self, n: int):
+        with self.lock:
+            self.issues_served += n
+
+    def record(self, endpoint: str, status: int, size: int):
+        with self.lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+            self.bytes_out[endpoint] = self.bytes_out.get(endpoint, 0) + size
+            if status == 429:
+                self.rate_limited += 1
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "requests": dict(self.requests),
+                "total_requests": sum(self.requests.values()),
+                "statuses": dict(self.statuses),
+                "bytes_out": dict(self.bytes_out),
+                "total_bytes_out": sum(self.bytes_out.values()),
+                "rate_limited": self.rate_limited,
+                "issues_served": self.issues_served,
+            }
+
+
+def endpoint_of(path: str) -> str:
+    """Agrupa caminhos com id (/issue/EUR-1/comment -> /issue/{key}/comment)."""
+    path = re.sub(r"/attachment/content/\d+", "/attachment/content/{id}", path)
+    path = re.sub(r"/issue/[^/]+/", "/issue/{key}/", path)
+    return path
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    server_version = "FakeJiraSlack/1.0"
+    _raw_body = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def app(self) -> "FakeServer":
+        return self.server.app
+
+    def _send(self, status: int, body: bytes, ctype="application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+        self.app.stats.record(endpoint_of(urllib.parse.urlparse(self.path).path), status, len(body))
+
+    def _json(self, obj, status=200, headers=None):
+        self._send(status, json.dumps(obj, ensure_ascii=False).encode("utf-8"), headers=headers)
+
+    def _raw(self) -> bytes:
+        # lido 1 vez só: o 429 injetado também precisa consumir o corpo (keep-alive)
+        if self._raw_body is None:
+            n = int(self.headers.get("Content-Length") or 0)
+            self._raw_body = self.rfile.read(n) if n else b""
+        return self._raw_body
+
+    def _body(self):
+        raw = self._raw()
+        if "json" in (self.headers.get("Content-Type") or ""):
+            return json.loads(raw or b"{}")
+        return dict(urllib.parse.parse_qsl(raw.decode()))
+
+    def _throttle(self, path: str) -> bool:
+        cfg = self.app.config
+        if cfg.latency_ms or cfg.jitter_ms:
+            time.sleep((cfg.latency_ms + random.random() * cfg.jitter_ms) / 1000)
+        if path.startswith("/_") or path.startswith("/webhook"):
+            return False
+        if cfg.rate_limit_prob and random.random() < cfg.rate_limit_prob:
+            self._raw()
+            self._json({"ok": False, "error": "ratelimited", "errorMessages": ["Rate limit exceeded"]}, 429,
+                       {"Retry-After": f"{cfg.retry_after:g}"})
+            return True
+        return False
+
+    def do_GET(self):
+        self._raw_body = None
+        u = urllib.parse.urlparse(self.path)
+        params = dict(urllib.parse.parse_qsl(u.query))
+        if self._throttle(u.path):
+            return
+        if u.path == "/_stats":
+            return self._json(self.app.stats.snapshot())
+        if u.path.startswith("/api/"):
+            return self._json(self.app.slack.handle(u.path[5:], params))
+        if u.path == "/rest/api/3/myself":
+            return self._json({"accountId": "acc-1", "timeZone": "America/Sao_Paulo"})
+        if u.path == "/rest/api/3/field":
+            return self._json([{"id": fid, "name": name, "custom": True} for fid, name in CUSTOM_FIELDS.items()])
+        m = re.fullmatch(r"/rest/api/3/attachment/content/(\d+)", u.path)
+        if m:
+            return self._attachment(m.group(1))
+        m = re.fullmatch(r"/rest/api/3/issue/([^/]+)/comment", u.path)
+        if m:
+            issue = self.app.data["issues"].get(m.group(1))
+            if not issue:
+                return self._json({"errorMessages": ["Issue does not exist"]}, 404)
+            start, size = int(params.get("startAt", 0)), int(params.get("maxResults", 50))
+            comments = issue["_comments"]
+            return self._json({"startAt": start, "maxResults": size, "total": len(comments),
+                               "comments": comments[start:start + size]})
+        self._json({"errorMessages": [f"not found: {u.path}"]}, 404)
+
+    def do_POST(self):
+        self._raw_body = None
+        u = urllib.parse.urlparse(self.path)
+        if self._throttle(u.path):
+            return
+        body = self._body()
+        if u.path == "/_reset":
+            self.app.stats.reset()
+            return self._json({"ok": True})
+        if u.path.startswith("/webhook"):
+            self.app.slack.messages += 1
+            return self._send(200, b"ok", "text/plain")
+        if u.path.startswith("/api/"):
+            return self._json(self.app.slack.handle(u.path[5:], body))
+        if u.path == "/rest/api/3/search/jql":
+            return self._search(body)
+        if u.path == "/rest/api/3/changelog/bulkfetch":
+            ids = body.get("issueIdsOrKeys", [])
+            start = int(body.get("nextPageToken") or 0)
+            page = ids[start:start + 100]
+            out = {"issueChangeLogs": [
+                {"issueId": i, "changeHistories": [{"id": "1", "created": "2026-01-01T10:00:00.000-0300",
+                                                     "items": [{"field": "status", "toString": "Develop"}]}]}
+                for i in page
+            ]}
+            if start + 100 < len(ids):
+                out["nextPageToken"] = str(start + 100)
+            return self._json(out)
+        self._json({"errorMessages": [f"not found: {u.path}"]}, 404)
+
+    def _search(self, body: dict):
+        cfg = self.app.config
+        fields = body.get("fields") or []
+        # como o Jira: `key in (...)` com key apagada/movida derruba a busca inteira com 400
+        unknown = self.app.unknown_keys(body.get("jql", ""))
+        if unknown:
+            return self._json({"errorMessages": [
+                f"An issue with key '{k}' does not exist for field 'key'." for k in unknown
+            ], "warningMessages": []}, 400)
+        keep = self.app.jql_cache(body.get("jql", ""))
+        keys = self.app.query_keys(body.get("jql", ""), keep)
+
+        start = int(body.get("nextPageToken") or 0)
+        id_only = set(fields) <= {"id", "key"}
+        limit = min(int(body.get("maxResults") or 50), cfg.id_page_size if id_only else cfg.page_size)
+        page = []
+        for key in keys[start:start + limit]:
+            issue = self.app.data["issues"][key]
+            wanted = {f: v for f, v in issue["fields"].items() if f in fields or "*all" in fields}
+            page.append({"id": issue["id"], "key": key, "fields": wanted})
+        self.app.stats.add_issues(len(page))
+        out = {"issues": page, "isLast": start + limit >= len(keys)}
+        if start + limit < len(keys):
+            out["nextPageToken"] = str(start + limit)
+        self._json(out)
+
+    def _attachment(self, att_id: str):
+        size = self.app.data["attachments"].get(att_id)
+        if size is None:
+            return self._json({"errorMessages": ["Attachment not found"]}, 404)
+        data = attachment_bytes(att_id, size)
+        rng = self.headers.get("Range")
+        if rng:
+            offset = int(rng.split("=", 1)[1].split("-", 1)[0])
+            if offset >= size:
+                return self._send(416, b"", "image/png", {"Content-Range": f"bytes */{size}"})
+            return self._send(206, data[offset:], "image/png",
+                              {"Content-Range": f"bytes {offset}-{size - 1}/{size}", "Accept-Ranges": "bytes"})
+        self._send(200, data, "image/png", {"Accept-Ranges": "bytes"})
+
+
+class FakeServer:
+    """Servidor fake rodando numa thread (pra usar de dentro do benchmark)."""
+
+    def __init__(self, data: dict, config: Config = None, host="127.0.0.1", port=0, slack_users=300):
+        self.data = data
+        self.config = config or Config()
+        self.stats = Stats()
+        self.slack = FakeSlack(slack_users)
+        self._jql = {}
+        self._jql_lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), FakeHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.app = self
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def jql_cache(self, jql: str):
+        with self._jql_lock:
+            if jql not in self._jql:
+                self._jql[jql] = jql_filter(jql)
+            return self._jql[jql]
+
+    def listed_keys(self, jql: str):
+        m = re.search(r"\bkey\s+in\s*\(([^)]*)\)", jql, flags=re.I)
+        return [_unquote(k).upper() for k in m.group(1).split(",") if k.strip()] if m else None
+
+    def unknown_keys(self, jql: str) -> list:
+        return [k for k in self.listed_keys(jql) or [] if k not in self.data["issues"]]
+
+    def query_keys(self, jql: str, keep) -> list:
+        # a paginação precisa de uma ordem estável: key numérica
+        candidates = self.listed_keys(jql)
+        if candidates is not None:
+            candidates = [k for k in candidates if k in self.data["issues"]]
+        else:
+            candidates = list(self.data["issues"])
+        return [k for k in candidates if keep(self.data["issues"][k])]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True, name="fake-server")
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def parse_projects(spec: str) -> dict:
+    out = {}
+    for part in spec.split(","):
+        name, _, count = part.partition("=")
+        out[name.strip().upper()] = int(count or 100)
+    return out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Jira/Slack fake pra benchmark e testes offline")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--issues", default="EUR=1000,PLTF=1000", help="issues por projeto: EUR=1000,PLTF=500")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--attachments-per-issue", type=float, default=1.0)
+    parser.add_argument("--attachment-kb", type=int, default=64)
+    parser.add_argument("--shared-attachments", type=float, default=0.2, help="fração de anexos repetidos entre issues")
+    parser.add_argument("--page-size", type=int, default=100, help="teto de issues por página da busca")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rate-limit-prob", type=float, default=0.0, help="chance de responder 429 em cada chamada")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After (s) dos 429 injetados")
+    parser.add_argument("--slack-users", type=int, default=300)
+    args = parser.parse_args()
+
+    base = f"http://{args.host}:{args.port}"
+    data = make_dataset(
+        parse_projects(args.issues), seed=args.seed, attachments_per_issue=args.attachments_per_issue,
+        attachment_kb=args.attachment_kb, shared_attachments=args.shared_attachments, base_url=base,
+    )
+    config = Config(args.latency_ms, args.jitter_ms, args.page_size, rate_limit_prob=args.rate_limit_prob,
+                    retry_after=args.retry_after)
+    server = FakeServer(data, config, args.host, args.port, args.slack_users)
+    print(f"Fake Jira/Slack em {base} ({len(data['issues'])} issues, {len(data['attachments'])} anexos)")
+    print(f"  JIRA_BASE={base}  SLACK_API_URL={base}/api/  SLACK_WEBHOOK_URL={base}/webhook/bench")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    sys.exit(0)
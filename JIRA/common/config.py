@@ -0,0 +1,57 @@
+import os
+import pathlib
+from contextlib import contextmanager
+
+from dotenv import find_dotenv, load_dotenv
+
+# Configuração das ferramentas: nada é lido nem validado no import dos módulos;
+# cada ferramenta chama require_env() quando vai rodar (script, CLI apmo ou worker).
+
+
+class ConfigError(RuntimeError):
+    """Variável obrigatória faltando no .env / ambiente (ou parâmetro inválido na linha de comando)."""
+
+
+def load_env(folder: pathlib.Path = None):
+    """
+    .env da pasta atual (ou acima) e, se existir, o da pasta da ferramenta (ou acima),
+    como o load_dotenv() de cada script fazia. O que já está no ambiente não é sobrescrito.
+    """
+    load_dotenv(find_dotenv(usecwd=True))
+    if folder is not None:
+        for d in (folder, *folder.parents):
+            if (d / ".env").is_file():
+                load_dotenv(d / ".env")
+                break
+
+
+def require_env(*names: str) -> list[str]:
+    """Valores das variáveis na ordem pedida; ConfigError listando as que faltam."""
+    missing = [n for n in names if not os.getenv(n)]
+    if missing:
+        raise ConfigError(f"Faltou configurar {' / '.join(missing)} no .env")
+    return [os.getenv(n) for n in names]
+
+
+def jira_auth() -> dict:
+    """
+    Credenciais do Jira como kwargs do JiraClient: JIRA_AUTH_HEADER pronto
+    ("Basic ..."/"Bearer ...") ou JIRA_EMAIL + JIRA_TOKEN.
+    """
+    auth_header = os.getenv("JIRA_AUTH_HEADER")
+    if auth_header:
+        return {"auth_header": auth_header}
+    try:
+        email, token = require_env("JIRA_EMAIL", "JIRA_TOKEN")
+    except ConfigError as e:
+        raise ConfigError(f"{e} (ou JIRA_AUTH_HEADER)") from None
+    return {"email": email, "token": token}
+
+
+@contextmanager
+def exit_on_config_error():
+    """No terminal, configuração faltando vira só a mensagem (sem traceback)."""
+    try:
+        yield
+    except ConfigError as e:
+        raise SystemExit(str(e)) from None
@@ -0,0 +1,273 @@
+import time
+import random
+import asyncio
+import hashlib
+import pathlib
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+
+from common.metrics import METRICS, MetricsSession
+from common.ratelimit import RateLimiter
+
+# status que valem nova tentativa (além do 429, que passa pelo RateLimiter)
+RETRY_STATUSES = {500, 502, 503, 504}
+
+SEARCH_PATH = "/rest/api/3/search/jql"
+
+
+class JiraClient:
+    """
+    Client HTTP único pro Jira Cloud, usado pelo backup e pelo relatório do Bankeiro:
+    - Session com keep-alive e pool de conexões (sem novo handshake TLS a cada chamada)
+    - gzip/deflate nas respostas
+    - RateLimiter compartilhado + retry/backoff unificado pra 429 e 5xx
+    - enhanced search paginada por nextPageToken, em streaming com prefetch
+    - execução assíncrona opcional (submit / arequest)
+    - toda chamada, retry e espera registrados no METRICS (common.metrics)
+    """
+
+    def __init__(
+        self,
+        base: str,
+        email: str = None,
+        token: str = None,
+        auth_header: str = None,
+        rate: float = 10,
+        burst: int = 20,
+        pool_size: int = 10,
+        max_retries: int = 8,
+    ):
+        self.base = base.rstrip("/")
+        self.max_retries = max_retries
+        self.pool_size = pool_size
+        self.limiter = RateLimiter(rate, burst)
+        self._executor = None
+
+        self.session = MetricsSession("jira")
+        self.session.headers.update({
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+        })
+        if auth_header:
+            self.session.headers["Authorization"] = auth_header
+        elif email and token:
+            self.session.auth = HTTPBasicAuth(email, token)
+
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    # ========= transporte =========
+
+    def request(self, method: str, path: str, timeout=120, max_retries: int = None, **kwargs) -> requests.Response:
+        """
+        Faz a requisição com rate limit + retry. Devolve a última Response
+        (o chamador decide o que fazer com status de erro).
+        """
+        url = path if path.startswith("http") else f"{self.base}{path}"
+        max_retries = max_retries or self.max_retries
+
+        for attempt in range(1, max_retries + 1):
+            self.limiter.acquire()
+            try:
+                r = self.session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == max_retries:
+                    raise
+                wait_s = backoff(attempt)
+                print(f"  Erro de rede em {method} {path} ({e.__class__.__name__}). Tentativa {attempt}/{max_retries}. Aguardando {wait_s:.1f}s...")
+                METRICS.retry("jira", "network")
+                time.sleep(wait_s)
+                METRICS.slept("jira", "backoff", wait_s)
+                continue
+
+            # Rate limit (o RateLimiter já segura as outras threads até passar o Retry-After)
+            wait_s = self.limiter.observe(r, attempt)
+            if wait_s is not None and attempt < max_retries:
+                r.close()
+                print(f"  429 em {method} {path}. Tentativa {attempt}/{max_retries}. Aguardando {wait_s:.1f}s...")
+                METRICS.retry("jira", str(r.status_code))
+                continue
+
+            if r.status_code in RETRY_STATUSES and attempt < max_retries:
+                r.close()
+                wait_s = backoff(attempt)
+                print(f"  {r.status_code} em {method} {path}. Tentativa {attempt}/{max_retries}. Aguardando {wait_s:.1f}s...")
+                METRICS.retry("jira", str(r.status_code))
+                time.sleep(wait_s)
+                METRICS.slept("jira", "backoff", wait_s)
+                continue
+
+            return r
+        return r
+
+    def request_json(self, method: str, path: str, **kwargs) -> dict:
+        r = self.request(method, path, **kwargs)
+        r.raise_for_status()
+        return r.json()
+
+    def get(self, path: str, params: dict = None, timeout=60, **kwargs) -> dict:
+        return self.request_json("GET", path, params=params, timeout=timeout, **kwargs)
+
+    def post(self, path: str, body: dict, timeout=120, **kwargs) -> dict:
+        return self.request_json("POST", path, json=body, timeout=timeout, **kwargs)
+
+    # ========= execução assíncrona opcional =========
+
+    def executor(self) -> ThreadPoolExecutor:
+        """Executor do próprio client (criado sob demanda, do tamanho do pool de conexões)."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="jira")
+        return self._executor
+
+    def submit(self, method: str, path: str, **kwargs) -> Future:
+        """Dispara a requisição no executor do client e devolve um Future."""
+        return self.executor().submit(self.request_json, method, path, **kwargs)
+
+    async def arequest(self, method: str, path: str, **kwargs) -> dict:
+        """Versão asyncio de request_json (roda no executor, sem bloquear o event loop)."""
+        return await asyncio.wrap_future(self.submit(method, path, **kwargs))
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.session.close()
+
+    # ========= enhanced search =========
+
+    def search_pages(self, jql: str, fields: list, page_size=100, log=print, start_token=None):
+        """
+        Enhanced search (POST /rest/api/3/search/jql) página a página:
+        pagina usando nextPageToken (não startAt) e entrega (issues, next_token).
+        A próxima página já é buscada em background enquanto o chamador
+        processa a atual, então no máximo 2 páginas ficam em memória.
+        - `log` recebe o progresso por página (None = silencioso)
+        - `start_token` retoma a busca a partir de um nextPageToken salvo
+        """
+        body = {
+            "jql": jql,
+            "maxResults": page_size,
+            "fields": fields,
+        }
+        first = {**body, "nextPageToken": start_token} if start_token else body
+        total = 0
+        page = 0
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch") as prefetch:
+            next_page = prefetch.submit(self.post, SEARCH_PATH, body=first, timeout=180)
+
+            while next_page is not None:
+                data = next_page.result()
+                page += 1
+
+                next_token = data.get("nextPageToken")  # se vier, tem próxima página
+                if next_token:
+                    # Proteção anti-loop (nunca deveria acontecer)
+                    if page > 5000:
+                        raise RuntimeError("Paginação estourou 5000 páginas — algo errado com nextPageToken.")
+                    next_page = prefetch.submit(
+                        self.post, SEARCH_PATH,
+                        body={**body, "nextPageToken": next_token}, timeout=180,
+                    )
+                else:
+                    # Regra de parada: sem token = acabou (ou Atlassian resolveu devolver tudo numa página)
+                    next_page = None
+
+                issues = data.get("issues", []) or []
+                del data
+                total += len(issues)
+                if log:
+                    log(f"  - página {page}: +{len(issues)} issues (acumulado={total}) token={'SIM' if next_token else 'NÃO'}")
+
+                yield issues, next_token
+
+    def search(self, jql: str, fields: list, page_size=100, log=print, start_token=None, on_page=None):
+        """
+        Mesma busca de search_pages(), mas entregando issue por issue.
+        - `on_page(next_token)` é chamado quando o chamador termina a última issue
+          de cada página (next_token=None na última página)
+        """
+        for issues, next_token in self.search_pages(jql, fields, page_size, log=log, start_token=start_token):
+            # solta cada issue assim que o chamador termina com ela
+            issues.reverse()
+            while issues:
+                yield issues.pop()
+
+            if on_page:
+                on_page(next_token)
+
+    # ========= anexos =========
+
+    def download(self, url: str, dest: pathlib.Path, resume: bool = False):
+        """
+        Baixa um anexo em streaming (429/5xx já tratados em request()).
+        - resume=True: se `dest` já tem bytes (ex.: .part de uma execução que caiu),
+          pede só o resto com `Range: bytes=N-`
+        - queda no meio do stream também continua de onde parou, com Range
+        Retorna o SHA-256 (hex) do arquivo salvo, ou None se falhou.
+        """
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if not resume:
+            dest.unlink(missing_ok=True)
+
+        for attempt in range(1, self.max_retries + 1):
+            offset = dest.stat().st_size if dest.exists() else 0
+            headers = {"Accept": "*/*"}
+            if offset:
+                headers["Range"] = f"bytes={offset}-"
+
+            r = self.request("GET", url, headers=headers, stream=True, timeout=180)
+
+            # Range além do fim: o .part já estava completo
+            if r.status_code == 416 and offset:
+                r.close()
+                return file_sha256(dest)
+
+            # OK (206 = continua o .part; 200 = servidor ignorou o Range, recomeça)
+            if r.status_code in (200, 206):
+                append = r.status_code == 206 and offset > 0
+                digest = file_sha256(dest, hexdigest=False) if append else hashlib.sha256()
+                try:
+                    with open(dest, "ab" if append else "wb") as f:
+                        for chunk in r.iter_content(chunk_size=1024 * 256):
+                            if chunk:
+                                f.write(chunk)
+                                digest.update(chunk)
+                except (requests.ConnectionError, requests.exceptions.ChunkedEncodingError) as e:
+                    if attempt == self.max_retries:
+                        raise
+                    wait_s = backoff(attempt)
+                    print(f"    Download interrompido ({e.__class__.__name__}); continua com Range em {wait_s:.1f}s...")
+                    METRICS.retry("jira", "stream")
+                    time.sleep(wait_s)
+                    METRICS.slept("jira", "backoff", wait_s)
+                    continue
+                return digest.hexdigest()
+
+            # Outros erros: mostra detalhe e pula (não derruba o backup inteiro)
+            try:
+                body_preview = r.text[:300]
+            except Exception:
+                body_preview = "<sem body>"
+
+            print(f"    ERRO {r.status_code} ao baixar {url}")
+            print(f"    Body (preview): {body_preview}")
+            return None
+        return None
+
+
+def file_sha256(path: pathlib.Path, hexdigest: bool = True):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest() if hexdigest else h
+
+
+def backoff(attempt: int, cap: float = 60) -> float:
+    # backoff exponencial: 2,4,8,16... + jitter
+    return min(cap, 2 ** attempt) + random.random()
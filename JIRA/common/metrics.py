@@ -0,0 +1,306 @@
+import os
+import re
+import sys
+import json
+import time
+import pathlib
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import urlparse
+
+import requests
+
+# Telemetria de todas as chamadas HTTP das ferramentas (Jira, Slack, webhook):
+# latência por endpoint, status, retries, tempo dormindo (rate limit/backoff) e bytes.
+# Cada execução grava um resumo JSON + um textfile do Prometheus (node_exporter textfile collector).
+METRICS_DIR = pathlib.Path(os.getenv("APMO_METRICS_DIR", pathlib.Path(__file__).resolve().parents[1] / "metrics"))
+TEXTFILE_DIR = pathlib.Path(os.getenv("APMO_METRICS_TEXTFILE_DIR", METRICS_DIR))
+METRICS_ENABLED = os.getenv("APMO_METRICS", "1") == "1"
+
+# limites (segundos) dos buckets do histograma de latência
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# ids no caminho viram placeholder (senão cada issue/anexo vira uma série nova)
+_PATH_RULES = [
+    (re.compile(r"/[A-Z][A-Z0-9_]+-\d+(?=/|$)"), "/{key}"),
+    (re.compile(r"(?<!/api)/\d+(?=/|$)"), "/{id}"),
+]
+
+
+def endpoint_label(url: str) -> str:
+    """URL -> rótulo estável: /rest/api/3/issue/{key}/comment, conversations.invite, webhook."""
+    u = urlparse(url)
+    path = u.path
+    if u.netloc == "hooks.slack.com" or "/webhook" in path:
+        return "webhook"
+    if "/api/" in path and not path.startswith("/rest/"):
+        return path.rsplit("/api/", 1)[1].strip("/")  # método da Web API do Slack
+    for pattern, repl in _PATH_RULES:
+        path = pattern.sub(repl, path)
+    return path
+
+
+def _finite(value):
+    """JSON não tem infinito: quantil acima do último bucket vai como null no resumo."""
+    return None if value == float("inf") else value
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # último = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, limit in enumerate(self.buckets):
+            if value <= limit:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float):
+        """Aproximação pelo limite do bucket (suficiente pra p50/p95 no resumo); acima do último, inf."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for limit, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= target:
+                return limit
+        return float("inf")
+
+    def cumulative(self):
+        total = 0
+        for limit, n in zip(self.buckets + (float("inf"),), self.counts):
+            total += n
+            yield limit, total
+
+
+class Metrics:
+    """
+    Registro do processo (1 por execução de ferramenta), thread-safe.
+    JiraClient / SlackClient / webhook registram aqui via MetricsSession e
+    RateLimiter; `run(tool)` grava os arquivos no fim.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tool = pathlib.Path(sys.argv[0]).stem or "python"
+        self.reset()
+
+    def reset(self):
+        """Zera os contadores (cada run() de um processo que roda várias ferramentas começa do zero)."""
+        self.started = time.time()
+        self.success = None
+        self.latency = {}      # (service, endpoint) -> Histogram
+        self.statuses = {}     # (service, endpoint, status) -> n
+        self.bytes_in = {}     # (service, endpoint) -> bytes recebidos
+        self.bytes_out = {}    # (service, endpoint) -> bytes enviados
+        self.retries = {}      # (service, reason) -> n
+        self.sleep = {}        # (service, reason) -> segundos (somados entre threads)
+
+    def observe_request(self, service: str, endpoint: str, status, seconds: float, bytes_in: int, bytes_out: int):
+        key = (service, endpoint)
+        with self.lock:
+            if key not in self.latency:
+                self.latency[key] = Histogram()
+            self.latency[key].observe(seconds)
+            skey = (service, endpoint, str(status))
+            self.statuses[skey] = self.statuses.get(skey, 0) + 1
+            self.bytes_in[key] = self.bytes_in.get(key, 0) + bytes_in
+            self.bytes_out[key] = self.bytes_out.get(key, 0) + bytes_out
+
+    def retry(self, service: str, reason: str):
+        with self.lock:
+            self.retries[(service, reason)] = self.retries.get((service, reason), 0) + 1
+
+    def slept(self, service: str, reason: str, seconds: float):
+        if seconds <= 0:
+            return
+        with self.lock:
+            self.sleep[(service, reason)] = self.sleep.get((service, reason), 0.0) + seconds
+
+    # ========= saída =========
+
+    def summary(self) -> dict:
+        with self.lock:
+            endpoints = []
+            for (service, endpoint), hist in sorted(self.latency.items()):
+                endpoints.append({
+                    "service": service,
+                    "endpoint": endpoint,
+                    "requests": hist.count,
+                    "latency_sum_s": round(hist.sum, 3),
+                    "latency_avg_s": round(hist.sum / hist.count, 4) if hist.count else None,
+                    "latency_p50_s": _finite(hist.quantile(0.5)),
+                    "latency_p95_s": _finite(hist.quantile(0.95)),
+                    "statuses": {s: n for (sv, ep, s), n in sorted(self.statuses.items())
+                                 if sv == service and ep == endpoint},
+                    "bytes_in": self.bytes_in.get((service, endpoint), 0),
+                    "bytes_out": self.bytes_out.get((service, endpoint), 0),
+                })
+            duration = time.time() - self.started
+            return {
+                "tool": self.tool,
+                "started_at": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+                "duration_s": round(duration, 3),
+                "success": self.success,
+                "requests": sum(h.count for h in self.latency.values()),
+                "http_time_s": round(sum(h.sum for h in self.latency.values()), 3),
+                "bytes_in": sum(self.bytes_in.values()),
+                "bytes_out": sum(self.bytes_out.values()),
+                "retries": {f"{s}:{r}": n for (s, r), n in sorted(self.retries.items())},
+                "sleep_s": {f"{s}:{r}": round(v, 3) for (s, r), v in sorted(self.sleep.items())},
+                "endpoints": endpoints,
+            }
+
+    def prometheus(self) -> str:
+        tool = _label(self.tool)
+        lines = []
+
+        def metric(name, kind, help_text):
+            lines.append(f"# HELP apmo_{name} {help_text}")
+            lines.append(f"# TYPE apmo_{name} {kind}")
+
+        with self.lock:
+            metric("http_request_duration_seconds", "histogram", "Latência das requisições HTTP por endpoint.")
+            for (service, endpoint), hist in sorted(self.latency.items()):
+                base = f'tool="{tool}",service="{_label(service)}",endpoint="{_label(endpoint)}"'
+                for limit, total in hist.cumulative():
+                    le = "+Inf" if limit == float("inf") else f"{limit:g}"
+                    lines.append(f'apmo_http_request_duration_seconds_bucket{{{base},le="{le}"}} {total}')
+                lines.append(f"apmo_http_request_duration_seconds_sum{{{base}}} {hist.sum:.6f}")
+                lines.append(f"apmo_http_request_duration_seconds_count{{{base}}} {hist.count}")
+
+            metric("http_responses_total", "counter", "Respostas HTTP por endpoint e status.")
+            for (service, endpoint, status), n in sorted(self.statuses.items()):
+                lines.append(f'apmo_http_responses_total{{tool="{tool}",service="{_label(service)}",'
+                             f'endpoint="{_label(endpoint)}",status="{status}"}} {n}')
+
+            for name, data, help_text in (
+                ("http_response_bytes_total", self.bytes_in, "Bytes recebidos por endpoint."),
+                ("http_request_bytes_total", self.bytes_out, "Bytes enviados por endpoint."),
+            ):
+                metric(name, "counter", help_text)
+                for (service, endpoint), n in sorted(data.items()):
+                    lines.append(f'apmo_{name}{{tool="{tool}",service="{_label(service)}",'
+                                 f'endpoint="{_label(endpoint)}"}} {n}')
+
+            metric("http_retries_total", "counter", "Novas tentativas por motivo (429, 5xx, rede).")
+            for (service, reason), n in sorted(self.retries.items()):
+                lines.append(f'apmo_http_retries_total{{tool="{tool}",service="{_label(service)}",reason="{reason}"}} {n}')
+
+            metric("http_sleep_seconds_total", "counter", "Tempo parado esperando rate limit / backoff.")
+            for (service, reason), v in sorted(self.sleep.items()):
+                lines.append(f'apmo_http_sleep_seconds_total{{tool="{tool}",service="{_label(service)}",reason="{reason}"}} {v:.3f}')
+
+        metric("run_duration_seconds", "gauge", "Duração da última execução.")
+        lines.append(f'apmo_run_duration_seconds{{tool="{tool}"}} {time.time() - self.started:.3f}')
+        metric("run_last_timestamp_seconds", "gauge", "Quando a última execução gravou as métricas.")
+        lines.append(f'apmo_run_last_timestamp_seconds{{tool="{tool}"}} {time.time():.0f}')
+        if self.success is not None:
+            metric("run_success", "gauge", "1 se a última execução terminou sem erro.")
+            lines.append(f'apmo_run_success{{tool="{tool}"}} {int(self.success)}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, final: bool = False):
+        """
+        Grava o textfile do Prometheus (<tool>.prom, sobrescrito) e, no fim da
+        execução, o resumo JSON (<tool>-<data>.json, 1 por execução).
+        """
+        if not METRICS_ENABLED:
+            return None
+        TEXTFILE_DIR.mkdir(parents=True, exist_ok=True)
+        _atomic_write(TEXTFILE_DIR / f"{self.tool}.prom", self.prometheus())
+        if not final:
+            return None
+        METRICS_DIR.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.fromtimestamp(self.started).strftime("%Y%m%d-%H%M%S")
+        path = METRICS_DIR / f"{self.tool}-{stamp}.json"
+        _atomic_write(path, json.dumps(self.summary(), indent=2, ensure_ascii=False))
+        return path
+
+    @contextmanager
+    def run(self, tool: str):
+        """Envolve a execução de uma ferramenta: marca sucesso/erro e grava as métricas no fim."""
+        self.tool = tool
+        with self.lock:
+            self.reset()
+        try:
+            yield self
+            self.success = True
+        except BaseException as e:
+            self.success = isinstance(e, SystemExit) and not e.code
+            raise
+        finally:
+            try:
+                path = self.write(final=True)
+            except OSError as e:
+                print(f"Não consegui gravar as métricas: {e}")
+            else:
+                if path:
+                    s = self.summary()
+                    waited = sum(self.sleep.values())
+                    print(f"Métricas: {s['requests']} requisições, {s['bytes_in'] / 1e6:.1f} MB recebidos, "
+                          f"{waited:.1f}s (somando threads) esperando rate limit/backoff -> {path}")
+
+
+def _label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def _atomic_write(path: pathlib.Path, text: str):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as fp:
+        fp.write(text)
+        fp.flush()
+        os.fsync(fp.fileno())
+    os.replace(tmp, path)
+
+
+METRICS = Metrics()
+
+
+class MetricsSession(requests.Session):
+    """
+    requests.Session que registra cada chamada no METRICS (latência, status, bytes).
+    Em stream=True a latência é até os headers; os bytes vêm do Content-Length
+    (o corpo é lido depois, por quem chamou).
+    """
+
+    def __init__(self, service: str, metrics: Metrics = METRICS):
+        super().__init__()
+        self.service = service
+        self.metrics = metrics
+
+    def request(self, method, url, *args, **kwargs):
+        endpoint = endpoint_label(url)
+        started = time.perf_counter()
+        try:
+            r = super().request(method, url, *args, **kwargs)
+        except requests.RequestException as e:
+            self.metrics.observe_request(self.service, endpoint, e.__class__.__name__,
+                                         time.perf_counter() - started, 0, 0)
+            raise
+        elapsed = time.perf_counter() - started
+
+        body = r.request.body
+        sent = len(body) if isinstance(body, (bytes, str)) else 0
+        if kwargs.get("stream"):
+            received = int(r.headers.get("Content-Length") or 0)
+        else:
+            received = len(r.content)
+        self.metrics.observe_request(self.service, endpoint, r.status_code, elapsed, received, sent)
+        return r
+
+
+def post(service: str, url: str, **kwargs) -> requests.Response:
+    """POST avulso instrumentado (webhook do Slack, oauth.v2.access)."""
+    with MetricsSession(service) as session:
+        return session.post(url, **kwargs)
@@ -0,0 +1,121 @@
+import time
+import random
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from common.metrics import METRICS
+
+
+class RateLimiter:
+    """
+    Token bucket global, compartilhado por TODAS as requisições de um client
+    (busca + anexos, de todos os boards e threads).
+    - acquire() bloqueia até existir token
+    - observe(resp) ajusta a taxa pelos headers do Jira:
+      Retry-After / X-RateLimit-Reset pausam todo mundo;
+      X-RateLimit-Remaining / X-RateLimit-NearLimit reduzem a taxa;
+      respostas OK sobem a taxa devagar até o teto configurado
+    - o tempo parado em acquire() vai pro METRICS em nome de `service`
+      ("retry_after" = pausa por 429, "throttle" = taxa do bucket)
+    """
+
+    def __init__(self, rate: float, burst: int, min_rate: float = 0.5, service: str = "jira"):
+        self.service = service
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.blocked_until:
+                    wait_s = self.blocked_until - now
+                    reason = "retry_after"
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                else:
+                    wait_s = (1 - self.tokens) / self.rate
+                    reason = "throttle"
+            time.sleep(wait_s)
+            METRICS.slept(self.service, reason, wait_s)
+
+    def pause(self, seconds: float):
+        """Bloqueia o bucket inteiro por `seconds` e corta a taxa pela metade."""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0.0
+
+    def observe(self, r: requests.Response, attempt: int = 1):
+        """
+        Lê os headers de rate limit da resposta.
+        Retorna quantos segundos esperar se foi 429 (ou 503 com Retry-After), senão None.
+        """
+        h = r.headers
+
+        if r.status_code == 429 or (r.status_code == 503 and h.get("Retry-After")):
+            wait_s = parse_retry_after(h.get("Retry-After"))
+            if wait_s is None:
+                wait_s = parse_reset(h.get("X-RateLimit-Reset"))
+            if wait_s is None:
+                # backoff exponencial: 2,4,8,16... + jitter
+                wait_s = min(60, 2 ** attempt) + random.random()
+            self.pause(wait_s)
+            return wait_s
+
+        remaining = h.get("X-RateLimit-Remaining")
+        limit = h.get("X-RateLimit-Limit")
+        near_limit = h.get("X-RateLimit-NearLimit", "").lower() == "true"
+        if remaining and limit and remaining.isdigit() and limit.isdigit() and int(limit) > 0:
+            near_limit = near_limit or int(remaining) < int(limit) * 0.2
+
+        with self.lock:
+            if near_limit:
+                self.rate = max(self.min_rate, self.rate * 0.75)
+            else:
+                self.rate = min(self.max_rate, self.rate + 0.1)
+        return None
+
+
+def parse_retry_after(value):
+    """Retry-After pode vir em segundos ou como data HTTP."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (dt - datetime.now(timezone.utc)).total_seconds())
+
+
+def parse_reset(value):
+    """X-RateLimit-Reset vem como timestamp ISO 8601."""
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return max(0.0, (dt - datetime.now(timezone.utc)).total_seconds())
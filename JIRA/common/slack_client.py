@@ -0,0 +1,168 @@
+import os
+import time
+import random
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from common.metrics import METRICS, MetricsSession
+from common.ratelimit import RateLimiter
+
+# SLACK_API_URL aponta pra outro servidor (ex.: fake local pra testes/benchmark)
+SLACK_API = os.getenv("SLACK_API_URL", "https://slack.com/api/")
+
+# chamadas por minuto de cada tier da Web API do Slack (limite por método, por workspace)
+TIER_PER_MINUTE = {1: 1, 2: 20, 3: 50, 4: 100}
+
+METHOD_TIERS = {
+    "auth.test": 4,          # "special", bem acima do tier 4
+    "conversations.create": 2,
+    "conversations.list": 2,
+    "conversations.archive": 2,
+    "conversations.unarchive": 2,
+    "conversations.info": 3,
+    "conversations.invite": 3,
+    "conversations.kick": 3,
+    "conversations.members": 4,
+    "users.list": 2,
+    "users.info": 4,
+    "users.lookupByEmail": 3,
+    "chat.postMessage": 4,   # "special": ~1/s por canal
+    "chat.update": 3,
+    "oauth.v2.access": 4,
+}
+DEFAULT_TIER = 3
+
+# multiplica a taxa de todos os tiers (só pra servidor fake/benchmark; no Slack real fica 1)
+RATE_SCALE = float(os.getenv("SLACK_RATE_SCALE", "1"))
+
+RETRY_STATUSES = {500, 502, 503, 504}
+
+
+class SlackError(RuntimeError):
+    def __init__(self, method: str, data: dict):
+        self.method = method
+        self.error = data.get("error", "unknown_error")
+        self.data = data
+        super().__init__(f"{method}: {self.error}")
+
+
+class SlackClient:
+    """
+    Client da Web API do Slack usado pelas ferramentas de canais:
+    - Session com keep-alive e pool de conexões
+    - 1 RateLimiter por método, na taxa do tier dele (METHOD_TIERS)
+    - 429 respeita o Retry-After (só o método que estourou fica parado)
+    - paginação por cursor (response_metadata.next_cursor)
+    - `token` pode ser string ou um SlackToken (common.slack_tokens): aí cada
+      chamada usa o access token válido do momento e token_expired renova 1x
+    """
+
+    def __init__(self, token, pool_size: int = 8, max_retries: int = 6, burst: int = 3, base: str = SLACK_API):
+        self.token = token
+        self.base = base.rstrip("/") + "/"
+        self.max_retries = max_retries
+        self.burst = burst
+        self.limiters = {}
+        self.limiters_lock = threading.Lock()
+
+        self.session = MetricsSession("slack")
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def limiter(self, method: str) -> RateLimiter:
+        with self.limiters_lock:
+            if method not in self.limiters:
+                per_minute = TIER_PER_MINUTE[METHOD_TIERS.get(method, DEFAULT_TIER)]
+                self.limiters[method] = RateLimiter(per_minute * RATE_SCALE / 60, self.burst, service="slack")
+            return self.limiters[method]
+
+    def _headers(self) -> dict:
+        token = self.token() if callable(self.token) else self.token
+        return {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json; charset=utf-8"
+        }
+
+    def request(self, method: str, http: str = "POST", check: bool = False, **params) -> dict:
+        """
+        Chama `method` (POST com JSON ou GET com query string) e devolve o JSON.
+        check=True levanta SlackError quando a resposta vem com ok=false.
+        """
+        data = self._send(method, http, params).json()
+        if data.get("error") == "token_expired" and hasattr(self.token, "refresh"):
+            # não devia acontecer (o TokenManager renova antes), mas se o relógio/rotação falhar
+            self.token.refresh()
+            data = self._send(method, http, params).json()
+        if check and not data.get("ok"):
+            raise SlackError(method, data)
+        return data
+
+    def _send(self, method: str, http: str, params: dict) -> requests.Response:
+        limiter = self.limiter(method)
+        url = self.base + method
+
+        for attempt in range(1, self.max_retries + 1):
+            limiter.acquire()
+            try:
+                if http == "GET":
+                    # query string: booleanos como true/false
+                    query = {k: str(v).lower() if isinstance(v, bool) else v for k, v in params.items()}
+                    r = self.session.get(url, headers=self._headers(), params=query, timeout=60)
+                else:
+                    r = self.session.post(url, headers=self._headers(), json=params, timeout=60)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries:
+                    raise
+                wait_s = backoff(attempt)
+                print(f"  Network error on {method} ({e.__class__.__name__}). Retry {attempt}/{self.max_retries} in {wait_s:.1f}s...")
+                METRICS.retry("slack", "network")
+                time.sleep(wait_s)
+                METRICS.slept("slack", "backoff", wait_s)
+                continue
+
+            # 429: o limiter do método segura todas as threads até passar o Retry-After
+            wait_s = limiter.observe(r, attempt)
+            if wait_s is not None and attempt < self.max_retries:
+                print(f"  429 on {method}. Retry {attempt}/{self.max_retries} in {wait_s:.1f}s...")
+                METRICS.retry("slack", "429")
+                continue
+
+            if r.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                wait_s = backoff(attempt)
+                print(f"  {r.status_code} on {method}. Retry {attempt}/{self.max_retries} in {wait_s:.1f}s...")
+                METRICS.retry("slack", str(r.status_code))
+                time.sleep(wait_s)
+                METRICS.slept("slack", "backoff", wait_s)
+                continue
+            break
+        return r
+
+    def call(self, method: str, **params) -> dict:
+        """POST com JSON (métodos de escrita)."""
+        return self.request(method, "POST", **params)
+
+    def get(self, method: str, **params) -> dict:
+        """GET com query string (métodos de leitura)."""
+        return self.request(method, "GET", **params)
+
+    def paginate(self, method: str, key: str, limit: int = 200, **params):
+        """Itera todos os itens de `key` seguindo o next_cursor."""
+        params = {**params, "limit": limit}
+        while True:
+            data = self.request(method, "GET", check=True, **params)
+            yield from data.get(key, []) or []
+            cursor = (data.get("response_metadata") or {}).get("next_cursor")
+            if not cursor:
+                break
+            params["cursor"] = cursor
+
+    def close(self):
+        self.session.close()
+
+
+def backoff(attempt: int, cap: float = 60) -> float:
+    # backoff exponencial: 2,4,8,16... + jitter
+    return min(cap, 2 ** attempt) + random.random()
@@ -0,0 +1,200 @@
+import os
+import json
+import time
+import pathlib
+import threading
+from contextlib import contextmanager
+
+from common import metrics
+from common.config import ConfigError
+from common.slack_client import SLACK_API
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# arquivo compartilhado por todas as ferramentas (slack.py, archive_channel.py, Bankeiro)
+TOKEN_FILE = pathlib.Path(os.getenv(
+    "SLACK_TOKEN_FILE", pathlib.Path(__file__).resolve().parents[1] / ".slack_tokens.json"
+))
+REFRESH_MARGIN = int(os.getenv("SLACK_TOKEN_REFRESH_MARGIN", "600"))  # renova X segundos antes de expirar
+
+# token estático do .env usado enquanto não existe token rotacionado no arquivo
+ENV_TOKENS = {"user": "SLACK_USER_TOKEN", "bot": "SLACK_BOT_TOKEN"}
+
+
+@contextmanager
+def file_lock(path: pathlib.Path):
+    """Lock exclusivo entre processos (arquivo .lock ao lado do arquivo de tokens)."""
+    lock_path = path.with_name(path.name + ".lock")
+    with open(lock_path, "a+") as fp:
+        if fcntl is not None:
+            fcntl.flock(fp.fileno(), fcntl.LOCK_EX)
+        else:
+            fp.seek(0)
+            msvcrt.locking(fp.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fp.fileno(), fcntl.LOCK_UN)
+            else:
+                fp.seek(0)
+                msvcrt.locking(fp.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class TokenManager:
+    """
+    Tokens OAuth do Slack com rotação (access + refresh), guardados em TOKEN_FILE:
+      {"user": {"access_token", "refresh_token", "expires_at"}, "bot": {...}}
+    - get() devolve um access token válido; se faltam menos de REFRESH_MARGIN
+      segundos pra expirar, renova antes (oauth.v2.access, grant_type=refresh_token)
+    - leitura/renovação sob lock de arquivo: vários processos usando o mesmo
+      arquivo renovam uma vez só e todos enxergam o token novo
+    - o token fica em memória até perto de expirar (sem ler o arquivo a cada chamada)
+    - sem entrada no arquivo: usa o token estático do .env (SLACK_USER_TOKEN / SLACK_BOT_TOKEN)
+    """
+
+    def __init__(self, path: pathlib.Path = TOKEN_FILE, client_id: str = None, client_secret: str = None,
+                 refresh_margin: int = REFRESH_MARGIN):
+        self.path = path
+        self.client_id = client_id or os.getenv("SLACK_CLIENT_ID")
+        self.client_secret = client_secret or os.getenv("SLACK_CLIENT_SECRET")
+        self.refresh_margin = refresh_margin
+        self.memory = {}
+        self.lock = threading.Lock()
+
+    def _read(self) -> dict:
+        if not self.path.exists():
+            return {}
+        with open(self.path, "r", encoding="utf-8") as fp:
+            return json.load(fp)
+
+    def _write(self, data: dict):
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as fp:
+            json.dump(data, fp, indent=2)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp, self.path)
+        try:
+            os.chmod(self.path, 0o600)
+        except OSError:
+            pass
+
+    def _fresh(self, entry) -> bool:
+        if not entry:
+            return False
+        expires_at = entry.get("expires_at")
+        return expires_at is None or expires_at - time.time() > self.refresh_margin
+
+    def get(self, kind: str = "user") -> str:
+        with self.lock:
+            entry = self.memory.get(kind)
+            if self._fresh(entry):
+                return entry["access_token"]
+
+            with file_lock(self.path):
+                data = self._read()
+                entry = data.get(kind)
+                if entry is None:
+                    token = os.getenv(ENV_TOKENS.get(kind, ""))
+                    if not token:
+                        raise ConfigError(f"No Slack {kind} token: run access.py or set {ENV_TOKENS.get(kind)}")
+                    self.memory[kind] = {"access_token": token, "expires_at": None}
+                    return token
+
+                # outro processo pode ter renovado enquanto esperávamos o lock
+                if not self._fresh(entry):
+                    entry = self._refresh(entry)
+                    data[kind] = entry
+                    self._write(data)
+
+            self.memory[kind] = entry
+            return entry["access_token"]
+
+    def force_refresh(self, kind: str = "user") -> str:
+        """Renova já (ex.: a API respondeu token_expired mesmo assim)."""
+        with self.lock:
+            self.memory.pop(kind, None)
+            with file_lock(self.path):
+                data = self._read()
+                if kind not in data:
+                    raise ConfigError(f"No refresh token stored for Slack {kind} token: run access.py")
+                data[kind] = self._refresh(data[kind])
+                self._write(data)
+            self.memory[kind] = data[kind]
+            return data[kind]["access_token"]
+
+    def _oauth(self, **form) -> dict:
+        r = metrics.post(
+            "slack", SLACK_API.rstrip("/") + "/oauth.v2.access",
+            data={"client_id": self.client_id, "client_secret": self.client_secret, **form},
+            timeout=30,
+        )
+        data = r.json()
+        if not data.get("ok"):
+            raise RuntimeError(f"oauth.v2.access: {data.get('error')}")
+        return data
+
+    @staticmethod
+    def _entry(data: dict) -> dict:
+        return {
+            "access_token": data["access_token"],
+            "refresh_token": data.get("refresh_token"),
+            "expires_at": time.time() + data["expires_in"] if data.get("expires_in") else None,
+        }
+
+    def _refresh(self, entry: dict) -> dict:
+        if not entry.get("refresh_token"):
+            return entry  # token sem rotação: não expira
+        data = self._oauth(grant_type="refresh_token", refresh_token=entry["refresh_token"])
+        if "access_token" not in data:
+            data = data.get("authed_user") or {}
+        print(f"Slack token refreshed (expires in {int(data.get('expires_in') or 0) // 60} min)")
+        return self._entry(data)
+
+    def exchange_code(self, code: str, redirect_uri: str) -> dict:
+        """Troca o code do OAuth (instalação) pelos tokens e grava no arquivo. Retorna a resposta."""
+        data = self._oauth(code=code, redirect_uri=redirect_uri)
+        with self.lock, file_lock(self.path):
+            stored = self._read()
+            if data.get("access_token"):
+                stored["bot" if data.get("token_type") == "bot" else "user"] = self._entry(data)
+            if (data.get("authed_user") or {}).get("access_token"):
+                stored["user"] = self._entry(data["authed_user"])
+            self._write(stored)
+            self.memory.clear()
+        return data
+
+    def token(self, kind: str = "user") -> "SlackToken":
+        return SlackToken(self, kind)
+
+
+class SlackToken:
+    """Token "vivo" pra passar ao SlackClient: cada uso pega o access token válido do momento."""
+
+    def __init__(self, manager: TokenManager, kind: str):
+        self.manager = manager
+        self.kind = kind
+
+    def __call__(self) -> str:
+        return self.manager.get(self.kind)
+
+    def refresh(self) -> str:
+        return self.manager.force_refresh(self.kind)
+
+
+_default_manager = None
+_default_lock = threading.Lock()
+
+
+def slack_token(kind: str = "user") -> SlackToken:
+    """Token compartilhado (mesmo TokenManager/arquivo pra todas as ferramentas)."""
+    global _default_manager
+    with _default_lock:
+        if _default_manager is None:
+            _default_manager = TokenManager()
+    return _default_manager.token(kind)